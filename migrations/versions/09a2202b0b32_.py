@@ -0,0 +1,61 @@
+"""holidays no overlap
+
+Revision ID: 09a2202b0b32
+Revises: 67b836627531
+Create Date: 2026-10-18 10:11:51.080400
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '09a2202b0b32'
+down_revision = '67b836627531'
+branch_labels = None
+depends_on = None
+
+
+ACTIVE = "('PENDING', 'APPROVED')"
+SQLITE_OVERLAP_CHECK = f"""
+BEGIN
+    SELECT RAISE(ABORT, 'ex_holidays_no_overlap')
+    WHERE EXISTS (
+        SELECT 1 FROM holidays h
+        WHERE h.employee_id = NEW.employee_id
+          AND h.id IS NOT NEW.id
+          AND h.status IN {ACTIVE}
+          AND h.start_date <= NEW.end_date
+          AND h.end_date >= NEW.start_date
+    );
+END"""
+
+
+def upgrade():
+    # falla si ya hay solicitudes PENDING/APPROVED solapadas: hay que resolverlas antes
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        op.execute(
+            "ALTER TABLE holidays ADD CONSTRAINT ex_holidays_no_overlap EXCLUDE USING gist "
+            "(employee_id WITH =, daterange(start_date, end_date, '[]') WITH &&) "
+            f"WHERE (status IN {ACTIVE})"
+        )
+    elif dialect == "sqlite":
+        op.execute(
+            "CREATE TRIGGER ex_holidays_no_overlap_insert BEFORE INSERT ON holidays "
+            f"WHEN NEW.status IN {ACTIVE}" + SQLITE_OVERLAP_CHECK
+        )
+        op.execute(
+            "CREATE TRIGGER ex_holidays_no_overlap_update "
+            "BEFORE UPDATE OF employee_id, start_date, end_date, status ON holidays "
+            f"WHEN NEW.status IN {ACTIVE}" + SQLITE_OVERLAP_CHECK
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("ALTER TABLE holidays DROP CONSTRAINT IF EXISTS ex_holidays_no_overlap")
+    elif dialect == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS ex_holidays_no_overlap_insert")
+        op.execute("DROP TRIGGER IF EXISTS ex_holidays_no_overlap_update")
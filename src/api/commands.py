@@ -1,8 +1,36 @@
+import csv
+import enum
+import io
 import os
+import random
 from typing import Optional
-from datetime import date
+from datetime import date, datetime, time, timedelta, timezone
 import click
-from api.models import db, Employee, Role, Salary, Company, ShiftType
+from api.models import (
+    db,
+    Employee,
+    Role,
+    Salary,
+    Company,
+    ShiftType,
+    ShiftSeries,
+    ShiftException,
+    ShiftOccurrence,
+    TimePunch,
+    PunchType,
+    Holidays,
+    Payroll,
+    VacationBalance,
+)
+from api.utils_auth.utils_shifts import (
+    occurrences_enabled,
+    occurrence_horizon,
+    refresh_series_occurrences,
+    set_materialized_window,
+)
+from api.utils_auth.utils_calendar import company_business_days
+from api.utils_auth.utils_timepunch import WORK_SUMMARY_TZ, reconstruir_rollup
+from api.utils_auth.utils_vacations import HolidayStatus
 
 """
 In this file, you can add as many commands as you want using the @app.cli.command decorator
@@ -59,6 +87,211 @@ def setup_commands(app):
                 seed_defaults()
             click.echo(" Base de datos reiniciada" + (" + seed" if with_seed else ""))
 
+    @app.cli.command("refresh-shift-occurrences")
+    @click.option("--company-id", type=int, default=None, help="Solo esta empresa")
+    def refresh_shift_occurrences(company_id):
+        """
+        Re-materializa shift_occurrence en el horizonte actual y purga lo que
+        quedó fuera. Pensado para ejecutarse a diario (cron).
+        Al terminar, la ventana materializada (shift_occurrence_window) pasa a ser
+        el horizonte; mientras tanto las lecturas siguen usando la anterior.
+        Con --company-id solo se refresca esa empresa y la ventana no se mueve.
+        """
+        with app.app_context():
+            if not occurrences_enabled():
+                click.echo(" SHIFT_OCCURRENCES_ENABLED no está activo; nada que hacer.")
+                return
+            h_from, h_to = occurrence_horizon()
+
+            q = db.select(ShiftSeries.id).where(
+                ShiftSeries.start_date <= h_to,
+                (ShiftSeries.end_date.is_(None)) | (ShiftSeries.end_date >= h_from),
+            )
+            if company_id is not None:
+                q = q.where(ShiftSeries.company_id == company_id)
+            series_ids = db.session.execute(q).scalars().all()
+
+            # por lotes: una transacción por cada 500 series
+            total = 0
+            for i in range(0, len(series_ids), 500):
+                chunk = series_ids[i : i + 500]
+                for ser in db.session.execute(
+                    db.select(ShiftSeries).where(ShiftSeries.id.in_(chunk))
+                ).scalars():
+                    total += refresh_series_occurrences(ser, window=(h_from, h_to))
+                db.session.commit()
+
+            if company_id is None:
+                # purga y ventana nueva juntas: nunca se anuncia un rango a medio escribir
+                db.session.execute(
+                    db.delete(ShiftOccurrence).where(
+                        (ShiftOccurrence.date < h_from) | (ShiftOccurrence.date > h_to)
+                    )
+                )
+                set_materialized_window(h_from, h_to)
+                db.session.commit()
+            click.echo(f" {total} ocurrencias materializadas ({h_from} → {h_to}).")
+
+    @app.cli.command("backfill-work-summary")
+    @click.option("--from", "date_from", default=None, help="YYYY-MM-DD (por defecto, primer fichaje)")
+    @click.option("--to", "date_to", default=None, help="YYYY-MM-DD (por defecto, hoy)")
+    @click.option("--company-id", type=int, default=None, help="Solo esta empresa")
+    def backfill_work_summary(date_from, date_to, company_id):
+        """
+        Reconstruye daily_work_summary rejugando TimePunch en el rango indicado
+        (días locales en WORK_SUMMARY_TZ). Idempotente: borra y recalcula el rango.
+        """
+        with app.app_context():
+            d_to = date.fromisoformat(date_to) if date_to else date.today()
+            if date_from:
+                d_from = date.fromisoformat(date_from)
+            else:
+                first = db.session.execute(db.select(db.func.min(TimePunch.punched_at))).scalar()
+                if first is None:
+                    click.echo(" No hay fichajes; nada que hacer.")
+                    return
+                # un día antes por si el primer fichaje cae en otro día local
+                d_from = first.date() - timedelta(days=1)
+
+            written = reconstruir_rollup(d_from, d_to, company_id)
+            db.session.commit()
+            click.echo(
+                f" {written} días escritos en daily_work_summary ({d_from} → {d_to}, {WORK_SUMMARY_TZ})."
+            )
+
+    @app.cli.command("check-vacation-ledger")
+    @click.option("--company-id", type=int, default=None, help="Solo esta empresa")
+    @click.option("--fix", is_flag=True, help="Corregir los balances descuadrados")
+    def check_vacation_ledger(company_id, fix):
+        """
+        Compara vacation_balance.pending_days/used_days con la suma de las solicitudes
+        PENDING/APPROVED por empleado y año de start_date. Sale con código 1 si hay
+        descuadres y no se usa --fix.
+        """
+        with app.app_context():
+            year = db.cast(db.extract("year", Holidays.start_date), db.Integer)
+            q = db.select(
+                Holidays.company_id,
+                Holidays.employee_id,
+                year.label("year"),
+                db.func.sum(
+                    db.case((Holidays.status == HolidayStatus.PENDING, Holidays.requested_days), else_=0)
+                ),
+                db.func.sum(
+                    db.case((Holidays.status == HolidayStatus.APPROVED, Holidays.requested_days), else_=0)
+                ),
+            ).group_by(Holidays.company_id, Holidays.employee_id, year)
+            balances_q = db.select(VacationBalance)
+            if company_id is not None:
+                q = q.where(Holidays.company_id == company_id)
+                balances_q = balances_q.where(VacationBalance.company_id == company_id)
+
+            expected = {
+                (cid, eid, int(y)): (int(pending or 0), int(used or 0))
+                for cid, eid, y, pending, used in db.session.execute(q)
+            }
+            balances = {
+                (vb.company_id, vb.employee_id, vb.year): vb
+                for vb in db.session.execute(balances_q).scalars()
+            }
+
+            wrong = 0
+            for key in sorted(expected.keys() | balances.keys()):
+                pending, used = expected.get(key, (0, 0))
+                vb = balances.get(key)
+                if vb is None:
+                    if not (pending or used):
+                        continue
+                    wrong += 1
+                    click.echo(f" {key}: sin balance (pending={pending}, used={used})")
+                    if fix:
+                        db.session.add(
+                            VacationBalance(
+                                company_id=key[0],
+                                employee_id=key[1],
+                                year=key[2],
+                                allocated_days=22,
+                                used_days=used,
+                                pending_days=pending,
+                            )
+                        )
+                    continue
+                if (vb.pending_days, vb.used_days) != (pending, used):
+                    wrong += 1
+                    click.echo(
+                        f" {key}: pending {vb.pending_days}→{pending}, used {vb.used_days}→{used}"
+                    )
+                    if fix:
+                        vb.pending_days = pending
+                        vb.used_days = used
+
+            if fix:
+                db.session.commit()
+            click.echo(
+                f" {len(balances)} balances revisados, {wrong} descuadrados"
+                + (" (corregidos)." if fix and wrong else ".")
+            )
+            if wrong and not fix:
+                raise SystemExit(1)
+
+    @app.cli.command("seed-scale")
+    @click.option("--companies", type=int, default=5, show_default=True)
+    @click.option("--employees-per-company", type=int, default=200, show_default=True)
+    @click.option("--punch-days", type=int, default=120, show_default=True, help="Días hacia atrás con fichajes")
+    @click.option("--series-per-employee", type=int, default=5, show_default=True)
+    @click.option("--exceptions-per-series", type=int, default=2, show_default=True)
+    @click.option("--holidays-per-employee", type=int, default=3, show_default=True)
+    @click.option("--payroll-months", type=int, default=12, show_default=True)
+    @click.option("--chunk-size", type=int, default=5000, show_default=True)
+    @click.option("--tag", default="bench", show_default=True, help="Prefijo de cif/email/dni")
+    @click.option("--rng-seed", type=int, default=42, show_default=True)
+    @click.option("--no-copy", is_flag=True, help="No usar COPY en PostgreSQL (INSERT por bloques)")
+    def seed_scale_command(
+        companies,
+        employees_per_company,
+        punch_days,
+        series_per_employee,
+        exceptions_per_series,
+        holidays_per_employee,
+        payroll_months,
+        chunk_size,
+        tag,
+        rng_seed,
+        no_copy,
+    ):
+        """
+        Genera datos sintéticos a escala para perfilar en local, p. ej. 50 empresas,
+        10k empleados y ~10M fichajes:
+        flask seed-scale --companies 50 --employees-per-company 200 --punch-days 350
+        """
+        with app.app_context():
+            started = datetime.now()
+            try:
+                counts = seed_scale(
+                    companies=companies,
+                    employees_per_company=employees_per_company,
+                    punch_days=punch_days,
+                    series_per_employee=series_per_employee,
+                    exceptions_per_series=exceptions_per_series,
+                    holidays_per_employee=holidays_per_employee,
+                    payroll_months=payroll_months,
+                    chunk_size=chunk_size,
+                    tag=tag,
+                    rng_seed=rng_seed,
+                    use_copy=not no_copy,
+                )
+            except ValueError as error:
+                click.echo(f" {error}; usa otro --tag.")
+                return
+            elapsed = (datetime.now() - started).total_seconds()
+            for table, n in counts.items():
+                click.echo(f" {table}: {n}")
+            click.echo(f" {sum(counts.values())} filas en {elapsed:.1f}s.")
+            click.echo(
+                " Si usas daily_work_summary o shift_occurrence, ejecuta"
+                " backfill-work-summary / refresh-shift-occurrences."
+            )
+
 
 def _ensure_shift_type(
     code: str, name: str, color_hex: str, company_id: int | None = None
@@ -160,3 +393,280 @@ def seed_defaults(email: Optional[str] = None, password: Optional[str] = None):
         employee.set_password(admin_password)
         db.session.add(employee)
         db.session.commit()
+
+
+def _copy_rows(model, chunk) -> None:
+    """COPY ... FROM STDIN (CSV) de un bloque de dicts; solo PostgreSQL + psycopg2."""
+    columns = list(chunk[0].keys())
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in chunk:
+        writer.writerow(
+            [
+                r"\N" if v is None else v.name if isinstance(v, enum.Enum) else v
+                for v in (row[c] for c in columns)
+            ]
+        )
+    buf.seek(0)
+    cols = ", ".join(f'"{c}"' for c in columns)
+    cursor = db.session.connection().connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f'COPY "{model.__tablename__}" ({cols}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')',
+            buf,
+        )
+    finally:
+        cursor.close()
+
+
+def _bulk_insert(model, rows, chunk_size: int, use_copy: bool = False) -> int:
+    """
+    Inserta un iterable de dicts en bloques (executemany / insertmanyvalues),
+    con un commit por bloque para no acumular una transacción gigante.
+    Con use_copy=True y PostgreSQL cada bloque se carga con COPY (mucho más rápido).
+    """
+    use_copy = use_copy and db.engine.dialect.name == "postgresql"
+    total = 0
+    chunk = []
+
+    def flush():
+        if use_copy:
+            _copy_rows(model, chunk)
+        else:
+            db.session.execute(db.insert(model), chunk)
+        db.session.commit()
+
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush()
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        flush()
+        total += len(chunk)
+    return total
+
+
+def seed_scale(
+    companies: int = 5,
+    employees_per_company: int = 200,
+    punch_days: int = 120,
+    series_per_employee: int = 5,
+    exceptions_per_series: int = 2,
+    holidays_per_employee: int = 3,
+    payroll_months: int = 12,
+    chunk_size: int = 5000,
+    tag: str = "bench",
+    rng_seed: int = 42,
+    use_copy: bool = True,
+) -> dict:
+    """
+    Genera datos sintéticos a escala (empresas, roles, empleados, series con
+    excepciones, vacaciones con sus balances, fichajes y metadatos de nóminas) con
+    inserts masivos por bloques (COPY en PostgreSQL si use_copy).
+    Todo lleva el prefijo `tag` en cif/email/dni para poder convivir con datos reales;
+    lanza ValueError si ese `tag` ya está sembrado.
+    El primer empleado de cada empresa es Admin, el segundo RRHH y el resto Empleado.
+    Los fichajes cubren los días laborables de los últimos `punch_days` días
+    (IN, BREAK_START, BREAK_END, OUT por día). Devuelve el nº de filas por tabla.
+    """
+    if db.session.execute(
+        db.select(Company.id).where(Company.cif.like(f"{tag}-CIF-%")).limit(1)
+    ).first():
+        raise ValueError(f"ya hay datos sembrados con el tag '{tag}'")
+
+    rnd = random.Random(rng_seed)
+    counts = {}
+    today = date.today()
+
+    # Catálogos: tipos globales, salario y roles compartidos
+    types = [
+        _ensure_shift_type("MORNING", "Turno de Mañana", "#22c55e"),
+        _ensure_shift_type("EVENING", "Turno de Tarde", "#f59e0b"),
+    ]
+    salaries = [Salary(amount=amount) for amount in (1500, 2200, 3000)]
+    db.session.add_all(salaries)
+    db.session.flush()
+    admin_role = Role(name="Admin", description=f"{tag} admin", salary_id=salaries[2].id)
+    hr_role = Role(name="RRHH", description=f"{tag} recursos humanos", salary_id=salaries[1].id)
+    employee_role = Role(name="Empleado", description=f"{tag} empleado", salary_id=salaries[0].id)
+    db.session.add_all([admin_role, hr_role, employee_role])
+    db.session.commit()
+    counts["role"] = 3
+
+    counts["company"] = _bulk_insert(
+        Company,
+        ({"name": f"{tag} company {c}", "cif": f"{tag}-CIF-{c}"} for c in range(companies)),
+        chunk_size,
+        use_copy,
+    )
+    company_ids = (
+        db.session.execute(
+            db.select(Company.id).where(Company.cif.like(f"{tag}-CIF-%")).order_by(Company.id)
+        )
+        .scalars()
+        .all()
+    )
+
+    # Un solo hash bcrypt para todos: generar miles de hashes tardaría minutos
+    probe = Employee(password_hash="")
+    probe.set_password(f"{tag}-password")
+    password_hash = probe.password_hash
+
+    def employees():
+        for c_idx, company_id in enumerate(company_ids):
+            for e in range(employees_per_company):
+                yield {
+                    "company_id": company_id,
+                    "first_name": f"Nombre{e}",
+                    "last_name": f"Apellido{c_idx}",
+                    "dni": f"{tag}-{c_idx}-{e}",
+                    "birth": date(1970 + e % 30, 1 + e % 12, 1 + e % 28),
+                    "address": "Calle Falsa 123",
+                    "email": f"{tag}.{c_idx}.{e}@example.com",
+                    "seniority": date(2015 + e % 10, 1, 1),
+                    "phone": "600000000",
+                    "role_id": (
+                        admin_role.id if e == 0 else hr_role.id if e == 1 else employee_role.id
+                    ),
+                    "password_hash": password_hash,
+                }
+
+    counts["employee"] = _bulk_insert(Employee, employees(), chunk_size, use_copy)
+    staff = db.session.execute(
+        db.select(Employee.id, Employee.company_id)
+        .where(Employee.company_id.in_(company_ids))
+        .order_by(Employee.id)
+    ).all()
+    db.session.commit()
+
+    def series():
+        for employee_id, company_id in staff:
+            for _ in range(series_per_employee):
+                start_hour = rnd.choice((6, 7, 8, 14, 15))
+                yield {
+                    "company_id": company_id,
+                    "employee_id": employee_id,
+                    "type_id": types[0].id if start_hour < 12 else types[1].id,
+                    "start_date": today - timedelta(days=rnd.randint(0, 365)),
+                    "end_date": (
+                        None if rnd.random() < 0.5 else today + timedelta(days=rnd.randint(30, 365))
+                    ),
+                    "start_time": time(start_hour, 0),
+                    "end_time": time(start_hour + 7, 0),
+                    "weekdays_mask": rnd.randint(1, 127),
+                    "interval_weeks": rnd.choice((1, 1, 1, 2)),
+                    "tz_name": "Europe/Madrid",
+                    "active": True,
+                }
+
+    counts["shift_series"] = _bulk_insert(ShiftSeries, series(), chunk_size, use_copy)
+    db.session.commit()
+
+    def exceptions():
+        series_rows = db.session.execute(
+            db.select(ShiftSeries.id, ShiftSeries.start_date, ShiftSeries.type_id)
+            .where(ShiftSeries.company_id.in_(company_ids))
+            .order_by(ShiftSeries.id)
+        ).all()
+        for series_id, start_date, type_id in series_rows:
+            # fechas distintas por serie (unique series_id + date)
+            for offset in rnd.sample(range(120), min(exceptions_per_series, 120)):
+                cancel = rnd.random() < 0.5
+                yield {
+                    "series_id": series_id,
+                    "date": start_date + timedelta(days=offset),
+                    "action": "cancel" if cancel else "modify",
+                    "new_start_time": None if cancel else time(9, 0),
+                    "new_end_time": None if cancel else time(13, 0),
+                    "new_type_id": None if cancel else type_id,
+                    "note": None,
+                }
+
+    counts["shift_exception"] = _bulk_insert(ShiftException, exceptions(), chunk_size, use_copy)
+
+    # (empresa, empleado, año) -> [pending, used], lo que check-vacation-ledger espera
+    ledger: dict[tuple[int, int, int], list[int]] = {}
+
+    def holidays():
+        statuses = list(HolidayStatus)
+        for employee_id, company_id in staff:
+            # tramos consecutivos con hueco entre ellos: las solicitudes de un mismo
+            # empleado no se solapan (ex_holidays_no_overlap)
+            start = today - timedelta(days=rnd.randint(180, 270))
+            for _ in range(holidays_per_employee):
+                if start.weekday() >= 5:
+                    start += timedelta(days=7 - start.weekday())  # empezar en laborable
+                end = start + timedelta(days=rnd.randint(1, 10) - 1)
+                status = rnd.choice(statuses)
+                days = company_business_days(company_id, start, end)
+                if status in (HolidayStatus.PENDING, HolidayStatus.APPROVED):
+                    entry = ledger.setdefault((company_id, employee_id, start.year), [0, 0])
+                    entry[status == HolidayStatus.APPROVED] += days
+                yield {
+                    "company_id": company_id,
+                    "employee_id": employee_id,
+                    "start_date": start,
+                    "end_date": end,
+                    "status": status,
+                    "requested_days": days,
+                    "reason": "vacaciones",
+                }
+                start = end + timedelta(days=rnd.randint(7, 60))
+
+    counts["holidays"] = _bulk_insert(Holidays, holidays(), chunk_size, use_copy)
+    counts["vacation_balance"] = _bulk_insert(
+        VacationBalance,
+        (
+            {
+                "company_id": company_id,
+                "employee_id": employee_id,
+                "year": year,
+                "allocated_days": max(22, pending + used),
+                "used_days": used,
+                "pending_days": pending,
+            }
+            for (company_id, employee_id, year), (pending, used) in ledger.items()
+        ),
+        chunk_size,
+        use_copy,
+    )
+
+    def payrolls():
+        for employee_id, company_id in staff:
+            for m in range(payroll_months):
+                month_index = today.year * 12 + today.month - 2 - m  # meses cerrados
+                yield {
+                    "company_id": company_id,
+                    "employee_id": employee_id,
+                    "period_year": month_index // 12,
+                    "period_month": month_index % 12 + 1,
+                    "original_filename": f"nomina_{employee_id}_{m}.pdf",
+                    "cloudinary_bytes": 120_000,
+                }
+
+    counts["payroll"] = _bulk_insert(Payroll, payrolls(), chunk_size, use_copy)
+    db.session.commit()
+
+    def punches():
+        workdays = [
+            today - timedelta(days=d)
+            for d in range(punch_days, 0, -1)
+            if (today - timedelta(days=d)).weekday() < 5
+        ]
+        for employee_id, _ in staff:
+            for day in workdays:
+                start = datetime.combine(day, time(7, rnd.randint(0, 59)), tzinfo=timezone.utc)
+                brk = start + timedelta(hours=4, minutes=rnd.randint(0, 30))
+                for punch_type, at in (
+                    (PunchType.IN, start),
+                    (PunchType.BREAK_START, brk),
+                    (PunchType.BREAK_END, brk + timedelta(minutes=rnd.randint(15, 45))),
+                    (PunchType.OUT, start + timedelta(hours=8, minutes=rnd.randint(30, 90))),
+                ):
+                    yield {"employee_id": employee_id, "punch_type": punch_type, "punched_at": at}
+
+    counts["time_punch"] = _bulk_insert(TimePunch, punches(), chunk_size, use_copy)
+    db.session.commit()
+    return counts
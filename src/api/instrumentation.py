@@ -0,0 +1,219 @@
+import hmac
+import os
+import threading
+import time
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Instrumentación opcional por endpoint (todo desactivado por defecto):
+# - SQL_QUERY_STATS=1: cabecera X-Query-Count y "METHOD endpoint -> N queries" en el log
+#   (warning si se superan SQL_QUERY_WARN queries, útil para detectar N+1).
+# - METRICS_ENABLED=1: acumula por endpoint latencia, nº de sentencias SQL, tiempo SQL
+#   y las sentencias más lentas; añade Server-Timing a cada respuesta y expone
+#   GET /api/metrics en formato texto de Prometheus, protegido con
+#   "Authorization: Bearer $METRICS_TOKEN" (sin METRICS_TOKEN el endpoint responde 403).
+# La latencia se mide hasta after_request: en respuestas en streaming no incluye el envío del cuerpo.
+SQL_QUERY_WARN = int(os.getenv("SQL_QUERY_WARN", 20))
+METRICS_SLOWEST_KEPT = int(os.getenv("METRICS_SLOWEST_KEPT", 10))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def query_stats_enabled() -> bool:
+    return os.getenv("SQL_QUERY_STATS") == "1"
+
+
+def metrics_enabled() -> bool:
+    return os.getenv("METRICS_ENABLED") == "1"
+
+
+def current_query_count() -> int:
+    return g.get("_sql_query_count", 0) if has_request_context() else 0
+
+
+# ---------- eventos del engine ----------
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    starts = conn.info.get("_query_start")
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    g._sql_query_count = g.get("_sql_query_count", 0) + 1
+    g._sql_time = g.get("_sql_time", 0.0) + elapsed
+    slowest = g.get("_sql_slowest")
+    if slowest is None or elapsed > slowest[0]:
+        g._sql_slowest = (elapsed, statement)
+
+
+# ---------- agregados por endpoint ----------
+
+
+class _EndpointStats:
+    __slots__ = ("requests", "latency_sum", "buckets", "sql_count", "sql_time", "statuses")
+
+    def __init__(self):
+        self.requests = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statuses: dict[int, int] = {}
+
+
+class MetricsRegistry:
+    """Acumulados en memoria del proceso (uno por worker)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[str, str], _EndpointStats] = {}
+        self._slowest: list[tuple[float, str, str]] = []  # (segundos, endpoint, sentencia)
+
+    def observe(self, method, endpoint, status, latency, sql_count, sql_time, slowest):
+        with self._lock:
+            stats = self._stats.get((method, endpoint))
+            if stats is None:
+                stats = self._stats[(method, endpoint)] = _EndpointStats()
+            stats.requests += 1
+            stats.latency_sum += latency
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    stats.buckets[i] += 1
+            stats.sql_count += sql_count
+            stats.sql_time += sql_time
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+            if slowest is not None:
+                elapsed, statement = slowest
+                if (
+                    len(self._slowest) < METRICS_SLOWEST_KEPT
+                    or elapsed > self._slowest[-1][0]
+                ):
+                    self._slowest.append((elapsed, endpoint, " ".join(statement.split())[:200]))
+                    self._slowest.sort(key=lambda s: s[0], reverse=True)
+                    del self._slowest[METRICS_SLOWEST_KEPT:]
+
+    def render_prometheus(self) -> str:
+        def esc(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+        lines = [
+            "# HELP http_requests_total Peticiones atendidas por endpoint y status.",
+            "# TYPE http_requests_total counter",
+        ]
+        with self._lock:
+            items = sorted(self._stats.items())
+            slowest = list(self._slowest)
+
+        for (method, endpoint), s in items:
+            for status, n in sorted(s.statuses.items()):
+                lines.append(
+                    f'http_requests_total{{method="{method}",endpoint="{esc(endpoint)}",status="{status}"}} {n}'
+                )
+
+        lines += [
+            "# HELP http_request_duration_seconds Latencia de las peticiones por endpoint.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, endpoint), s in items:
+            labels = f'method="{method}",endpoint="{esc(endpoint)}"'
+            for bound, n in zip(LATENCY_BUCKETS, s.buckets):
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {n}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {s.requests}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {s.latency_sum:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {s.requests}")
+
+        lines += [
+            "# HELP sql_statements_total Sentencias SQL ejecutadas por endpoint.",
+            "# TYPE sql_statements_total counter",
+        ]
+        for (method, endpoint), s in items:
+            lines.append(
+                f'sql_statements_total{{method="{method}",endpoint="{esc(endpoint)}"}} {s.sql_count}'
+            )
+
+        lines += [
+            "# HELP sql_duration_seconds_total Tiempo total en SQL por endpoint.",
+            "# TYPE sql_duration_seconds_total counter",
+        ]
+        for (method, endpoint), s in items:
+            lines.append(
+                f'sql_duration_seconds_total{{method="{method}",endpoint="{esc(endpoint)}"}} {s.sql_time:.6f}'
+            )
+
+        lines += [
+            "# HELP sql_slowest_statement_seconds Sentencias SQL más lentas vistas por este proceso.",
+            "# TYPE sql_slowest_statement_seconds gauge",
+        ]
+        for elapsed, endpoint, statement in slowest:
+            lines.append(
+                f'sql_slowest_statement_seconds{{endpoint="{esc(endpoint)}",statement="{esc(statement)}"}} {elapsed:.6f}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _metrics_view():
+    token = os.getenv("METRICS_TOKEN")
+    auth = request.headers.get("Authorization", "")
+    if not token or not hmac.compare_digest(auth, f"Bearer {token}"):
+        return Response("Forbidden\n", status=403, mimetype="text/plain")
+    return Response(
+        registry.render_prometheus(), mimetype="text/plain; version=0.0.4"
+    )
+
+
+def setup_instrumentation(app):
+    stats = query_stats_enabled()
+    metrics = metrics_enabled()
+    if not (stats or metrics):
+        return
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    if metrics:
+        app.add_url_rule("/api/metrics", "metrics", _metrics_view, methods=["GET"])
+
+    @app.before_request
+    def _start_request_stats():
+        g._request_start = time.perf_counter()
+        g._sql_query_count = 0
+        g._sql_time = 0.0
+        g._sql_slowest = None
+
+    @app.after_request
+    def _report_request_stats(response):
+        count = current_query_count()
+        sql_time = g.get("_sql_time", 0.0)
+        latency = time.perf_counter() - g.get("_request_start", time.perf_counter())
+        endpoint = request.endpoint or "<unmatched>"
+
+        if stats:
+            response.headers["X-Query-Count"] = str(count)
+            log = app.logger.warning if count > SQL_QUERY_WARN else app.logger.info
+            log("%s %s -> %d queries", request.method, endpoint, count)
+
+        if metrics:
+            response.headers.add(
+                "Server-Timing",
+                f'app;dur={latency * 1000:.1f}, db;dur={sql_time * 1000:.1f};desc="{count} queries"',
+            )
+            registry.observe(
+                request.method,
+                endpoint,
+                response.status_code,
+                latency,
+                count,
+                sql_time,
+                g.get("_sql_slowest"),
+            )
+        return response
@@ -12,13 +12,15 @@ from sqlalchemy import (
     UniqueConstraint,
     CheckConstraint,
     Boolean,
+    DDL,
+    event,
     func,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from flask_bcrypt import generate_password_hash, check_password_hash
 import enum
 from datetime import datetime, timezone, date
 from api.utils_auth.utils_vacations import HolidayStatus
+from api.utils_auth.utils_passwords import hash_password, verify_password
 from typing import Optional
 
 db = SQLAlchemy()
@@ -34,6 +36,8 @@ class Company(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     cif: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    # región para el calendario de festivos (p. ej. "ES-MD"); None = solo nacionales
+    region: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
 
     employees: Mapped[list["Employee"]] = relationship(
         "Employee",
@@ -65,7 +69,7 @@ class Company(db.Model):
     )
 
     def serialize(self):
-        return {"id": self.id, "name": self.name, "cif": self.cif}
+        return {"id": self.id, "name": self.name, "cif": self.cif, "region": self.region}
 
 
 # --------------------
@@ -82,6 +86,10 @@ class VacationBalance(db.Model):
     year: Mapped[int] = mapped_column(Integer, nullable=False)
     allocated_days: Mapped[int] = mapped_column(Integer, nullable=False, default=22)
     used_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # días de solicitudes PENDING del año, mantenido por las rutas de holidays
+    pending_days: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -92,6 +100,7 @@ class VacationBalance(db.Model):
     __table_args__ = (
         CheckConstraint("allocated_days >= 0", name="ck_balance_alloc_nonneg"),
         CheckConstraint("used_days >= 0", name="ck_balance_used_nonneg"),
+        CheckConstraint("pending_days >= 0", name="ck_balance_pending_nonneg"),
         Index("ix_balance_emp_year", "employee_id", "year", unique=True),
         Index("ix_balance_company_emp_year", "company_id", "employee_id", "year"),
     )
@@ -103,6 +112,7 @@ class VacationBalance(db.Model):
             "year": self.year,
             "allocated_days": self.allocated_days,
             "used_days": self.used_days,
+            "pending_days": self.pending_days,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
@@ -174,6 +184,80 @@ class Holidays(db.Model):
         }
 
 
+# Sin solapes entre solicitudes PENDING/APPROVED del mismo empleado, garantizado por la BD
+# (atómico frente a solicitudes simultáneas; la violación llega como IntegrityError):
+# - PostgreSQL: restricción EXCLUDE sobre daterange con índice GiST (extensión btree_gist).
+# - SQLite: triggers equivalentes. Ambos usan el nombre HOLIDAYS_NO_OVERLAP en el error.
+# Para BDs migradas lo crea la migración; aquí, para db.create_all().
+HOLIDAYS_NO_OVERLAP = "ex_holidays_no_overlap"
+_ACTIVE = "('PENDING', 'APPROVED')"
+_SQLITE_OVERLAP_CHECK = f"""
+BEGIN
+    SELECT RAISE(ABORT, '{HOLIDAYS_NO_OVERLAP}')
+    WHERE EXISTS (
+        SELECT 1 FROM holidays h
+        WHERE h.employee_id = NEW.employee_id
+          AND h.id IS NOT NEW.id
+          AND h.status IN {_ACTIVE}
+          AND h.start_date <= NEW.end_date
+          AND h.end_date >= NEW.start_date
+    );
+END"""
+
+for _ddl in (
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+    DDL(
+        f"ALTER TABLE holidays ADD CONSTRAINT {HOLIDAYS_NO_OVERLAP} EXCLUDE USING gist "
+        f"(employee_id WITH =, daterange(start_date, end_date, '[]') WITH &&) "
+        f"WHERE (status IN {_ACTIVE})"
+    ).execute_if(dialect="postgresql"),
+    DDL(
+        f"CREATE TRIGGER {HOLIDAYS_NO_OVERLAP}_insert BEFORE INSERT ON holidays "
+        f"WHEN NEW.status IN {_ACTIVE}" + _SQLITE_OVERLAP_CHECK
+    ).execute_if(dialect="sqlite"),
+    DDL(
+        f"CREATE TRIGGER {HOLIDAYS_NO_OVERLAP}_update "
+        f"BEFORE UPDATE OF employee_id, start_date, end_date, status ON holidays "
+        f"WHEN NEW.status IN {_ACTIVE}" + _SQLITE_OVERLAP_CHECK
+    ).execute_if(dialect="sqlite"),
+):
+    event.listen(Holidays.__table__, "after_create", _ddl)
+
+
+# --------------------
+# PublicHoliday (festivos: nacionales, regionales o de empresa)
+# --------------------
+
+
+class PublicHoliday(db.Model):
+    __tablename__ = "public_holiday"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # company_id NULL + region NULL → nacional; company_id NULL + region → regional;
+    # company_id → solo esa empresa (local o convenio)
+    company_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("company.id"), nullable=True
+    )
+    region: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    date: Mapped[Date] = mapped_column(Date, nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("company_id", "region", "date", name="uq_public_holiday_scope_date"),
+        Index("ix_public_holiday_date", "date"),
+        Index("ix_public_holiday_company_date", "company_id", "date"),
+    )
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "company_id": self.company_id,
+            "region": self.region,
+            "date": self.date.isoformat(),
+            "name": self.name,
+        }
+
+
 # --------------------
 # Employee
 # --------------------
@@ -231,10 +315,10 @@ class Employee(db.Model):
     )
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password).decode("utf-8")
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def serialize(self):
         return {
@@ -522,6 +606,63 @@ class ShiftException(db.Model):
         }
 
 
+# --------------------
+# ShiftOccurrence (ocurrencias materializadas de series, opcional)
+# --------------------
+class ShiftOccurrence(db.Model):
+    __tablename__ = "shift_occurrence"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    series_id: Mapped[int] = mapped_column(
+        ForeignKey("shift_series.id"), nullable=False
+    )
+    company_id: Mapped[int] = mapped_column(ForeignKey("company.id"), nullable=False)
+    employee_id: Mapped[int] = mapped_column(ForeignKey("employee.id"), nullable=False)
+
+    # ya con las excepciones aplicadas ('cancel' no genera fila, 'modify' cambia horas/tipo)
+    date: Mapped[Date] = mapped_column(Date, nullable=False)
+    start_time: Mapped[Time] = mapped_column(Time, nullable=False)
+    end_time: Mapped[Time] = mapped_column(Time, nullable=False)
+    type_id: Mapped[int] = mapped_column(ForeignKey("shift_type.id"), nullable=False)
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("series_id", "date", name="uq_shift_occurrence_series_date"),
+        Index("ix_shift_occurrence_emp_date", "employee_id", "date"),
+        Index("ix_shift_occurrence_company_date", "company_id", "date"),
+    )
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "series_id": self.series_id,
+            "company_id": self.company_id,
+            "employee_id": self.employee_id,
+            "date": self.date.isoformat(),
+            "start_time": self.start_time.strftime("%H:%M"),
+            "end_time": self.end_time.strftime("%H:%M"),
+            "type_id": self.type_id,
+            "notes": self.notes,
+        }
+
+
+class ShiftOccurrenceWindow(db.Model):
+    """
+    Rango [from_date, to_date] que shift_occurrence tiene materializado de verdad.
+    Una sola fila (id=1) que escribe `flask refresh-shift-occurrences` al terminar;
+    sin ella (recién activado SHIFT_OCCURRENCES_ENABLED) las lecturas expanden al vuelo.
+    """
+
+    __tablename__ = "shift_occurrence_window"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    from_date: Mapped[date] = mapped_column(Date, nullable=False)
+    to_date: Mapped[date] = mapped_column(Date, nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+
 # --------------------
 # Suggestions
 # --------------------
@@ -589,6 +730,69 @@ class TimePunch(db.Model):
             "punched_at": self.punched_at.isoformat(),
             "note": self.note,
         }
+
+
+class TimePunchState(db.Model):
+    """
+    Estado actual de fichaje por empleado (desnormalizado).
+    Se actualiza en la misma transacción que cada TimePunch, de modo que
+    comprobar "¿turno abierto / en pausa?" es una búsqueda por PK.
+    """
+
+    __tablename__ = "time_punch_state"
+
+    employee_id: Mapped[int] = mapped_column(
+        ForeignKey("employee.id"), primary_key=True
+    )
+    last_punch_id: Mapped[int | None] = mapped_column(
+        ForeignKey("time_punch.id"), nullable=True
+    )
+    last_type: Mapped[PunchType | None] = mapped_column(
+        Enum(PunchType, name="punch_type", native_enum=False, validate_strings=True),
+        nullable=True,
+    )
+    last_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    last_punch: Mapped["TimePunch"] = relationship("TimePunch")
+
+    def serialize(self) -> dict:
+        return {
+            "employee_id": self.employee_id,
+            "last_punch_id": self.last_punch_id,
+            "last_type": self.last_type.value if self.last_type else None,
+            "last_at": self.last_at.isoformat() if self.last_at else None,
+        }
+
+
+class DailyWorkSummary(db.Model):
+    """
+    Rollup diario de tiempo trabajado por empleado (día local del IN en
+    WORK_SUMMARY_TZ). Se acumula al cerrar cada sesión con un OUT y se puede
+    reconstruir con `flask backfill-work-summary`.
+    """
+
+    __tablename__ = "daily_work_summary"
+
+    employee_id: Mapped[int] = mapped_column(
+        ForeignKey("employee.id"), primary_key=True
+    )
+    date: Mapped[Date] = mapped_column(Date, primary_key=True)
+    sessions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    gross_seconds: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    break_seconds: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    net_seconds: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def serialize(self) -> dict:
+        return {
+            "employee_id": self.employee_id,
+            "date": self.date.isoformat(),
+            "sessions": self.sessions,
+            "gross_seconds": self.gross_seconds,
+            "break_seconds": self.break_seconds,
+            "net_seconds": self.net_seconds,
+        }
     
 class Contact(db.Model):
     __tablename__ = "Contact"
@@ -10,6 +10,8 @@ from api.utils_auth.helpers_auth import (
     is_ownerdb,
     get_system_role,
 )
+from api.utils_auth.utils_login_cache import clear_login_cache
+from api.utils_auth.utils_calendar import invalidate_calendar
 
 
 company_bp = Blueprint("company", __name__, url_prefix="/companies")
@@ -70,7 +72,8 @@ def create_company():
     if not name or not cif:
         return jsonify({"error": "Missing required fields: name, cif"}), 400
 
-    company = Company(name=name, cif=cif)
+    region = (data.get("region") or "").strip() or None
+    company = Company(name=name, cif=cif, region=region)
     try:
         db.session.add(company)
         db.session.commit()
@@ -100,6 +103,8 @@ def update_company(id):
         company.name = (data["name"] or "").strip()
     if "cif" in data:
         company.cif = (data["cif"] or "").strip()
+    if "region" in data:
+        company.region = (data["region"] or "").strip() or None
 
     try:
         db.session.commit()
@@ -107,6 +112,9 @@ def update_company(id):
         db.session.rollback()
         return jsonify({"error": "CIF already in use"}), 409
 
+    # el login devuelve el nombre de la empresa del empleado
+    clear_login_cache()
+    invalidate_calendar(company.id)
     return jsonify(company.serialize()), 200
 
 
@@ -124,6 +132,7 @@ def delete_company(id):
     try:
         db.session.delete(company)
         db.session.commit()
+        clear_login_cache()
     except IntegrityError:
         db.session.rollback()
         return jsonify({"error": "Cannot delete company with related data"}), 400
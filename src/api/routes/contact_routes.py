@@ -1,13 +1,17 @@
 from flask import Blueprint, request, jsonify
 from api.models import db, Contact
 from flask_cors import CORS
+from api.utils_auth.utils_pagination import pagination_requested, paginated_response
 
 contact_bp = Blueprint("contacts", __name__,url_prefix="/contacts")
 CORS(contact_bp)
 
 @contact_bp.route("/", methods=["GET"])
 def get_contacts():
-    contacts = Contact.query.all()
+    stmt = db.select(Contact)
+    if pagination_requested():
+        return paginated_response(stmt, [Contact.id])
+    contacts = db.session.execute(stmt).scalars().all()
     return jsonify([c.serialize() for c in contacts]), 200
 
 
@@ -1,15 +1,15 @@
 from flask import jsonify, Blueprint, request, render_template
-from api.models import db, Employee, VacationBalance, Holidays, Payroll, Shifts, ShiftSeries, Suggestions, TimePunch, Role, Company
+from api.models import db, Employee, VacationBalance, Holidays, Payroll, Shifts, ShiftSeries, ShiftOccurrence, Suggestions, TimePunch, TimePunchState, DailyWorkSummary
 from flask_cors import CORS
 from flask_jwt_extended import (
     create_access_token,
     get_jwt_identity,
-    get_jwt,
     jwt_required,
     create_refresh_token,
 )
 # from flask_mail import Message
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from api.mail_config import send_email, EmailError
 from datetime import timedelta
 from ..commands import seed_defaults
@@ -23,7 +23,12 @@ from api.utils_auth.helpers_auth import (
     is_admin_or_hr,
     is_ownerdb,
     current_employee_id,
+    build_claims,
 )
+from api.utils_auth.utils_loaders import employee_loader, role_loader, company_loader
+from api.utils_auth.utils_pagination import pagination_requested, paginated_response
+from api.utils_auth.utils_login_cache import get_login_record, invalidate_login
+from api.utils_auth.utils_passwords import verify_password, needs_rehash
 
 
 employee_bp = Blueprint(
@@ -51,15 +56,14 @@ def get_employees():
                 company_id_query = int(company_id_query)
             except (TypeError, ValueError):
                 return jsonify({"error": "company_id must be an integer"}), 400
-            employees = (
-                db.session.execute(
-                    db.select(Employee).where(Employee.company_id == company_id_query)
-                )
-                .scalars()
-                .all()
-            )
+            stmt = db.select(Employee).where(Employee.company_id == company_id_query)
         else:
-            employees = db.session.execute(db.select(Employee)).scalars().all()
+            stmt = db.select(Employee)
+        # serialize() lee company.name: cargamos las empresas en 1 query, no 1 por empleado
+        stmt = stmt.options(selectinload(Employee.company))
+        if pagination_requested():
+            return paginated_response(stmt, [Employee.id])
+        employees = db.session.execute(stmt).scalars().all()
         return jsonify([e.serialize() for e in employees]), 200
 
     if not is_admin_or_hr():
@@ -69,11 +73,14 @@ def get_employees():
     if company_id is None:
         return jsonify({"error": "Unauthorized"}), 401
 
-    employees = (
-        db.session.execute(db.select(Employee).where(Employee.company_id == company_id))
-        .scalars()
-        .all()
+    stmt = (
+        db.select(Employee)
+        .where(Employee.company_id == company_id)
+        .options(selectinload(Employee.company))
     )
+    if pagination_requested():
+        return paginated_response(stmt, [Employee.id])
+    employees = db.session.execute(stmt).scalars().all()
 
     return jsonify([e.serialize() for e in employees]), 200
 
@@ -82,7 +89,7 @@ def get_employees():
 @employee_bp.route("/profile", methods=["GET"])
 @jwt_required()
 def get_employee_profile():
-    employee = db.session.get(Employee, current_employee_id())
+    employee = employee_loader().get(current_employee_id())
     if not employee:
         return jsonify({"error": "Employee not found"}), 404
     return jsonify(employee.serialize()), 200
@@ -144,7 +151,7 @@ def create_employee():
     except (TypeError, ValueError):
         return jsonify({"error": "role_id is invalid or missing"}), 400
 
-    role = db.session.get(Role, role_id)
+    role = role_loader().get(role_id)
     if not role:
         return jsonify({"error": "role_id is invalid or missing"}), 400
 
@@ -154,7 +161,7 @@ def create_employee():
             company_id_body = int(data.get("company_id"))
         except (TypeError, ValueError):
             return jsonify({"error": "company_id must be an integer"}), 400
-        if not db.session.get(Company, company_id_body):
+        if not company_loader().get(company_id_body):
             return jsonify({"error": "company_id invalid"}), 400
         target_company_id = company_id_body
     else:
@@ -221,7 +228,7 @@ def create_employee():
 @employee_bp.route("/edit/<int:id>", methods=["PUT"])
 @jwt_required()
 def update_employee(id: int):
-    employee = db.session.get(Employee, id)
+    employee = employee_loader().get(id)
     if not employee:
         return jsonify({"error": "Employee not found"}), 404
 
@@ -272,7 +279,7 @@ def update_employee(id: int):
         if not (i_am_owner or i_am_admin_or_hr):
             return jsonify({"error": "Not allowed to change role"}), 403
         role_id_value = data["role_id"]
-        if role_id_value and not db.session.get(Role, role_id_value):
+        if role_id_value and not role_loader().get(role_id_value):
             return jsonify({"error": f"Role id={role_id_value} does not exist"}), 400
         employee.role_id = role_id_value
 
@@ -288,6 +295,7 @@ def update_employee(id: int):
         # Puede ser colisión de email único u otra FK/unique
         return jsonify({"error": "Integrity error updating employee"}), 409
 
+    invalidate_login(employee.id)
     return jsonify(employee.serialize()), 200
 
 
@@ -297,23 +305,25 @@ def update_employee(id: int):
 @jwt_required()
 def delete_employee(id: int):
     # Bloqueo owner auto-borrado:
-    claims = get_jwt()
-    if (claims.get("system_role") or "").upper() == "OWNERDB":
+    if is_ownerdb():
         try:
             if int(get_jwt_identity()) == id:
                 return jsonify({"error": "Owner cannot delete own account"}), 403
         except (TypeError, ValueError):
             return jsonify({"error": "Unauthorized"}), 401
 
-    target = db.session.get(Employee, id)
+    target = employee_loader().get(id)
     if not target:
         return jsonify({"error": "Employee not found"}), 404
 
     try:
         
+        db.session.query(TimePunchState).filter_by(employee_id=id).delete(synchronize_session=False)
+        db.session.query(DailyWorkSummary).filter_by(employee_id=id).delete(synchronize_session=False)
         db.session.query(TimePunch).filter_by(employee_id=id).delete(synchronize_session=False)
         db.session.query(Suggestions).filter_by(employee_id=id).delete(synchronize_session=False)
         db.session.query(Shifts).filter_by(employee_id=id).delete(synchronize_session=False)
+        db.session.query(ShiftOccurrence).filter_by(employee_id=id).delete(synchronize_session=False)
         db.session.query(ShiftSeries).filter_by(employee_id=id).delete(synchronize_session=False)
         db.session.query(Payroll).filter_by(employee_id=id).delete(synchronize_session=False)
         # Holidays: puede referenciar al empleado en dos FKs
@@ -326,6 +336,7 @@ def delete_employee(id: int):
         
         db.session.delete(target)
         db.session.commit()
+        invalidate_login(id)
         return jsonify({"message": f"Employee id={id} deleted"}), 200
     except IntegrityError:
         db.session.rollback()
@@ -339,39 +350,38 @@ def login():
     if not data or not data.get("email") or not data.get("password"):
         return jsonify({"error": "JSON body required"}), 400
 
-    employee = db.session.execute(
-        db.select(Employee).where(Employee.email == data["email"])
-    ).scalar_one_or_none()
+    # id, hash, claims y usuario serializado: de la caché de login o de una sola query
+    record = get_login_record(data["email"])
 
-    if employee is None or not employee.check_password(data["password"]):
+    if record is None or not verify_password(record.password_hash, data["password"]):
         return jsonify({"msg": "Invalid email or password"}), 401
 
-    role_name = (employee.role.name if getattr(employee, "role", None) else "") or ""
-    role_norm = (
-        role_name.strip().lower().replace("-", "").replace("_", "").replace(" ", "")
-    )
-
-    if "ownerdb" in role_norm:
-        system_role = "OWNERDB"
-    elif "admin" in role_norm:
-        system_role = "ADMIN"
-    elif "hr" in role_norm or "recursos" in role_norm or "rrhh" in role_norm:
-        system_role = "HR"
-    else:
-        system_role = "EMPLOYEE"
-
-    additional_claims = {"company_id": employee.company_id, "system_role": system_role}
+    # hash con un coste distinto del configurado (BCRYPT_LOG_ROUNDS): se rehace ahora
+    # que tenemos la contraseña en claro; si falla, el login sigue adelante
+    if needs_rehash(record.password_hash):
+        try:
+            employee = employee_loader().get(record.employee_id)
+            employee.set_password(data["password"])
+            db.session.commit()
+            invalidate_login(record.employee_id)
+        except Exception:
+            db.session.rollback()
+
+    # mismos claims normalizados en access y refresh: los helpers no tocan la BD
+    additional_claims = dict(record.claims)
     access_token = create_access_token(
-        identity=str(employee.id), additional_claims=additional_claims
+        identity=str(record.employee_id), additional_claims=additional_claims
+    )
+    refresh_token = create_refresh_token(
+        identity=str(record.employee_id), additional_claims=additional_claims
     )
-    refresh_token = create_refresh_token(identity=str(employee.id))
     return (
         jsonify(
             {
                 "msg": "Login succesful",
                 "token": access_token,
                 "refresh_token": refresh_token,
-                "user": employee.serialize(),
+                "user": record.user,
             }
         ),
         200,
@@ -382,22 +392,14 @@ def login():
 @jwt_required(refresh=True)
 def refresh_access():
     user_id = get_jwt_identity()
-    employee = db.session.get(Employee, user_id)
+    employee = employee_loader().get(user_id)
     if not employee:
         return jsonify({"error": "Empleado no encontrado"}), 404
 
-    system_role = getattr(employee, "system_role", None)
-    if not system_role and getattr(employee, "role", None):
-        system_role = getattr(employee.role, "name", None)
-    if not system_role:
-        system_role = "EMPLOYEE"
-
-    claims = {
-        "system_role": system_role,
-        "company_id": getattr(employee, "company_id", None),
-        "email": getattr(employee, "email", None),
-        "roles": [system_role],
-    }
+    # se recalculan desde la BD para reflejar cambios de rol/empresa
+    claims = build_claims(employee)
+    claims["email"] = employee.email
+    claims["roles"] = [claims["system_role"]]
 
     new_access = create_access_token(identity=user_id, additional_claims=claims)
     return jsonify({"access_token": new_access}), 200
@@ -409,7 +411,7 @@ def refresh_access():
 def upload_ing():
     employee_id = get_jwt_identity()
     file = request.files.get("file")
-    employee = db.session.get(Employee, int(employee_id))
+    employee = employee_loader().get(int(employee_id))
     if not file:
         return jsonify({"error": "No se envio el archivo "}), 400
     upload_result = cloudinary.uploader.upload(file)
@@ -427,6 +429,7 @@ def upload_ing():
     employee.image = transformed_url
 
     db.session.commit()
+    invalidate_login(employee.id)
     return (
         jsonify({"msg": "ya esta en la nube", "imageUrl": upload_result["secure_url"]}),
         200,
@@ -437,7 +440,7 @@ def upload_ing():
 @jwt_required()
 def delete_img():
     employee_id = get_jwt_identity()
-    employee = db.session.get(Employee, int(employee_id))
+    employee = employee_loader().get(int(employee_id))
 
     if not employee:
         return jsonify({"error": "Empleado no encontrado"}), 404
@@ -451,6 +454,7 @@ def delete_img():
         # Aquí solo quitamos la referencia de la BD
         employee.image = None
         db.session.commit()
+        invalidate_login(employee.id)
         return jsonify({"msg": "Imagen eliminada correctamente"}), 200
     except Exception as e:
         db.session.rollback()
@@ -476,7 +480,7 @@ def change_password():
             )
 
         emp_id = get_jwt_identity()
-        employee = db.session.get(Employee, int(emp_id))
+        employee = employee_loader().get(int(emp_id))
         if not employee:
             return jsonify({"error": "Empleado no encontrado"}), 404
 
@@ -485,6 +489,7 @@ def change_password():
 
         employee.set_password(new_password)
         db.session.commit()
+        invalidate_login(employee.id)
 
         return jsonify({"msg": "Contraseña actualizada correctamente"}), 200
 
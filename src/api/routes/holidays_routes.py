@@ -2,7 +2,6 @@
 from flask import jsonify, Blueprint, request
 from api.models import (
     db,
-    Employee,
     Company,
     Role,
     Salary,
@@ -10,19 +9,28 @@ from api.models import (
     Shifts,
     Holidays,
     VacationBalance,
+    PublicHoliday,
+    HOLIDAYS_NO_OVERLAP,
 )
 from flask_cors import CORS
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import select, and_, or_, func
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from api.utils_auth.helpers_auth import (
     get_jwt_company_id,
     is_admin_or_hr,
     current_employee_id,
     is_ownerdb,
 )
-from api.utils_auth.utils_vacations import HolidayStatus, business_days
+from api.utils_auth.utils_loaders import employee_loader
+from api.utils_auth.utils_pagination import pagination_requested, paginated_response
+from api.utils_auth.utils_vacations import HolidayStatus
+from api.utils_auth.utils_calendar import (
+    applicable_to,
+    company_business_days,
+    invalidate_calendar,
+)
 
 holidays_bp = Blueprint("holidays", __name__, url_prefix="/holidays")
 CORS(holidays_bp)
@@ -38,12 +46,35 @@ def _parse_iso(d: str) -> date | None:
         return None
 
 
+OVERLAP_ERROR = "The selected range overlaps with another request"
+
+
+def _is_overlap_error(error: IntegrityError) -> bool:
+    # la restricción EXCLUDE (PostgreSQL) o el trigger (SQLite) de models.py
+    return HOLIDAYS_NO_OVERLAP in str(error.orig)
+
+
+def _integrity_response(error: IntegrityError, message: str):
+    """Rollback y respuesta: 409 si la BD rechazó un solape, 400 con `message` si no."""
+    db.session.rollback()
+    if _is_overlap_error(error):
+        return jsonify({"error": OVERLAP_ERROR}), 409
+    return jsonify({"error": message}), 400
+
+
+@holidays_bp.errorhandler(IntegrityError)
+def _handle_integrity_error(error):
+    # violaciones que saltan en un autoflush, fuera de los try/except del commit
+    return _integrity_response(error, "Integrity error")
+
+
 def _overlaps(
     emp_id: int, start: date, end: date, company_id: int, exclude_id: int | None = None
 ) -> bool:
     # """
     # Devuelve True si hay solape con otra solicitud del mismo empleado en estados relevantes.
     # Reglas: Solapa con PENDING o APPROVED.
+    # Solo para dar el error antes al editar: crear y aprobar confían en la restricción de la BD.
     # """
     q = select(Holidays).where(
         Holidays.company_id == company_id,
@@ -57,42 +88,85 @@ def _overlaps(
 
 
 def _get_or_create_balance(
-    company_id: int, employee_id: int, year: int
+    company_id: int, employee_id: int, year: int, for_update: bool = False
 ) -> VacationBalance:
-    vb = db.session.execute(
-        select(VacationBalance).where(
-            VacationBalance.company_id == company_id,
-            VacationBalance.employee_id == employee_id,
-            VacationBalance.year == year,
-        )
-    ).scalar_one_or_none()
+    """
+    Balance del empleado para el año. Con for_update=True la fila queda bloqueada
+    (SELECT ... FOR UPDATE) hasta el commit: dos aprobaciones o solicitudes simultáneas
+    del mismo empleado se serializan y no pueden gastar dos veces los mismos días
+    (las rutas que cambian una solicitud la leen también con FOR UPDATE).
+    """
+    q = select(VacationBalance).where(
+        VacationBalance.company_id == company_id,
+        VacationBalance.employee_id == employee_id,
+        VacationBalance.year == year,
+    )
+    if for_update:
+        # populate_existing: si ya estaba en la sesión, se relee la versión bloqueada
+        q = q.with_for_update().execution_options(populate_existing=True)
+    vb = db.session.execute(q).scalar_one_or_none()
     if vb is None:
+        # las solicitudes PENDING previas a que existiera el balance también cuentan
+        pending = db.session.execute(
+            select(func.coalesce(func.sum(Holidays.requested_days), 0)).where(
+                Holidays.company_id == company_id,
+                Holidays.employee_id == employee_id,
+                Holidays.status == HolidayStatus.PENDING,
+                func.extract("year", Holidays.start_date) == year,
+            )
+        ).scalar_one()
         vb = VacationBalance(
             company_id=company_id,
             employee_id=employee_id,
             year=year,
             allocated_days=22,  # default
             used_days=0,
+            pending_days=pending,
         )
         db.session.add(vb)
         db.session.flush()
     return vb
 
 
-def _pending_days(
-    company_id: int, employee_id: int, year: int, exclude_id: int | None = None
-) -> int:
-    q = select(Holidays.requested_days).where(
-        Holidays.company_id == company_id,
-        Holidays.employee_id == employee_id,
-        Holidays.status == HolidayStatus.PENDING,
-        Holidays.start_date >= date(year, 1, 1),
-        Holidays.end_date <= date(year, 12, 31),
-    )
-    if exclude_id is not None:
-        q = q.where(Holidays.id != exclude_id)
-    rows = db.session.execute(q).all()
-    return sum(r[0] or 0 for r in rows)
+def _ledger_state(holiday: Holidays) -> tuple[HolidayStatus, int, int]:
+    return holiday.status, holiday.start_date.year, holiday.requested_days or 0
+
+
+def _move_in_ledger(
+    company_id: int,
+    employee_id: int,
+    before: tuple | None,
+    after: tuple | None,
+    balances: dict | None = None,
+) -> None:
+    """
+    Refleja en vacation_balance el cambio de una solicitud, con los balances bloqueados:
+    sus días cuentan en pending_days mientras está PENDING y en used_days cuando está
+    APPROVED, en el año de start_date. before/after son _ledger_state() antes y después
+    del cambio (None si la solicitud es nueva o se borra).
+    balances: {(company_id, employee_id, year): VacationBalance} ya bloqueados (lotes).
+    """
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None:
+            continue
+        status, year, days = state
+        if status == HolidayStatus.PENDING:
+            column = "pending_days"
+        elif status == HolidayStatus.APPROVED:
+            column = "used_days"
+        else:
+            continue
+        key = (company_id, employee_id, year)
+        vb = balances.get(key) if balances is not None else None
+        if vb is None:
+            vb = _get_or_create_balance(company_id, employee_id, year, for_update=True)
+            if balances is not None:
+                balances[key] = vb
+        setattr(vb, column, max(0, (getattr(vb, column) or 0) + sign * days))
+
+
+def _remaining(vb: VacationBalance) -> int:
+    return (vb.allocated_days or 0) - (vb.used_days or 0) - (vb.pending_days or 0)
 
 
 # ---------- LISTADOS EXISTENTES ----------
@@ -117,6 +191,8 @@ def get_all_holidays():
             stmt = stmt.where(Holidays.company_id == cid)
         if status_filter:
             stmt = stmt.where(Holidays.status == status_filter)
+        if pagination_requested():
+            return paginated_response(stmt, [Holidays.id])
         holidays = db.session.execute(stmt).scalars().all()
         return jsonify([h.serialize() for h in holidays]), 200
 
@@ -126,17 +202,16 @@ def get_all_holidays():
 
     if is_admin_or_hr():
         stmt = select(Holidays).where(Holidays.company_id == company_id)
-        if status_filter:
-            stmt = stmt.where(Holidays.status == status_filter)
-        holidays = db.session.execute(stmt).scalars().all()
     else:
         stmt = select(Holidays).where(
             Holidays.company_id == company_id,
             Holidays.employee_id == current_employee_id(),
         )
-        if status_filter:
-            stmt = stmt.where(Holidays.status == status_filter)
-        holidays = db.session.execute(stmt).scalars().all()
+    if status_filter:
+        stmt = stmt.where(Holidays.status == status_filter)
+    if pagination_requested():
+        return paginated_response(stmt, [Holidays.id])
+    holidays = db.session.execute(stmt).scalars().all()
 
     return jsonify([h.serialize() for h in holidays]), 200
 
@@ -175,11 +250,8 @@ def get_my_balance():
     year = int(request.args.get("year") or date.today().year)
 
     vb = _get_or_create_balance(company_id, emp_id, year)
-    pending = _pending_days(company_id, emp_id, year)
-    remaining = max(0, (vb.allocated_days or 0) -
-                    (vb.used_days or 0) - pending)
     payload = vb.serialize()
-    payload.update({"pending_days": pending, "remaining_days": remaining})
+    payload["remaining_days"] = max(0, _remaining(vb))
     return jsonify(payload), 200
 
 
@@ -202,7 +274,7 @@ def set_allocation():
         )
 
     # OWNERDB puede cualquier empresa; ADMIN/HR limitado a su empresa
-    employee = db.session.get(Employee, employee_id_body)
+    employee = employee_loader().get(employee_id_body)
     if not employee:
         return jsonify({"error": "Employee not found"}), 404
 
@@ -221,14 +293,143 @@ def set_allocation():
         db.session.rollback()
         return jsonify({"error": "Integrity error updating allocation"}), 400
 
-    pending = _pending_days(target_company_id, employee_id_body, year)
-    remaining = max(0, (vb.allocated_days or 0) -
-                    (vb.used_days or 0) - pending)
     payload = vb.serialize()
-    payload.update({"pending_days": pending, "remaining_days": remaining})
+    payload["remaining_days"] = max(0, _remaining(vb))
     return jsonify(payload), 200
 
 
+# ---------- FESTIVOS (calendario laboral) ----------
+
+
+def _calendar_company_id():
+    """Empresa cuyo calendario se consulta: la del token, o ?company_id= para OWNERDB."""
+    if is_ownerdb() and request.args.get("company_id") is not None:
+        return int(request.args["company_id"])
+    return get_jwt_company_id()
+
+
+@holidays_bp.route("/public", methods=["GET"])
+@jwt_required()
+def get_public_holidays():
+    try:
+        year = int(request.args.get("year") or date.today().year)
+        company_id = _calendar_company_id()
+    except (TypeError, ValueError):
+        return jsonify({"error": "year and company_id must be integers"}), 400
+
+    if company_id is None and not is_ownerdb():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    stmt = select(PublicHoliday).where(
+        PublicHoliday.date >= date(year, 1, 1), PublicHoliday.date <= date(year, 12, 31)
+    )
+    # OWNERDB sin company_id ve todos los festivos del año
+    if company_id is not None:
+        stmt = stmt.where(applicable_to(company_id))
+    rows = db.session.execute(stmt.order_by(PublicHoliday.date, PublicHoliday.id)).scalars()
+    return jsonify([h.serialize() for h in rows]), 200
+
+
+@holidays_bp.route("/business-days", methods=["GET"])
+@jwt_required()
+def get_business_days():
+    start_d = _parse_iso(request.args.get("from") or "")
+    end_d = _parse_iso(request.args.get("to") or "")
+    if not start_d or not end_d or end_d < start_d:
+        return jsonify({"error": "from and to must be YYYY-MM-DD with from <= to"}), 400
+    try:
+        company_id = _calendar_company_id()
+    except (TypeError, ValueError):
+        return jsonify({"error": "company_id must be an integer"}), 400
+    return (
+        jsonify(
+            {
+                "from": start_d.isoformat(),
+                "to": end_d.isoformat(),
+                "company_id": company_id,
+                "business_days": company_business_days(company_id, start_d, end_d),
+            }
+        ),
+        200,
+    )
+
+
+# ADMIN/HR crean festivos de su empresa; OWNERDB también nacionales (sin company_id
+# ni region) y regionales (solo region)
+@holidays_bp.route("/public", methods=["POST"])
+@jwt_required()
+def create_public_holiday():
+    if not (is_admin_or_hr() or is_ownerdb()):
+        return jsonify({"error": "Forbidden"}), 403
+
+    data = request.get_json(silent=True) or {}
+    day = _parse_iso(data.get("date") or "")
+    name = (data.get("name") or "").strip()
+    if not day or not name:
+        return jsonify({"error": "date (YYYY-MM-DD) and name are required"}), 400
+
+    region = (data.get("region") or "").strip() or None
+    if is_ownerdb():
+        try:
+            company_id = (
+                int(data["company_id"]) if data.get("company_id") is not None else None
+            )
+        except (TypeError, ValueError):
+            return jsonify({"error": "company_id must be an integer"}), 400
+        if company_id is not None:
+            region = None
+    else:
+        company_id = get_jwt_company_id()
+        if company_id is None:
+            return jsonify({"error": "Unauthorized"}), 401
+        region = None
+
+    # el unique (company_id, region, date) no frena duplicados con NULL: se comprueba aquí
+    duplicate = db.session.execute(
+        select(PublicHoliday.id).where(
+            PublicHoliday.company_id.is_(None)
+            if company_id is None
+            else PublicHoliday.company_id == company_id,
+            PublicHoliday.region.is_(None) if region is None else PublicHoliday.region == region,
+            PublicHoliday.date == day,
+        )
+    ).first()
+    if duplicate:
+        return jsonify({"error": "Public holiday already exists for that date"}), 409
+
+    holiday = PublicHoliday(company_id=company_id, region=region, date=day, name=name)
+    try:
+        db.session.add(holiday)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Public holiday already exists for that date"}), 409
+
+    invalidate_calendar(company_id)
+    return jsonify(holiday.serialize()), 201
+
+
+@holidays_bp.route("/public/<int:id>", methods=["DELETE"])
+@jwt_required()
+def delete_public_holiday(id):
+    if not (is_admin_or_hr() or is_ownerdb()):
+        return jsonify({"error": "Forbidden"}), 403
+
+    holiday = db.session.get(PublicHoliday, id)
+    if not holiday:
+        return jsonify({"error": "Public holiday not found"}), 404
+    if not is_ownerdb() and (
+        holiday.company_id is None or holiday.company_id != get_jwt_company_id()
+    ):
+        return jsonify({"error": "Public holiday not found"}), 404
+
+    company_id = holiday.company_id
+    db.session.delete(holiday)
+    db.session.commit()
+    invalidate_calendar(company_id)
+    return jsonify({"message": "Public holiday deleted"}), 200
+
+
 # ---------- CREAR SOLICITUD ----------
 
 
@@ -256,7 +457,7 @@ def create_holiday():
         except (TypeError, ValueError):
             return jsonify({"error": "employee_id must be an integer"}), 400
 
-        employee_target = db.session.get(Employee, employee_id_body)
+        employee_target = employee_loader().get(employee_id_body)
         if not employee_target:
             return jsonify({"error": "Employee not found"}), 404
 
@@ -272,7 +473,7 @@ def create_holiday():
                 employee_id_body = int(data.get("employee_id"))
             except (TypeError, ValueError):
                 return jsonify({"error": "employee_id must be an integer"}), 400
-            employee_target = db.session.get(Employee, employee_id_body)
+            employee_target = employee_loader().get(employee_id_body)
             if not employee_target or employee_target.company_id != company_id:
                 return jsonify({"error": "Employee not found"}), 404
             target_company_id = company_id
@@ -293,25 +494,24 @@ def create_holiday():
                         403,
                     )
 
-    # Solapes
-    if _overlaps(target_employee_id, start_d, end_d, target_company_id):
-        return (
-            jsonify({"error": "The selected range overlaps with another request"}),
-            409,
-        )
+    # Los solapes los rechaza la BD al insertar (ex_holidays_no_overlap), sin carrera
 
     # Días solicitados (laborables)
-    req_days = business_days(start_d, end_d)
+    req_days = company_business_days(target_company_id, start_d, end_d)
     if req_days <= 0:
         return jsonify({"error": "Requested days must be > 0 (business days)"}), 400
 
-    # Balance (año por start_date)
+    # Balance (año por start_date): se reservan los días en pending_days
     year = start_d.year
-    vb = _get_or_create_balance(target_company_id, target_employee_id, year)
-    pending_others = _pending_days(target_company_id, target_employee_id, year)
-    remaining = (vb.allocated_days or 0) - (vb.used_days or 0) - pending_others
-
-    if req_days > remaining:
+    _move_in_ledger(
+        target_company_id,
+        target_employee_id,
+        None,
+        (HolidayStatus.PENDING, year, req_days),
+    )
+    vb = _get_or_create_balance(target_company_id, target_employee_id, year, for_update=True)
+    if _remaining(vb) < 0:
+        db.session.rollback()
         return jsonify({"error": "Insufficient remaining days for this request"}), 409
 
     new_holiday = Holidays(
@@ -328,9 +528,8 @@ def create_holiday():
     try:
         db.session.add(new_holiday)
         db.session.commit()
-    except IntegrityError:
-        db.session.rollback()
-        return jsonify({"error": "Integrity error creating holiday"}), 400
+    except IntegrityError as error:
+        return _integrity_response(error, "Integrity error creating holiday")
 
     return jsonify(new_holiday.serialize()), 201
 
@@ -341,7 +540,7 @@ def create_holiday():
 @holidays_bp.route("/edit/<int:id>", methods=["PUT"])
 @jwt_required()
 def update_holiday(id):
-    holiday = db.session.get(Holidays, id)
+    holiday = db.session.get(Holidays, id, with_for_update=True)
     if not holiday:
         return jsonify({"error": "Holiday request not found"}), 404
 
@@ -349,6 +548,9 @@ def update_holiday(id):
     if not data:
         return jsonify({"error": "JSON body required"}), 400
 
+    # estado/año/días antes del cambio, para mover el saldo en vacation_balance
+    before = _ledger_state(holiday)
+
     # OWNERDB: todo dentro de la empresa del holiday
     if is_ownerdb():
         start_iso = data.get("start_date")
@@ -379,23 +581,22 @@ def update_holiday(id):
             holiday.company_id,
             exclude_id=holiday.id,
         ):
-            return (
-                jsonify(
-                    {"error": "The selected range overlaps with another request"}),
-                409,
-            )
-        holiday.requested_days = business_days(
-            holiday.start_date, holiday.end_date)
+            return jsonify({"error": OVERLAP_ERROR}), 409
+        holiday.requested_days = company_business_days(
+            holiday.company_id, holiday.start_date, holiday.end_date)
 
         # Cambio de status directo
         if status_in in {e.value for e in HolidayStatus}:
             holiday.status = getattr(HolidayStatus, status_in)
 
+        _move_in_ledger(
+            holiday.company_id, holiday.employee_id, before, _ledger_state(holiday)
+        )
+
         try:
             db.session.commit()
-        except IntegrityError:
-            db.session.rollback()
-            return jsonify({"error": "Integrity error updating holiday"}), 400
+        except IntegrityError as error:
+            return _integrity_response(error, "Integrity error updating holiday")
 
         return jsonify(holiday.serialize()), 200
 
@@ -433,22 +634,21 @@ def update_holiday(id):
             holiday.company_id,
             exclude_id=holiday.id,
         ):
-            return (
-                jsonify(
-                    {"error": "The selected range overlaps with another request"}),
-                409,
-            )
-        holiday.requested_days = business_days(
-            holiday.start_date, holiday.end_date)
+            return jsonify({"error": OVERLAP_ERROR}), 409
+        holiday.requested_days = company_business_days(
+            holiday.company_id, holiday.start_date, holiday.end_date)
 
         if status_in in {e.value for e in HolidayStatus}:
             holiday.status = getattr(HolidayStatus, status_in)
 
+        _move_in_ledger(
+            holiday.company_id, holiday.employee_id, before, _ledger_state(holiday)
+        )
+
         try:
             db.session.commit()
-        except IntegrityError:
-            db.session.rollback()
-            return jsonify({"error": "Integrity error updating holiday"}), 400
+        except IntegrityError as error:
+            return _integrity_response(error, "Integrity error updating holiday")
 
         return jsonify(holiday.serialize()), 200
 
@@ -488,28 +688,25 @@ def update_holiday(id):
         holiday.company_id,
         exclude_id=holiday.id,
     ):
-        return (
-            jsonify({"error": "The selected range overlaps with another request"}),
-            409,
-        )
-    holiday.requested_days = business_days(
-        holiday.start_date, holiday.end_date)
+        return jsonify({"error": OVERLAP_ERROR}), 409
+    holiday.requested_days = company_business_days(
+        holiday.company_id, holiday.start_date, holiday.end_date)
 
     # saldo
-    year = holiday.start_date.year
-    vb = _get_or_create_balance(holiday.company_id, holiday.employee_id, year)
-    pending_others = _pending_days(
-        holiday.company_id, holiday.employee_id, year, exclude_id=holiday.id
+    _move_in_ledger(
+        holiday.company_id, holiday.employee_id, before, _ledger_state(holiday)
+    )
+    vb = _get_or_create_balance(
+        holiday.company_id, holiday.employee_id, holiday.start_date.year, for_update=True
     )
-    remaining = (vb.allocated_days or 0) - (vb.used_days or 0) - pending_others
-    if holiday.requested_days > remaining:
+    if _remaining(vb) < 0:
+        db.session.rollback()
         return jsonify({"error": "Insufficient remaining days for this request"}), 409
 
     try:
         db.session.commit()
-    except IntegrityError:
-        db.session.rollback()
-        return jsonify({"error": "Integrity error updating holiday"}), 400
+    except IntegrityError as error:
+        return _integrity_response(error, "Integrity error updating holiday")
 
     return jsonify(holiday.serialize()), 200
 
@@ -520,12 +717,15 @@ def update_holiday(id):
 @holidays_bp.route("/delete/<int:id>", methods=["DELETE"])
 @jwt_required()
 def delete_holiday(id):
-    holiday = db.session.get(Holidays, id)
+    holiday = db.session.get(Holidays, id, with_for_update=True)
     if not holiday:
         return jsonify({"error": "Holiday request not found"}), 404
 
     if is_ownerdb():
         try:
+            _move_in_ledger(
+                holiday.company_id, holiday.employee_id, _ledger_state(holiday), None
+            )
             db.session.delete(holiday)
             db.session.commit()
         except IntegrityError:
@@ -552,6 +752,9 @@ def delete_holiday(id):
             )
 
     try:
+        _move_in_ledger(
+            holiday.company_id, holiday.employee_id, _ledger_state(holiday), None
+        )
         db.session.delete(holiday)
         db.session.commit()
     except IntegrityError:
@@ -570,7 +773,7 @@ def approve_holiday(id):
     if not (is_admin_or_hr() or is_ownerdb()):
         return jsonify({"error": "Forbidden"}), 403
 
-    holiday = db.session.get(Holidays, id)
+    holiday = db.session.get(Holidays, id, with_for_update=True)
     if not holiday:
         return jsonify({"error": "Holiday request not found"}), 404
 
@@ -583,51 +786,39 @@ def approve_holiday(id):
     if holiday.status not in (HolidayStatus.PENDING, HolidayStatus.REJECTED):
         return jsonify({"error": "Only PENDING or REJECTED requests can be approved"}), 400
 
-    # Revalidar fechas, solape y saldo
+    # Revalidar fechas y saldo (el solape lo comprueba la BD al pasar a APPROVED)
     if holiday.end_date < holiday.start_date:
         return jsonify({"error": "Invalid date range"}), 400
-    if _overlaps(
-        holiday.employee_id,
-        holiday.start_date,
-        holiday.end_date,
-        holiday.company_id,
-        exclude_id=holiday.id,
-    ):
-        return (
-            jsonify({"error": "The selected range overlaps with another request"}),
-            409,
-        )
 
     # Recalcular por seguridad
-    holiday.requested_days = business_days(
-        holiday.start_date, holiday.end_date)
+    before = _ledger_state(holiday)
+    holiday.requested_days = company_business_days(
+        holiday.company_id, holiday.start_date, holiday.end_date)
     if holiday.requested_days <= 0:
         return jsonify({"error": "Requested days must be > 0"}), 400
 
-    year = holiday.start_date.year
-    vb = _get_or_create_balance(holiday.company_id, holiday.employee_id, year)
-    pending_others = _pending_days(
-        holiday.company_id, holiday.employee_id, year, exclude_id=holiday.id
+    # Aprobar: los días pasan de pending_days a used_days (balance bloqueado)
+    holiday.status = HolidayStatus.APPROVED
+    _move_in_ledger(
+        holiday.company_id, holiday.employee_id, before, _ledger_state(holiday)
     )
-    remaining = (vb.allocated_days or 0) - (vb.used_days or 0) - pending_others
-    if holiday.requested_days > remaining:
+    vb = _get_or_create_balance(
+        holiday.company_id, holiday.employee_id, holiday.start_date.year, for_update=True
+    )
+    if _remaining(vb) < 0:
+        db.session.rollback()
         return jsonify({"error": "Insufficient remaining days to approve"}), 409
 
-    # Aprobar: consumir saldo
-    holiday.status = HolidayStatus.APPROVED
     # registra el aprobador; usa func.now() para timezone-aware en DB
     approver_id = current_employee_id() if not is_ownerdb() else current_employee_id()
     holiday.approved_user_id = approver_id
     holiday.approved_at = func.now()
-
-    vb.used_days = (vb.used_days or 0) + holiday.requested_days
     # No tocamos vb.updated_at: lo actualiza el server_onupdate
 
     try:
         db.session.commit()
-    except IntegrityError:
-        db.session.rollback()
-        return jsonify({"error": "Integrity error approving holiday"}), 400
+    except IntegrityError as error:
+        return _integrity_response(error, "Integrity error approving holiday")
 
     return jsonify(holiday.serialize()), 200
 
@@ -638,7 +829,7 @@ def reject_holiday(id):
     if not (is_admin_or_hr() or is_ownerdb()):
         return jsonify({"error": "Forbidden"}), 403
 
-    holiday = db.session.get(Holidays, id)
+    holiday = db.session.get(Holidays, id, with_for_update=True)
     if not holiday:
         return jsonify({"error": "Holiday request not found"}), 404
 
@@ -652,15 +843,12 @@ def reject_holiday(id):
     if prev_status not in (HolidayStatus.PENDING, HolidayStatus.APPROVED):
         return jsonify({"error": "Only PENDING or APPROVED requests can be rejected"}), 400
 
-    # Si estaba aprobada, devolver días al balance
-    if prev_status == HolidayStatus.APPROVED:
-        year = holiday.start_date.year
-        vb = _get_or_create_balance(
-            holiday.company_id, holiday.employee_id, year)
-        vb.used_days = max(0, (vb.used_days or 0) -
-                           (holiday.requested_days or 0))
-
+    # Pendiente: libera pending_days; aprobada: devuelve los días a used_days
+    before = _ledger_state(holiday)
     holiday.status = HolidayStatus.REJECTED
+    _move_in_ledger(
+        holiday.company_id, holiday.employee_id, before, _ledger_state(holiday)
+    )
     holiday.approved_user_id = current_employee_id()
     holiday.approved_at = func.now()
 
@@ -671,3 +859,179 @@ def reject_holiday(id):
         return jsonify({"error": "Integrity error rejecting holiday"}), 400
 
     return jsonify(holiday.serialize()), 200
+
+
+# ---------- DECISIONES EN LOTE ----------
+
+BATCH_MAX_DECISIONS = 500
+
+
+def _balances_for_update(holidays: list[Holidays]) -> dict:
+    """Balances de los (empresa, empleado, año) de las solicitudes, bloqueados en una query."""
+    keys = {(h.company_id, h.employee_id, h.start_date.year) for h in holidays}
+    if not keys:
+        return {}
+    rows = db.session.execute(
+        select(VacationBalance)
+        .where(
+            VacationBalance.employee_id.in_({k[1] for k in keys}),
+            VacationBalance.year.in_({k[2] for k in keys}),
+        )
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalars()
+    return {(vb.company_id, vb.employee_id, vb.year): vb for vb in rows}
+
+
+def _decide_batch(action: str):
+    """
+    Aprueba o rechaza muchas solicitudes con pocas queries: solicitudes (FOR UPDATE),
+    solicitudes que podrían solapar y balances (FOR UPDATE). Se valida en memoria en el
+    orden recibido y se hace un único commit; el resultado es por id.
+    """
+    if not (is_admin_or_hr() or is_ownerdb()):
+        return jsonify({"error": "Forbidden"}), 403
+    owner = is_ownerdb()
+    company_id = get_jwt_company_id()
+    if not owner and company_id is None:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    ids = (request.get_json(silent=True) or {}).get("ids")
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"error": "ids must be a non-empty list"}), 400
+    try:
+        ids = list(dict.fromkeys(int(i) for i in ids))
+    except (TypeError, ValueError):
+        return jsonify({"error": "ids must be integers"}), 400
+    if len(ids) > BATCH_MAX_DECISIONS:
+        return jsonify({"error": f"At most {BATCH_MAX_DECISIONS} ids per batch"}), 400
+
+    found = {
+        h.id: h
+        for h in db.session.execute(
+            select(Holidays).where(Holidays.id.in_(ids)).with_for_update()
+        ).scalars()
+        if owner or h.company_id == company_id
+    }
+    holidays = list(found.values())
+    balances = _balances_for_update(holidays)
+
+    # candidatos a solape: PENDING/APPROVED de los mismos empleados en el rango del lote,
+    # más las propias solicitudes del lote (una REJECTED aprobada antes en el lote
+    # también bloquea a las siguientes)
+    others: dict[int, list[Holidays]] = {}
+    if action == "approve" and holidays:
+        candidates = db.session.execute(
+            select(Holidays).where(
+                Holidays.employee_id.in_({h.employee_id for h in holidays}),
+                Holidays.status.in_([HolidayStatus.PENDING, HolidayStatus.APPROVED]),
+                Holidays.start_date <= max(h.end_date for h in holidays),
+                Holidays.end_date >= min(h.start_date for h in holidays),
+            )
+        ).scalars()
+        # identity map: las del lote que ya vinieron en la query son el mismo objeto
+        for other in {id(h): h for h in [*candidates, *holidays]}.values():
+            others.setdefault(other.employee_id, []).append(other)
+
+    def overlaps(holiday: Holidays) -> bool:
+        # el estado se lee en vivo: cuenta lo aprobado/rechazado antes en este lote
+        return any(
+            o.id != holiday.id
+            and o.company_id == holiday.company_id
+            and o.status in (HolidayStatus.PENDING, HolidayStatus.APPROVED)
+            and o.start_date <= holiday.end_date
+            and o.end_date >= holiday.start_date
+            for o in others.get(holiday.employee_id, ())
+        )
+
+    approver_id = current_employee_id()
+    decided_at = datetime.now(timezone.utc)
+    results = []
+    # sin autoflush: lo deshecho en memoria no llega a la BD antes de tiempo
+    with db.session.no_autoflush:
+        for hid in ids:
+            holiday = found.get(hid)
+            if holiday is None:
+                results.append({"id": hid, "ok": False, "error": "Holiday request not found"})
+                continue
+
+            before = _ledger_state(holiday)
+            if action == "approve":
+                if holiday.status not in (HolidayStatus.PENDING, HolidayStatus.REJECTED):
+                    error = "Only PENDING or REJECTED requests can be approved"
+                elif holiday.end_date < holiday.start_date:
+                    error = "Invalid date range"
+                elif overlaps(holiday):
+                    error = OVERLAP_ERROR
+                else:
+                    error = None
+                    days = company_business_days(
+                        holiday.company_id, holiday.start_date, holiday.end_date
+                    )
+                    if days <= 0:
+                        error = "Requested days must be > 0"
+                if error is None:
+                    holiday.requested_days = days
+                    holiday.status = HolidayStatus.APPROVED
+                    _move_in_ledger(
+                        holiday.company_id, holiday.employee_id, before,
+                        _ledger_state(holiday), balances,
+                    )
+                    vb = balances[(holiday.company_id, holiday.employee_id, before[1])]
+                    if _remaining(vb) < 0:
+                        # deshacer en memoria: no queda nada de esta solicitud en el commit
+                        _move_in_ledger(
+                            holiday.company_id, holiday.employee_id,
+                            _ledger_state(holiday), before, balances,
+                        )
+                        holiday.status, holiday.requested_days = before[0], before[2]
+                        error = "Insufficient remaining days to approve"
+            else:
+                if holiday.status not in (HolidayStatus.PENDING, HolidayStatus.APPROVED):
+                    error = "Only PENDING or APPROVED requests can be rejected"
+                else:
+                    error = None
+                    holiday.status = HolidayStatus.REJECTED
+                    _move_in_ledger(
+                        holiday.company_id, holiday.employee_id, before,
+                        _ledger_state(holiday), balances,
+                    )
+
+            if error is not None:
+                results.append({"id": hid, "ok": False, "error": error})
+                continue
+            holiday.approved_user_id = approver_id
+            holiday.approved_at = decided_at
+            # se serializa antes del commit para no recargar cada fila después
+            results.append({"id": hid, "ok": True, "holiday": holiday.serialize()})
+
+    done = sum(1 for r in results if r["ok"])
+    try:
+        db.session.commit()
+    except IntegrityError as error:
+        # solape que entró entre la lectura y el commit: el lote entero se descarta
+        return _integrity_response(error, f"Integrity error on batch {action}")
+
+    return (
+        jsonify(
+            {
+                "action": action,
+                "succeeded": done,
+                "failed": len(results) - done,
+                "results": results,
+            }
+        ),
+        200,
+    )
+
+
+@holidays_bp.route("/batch/approve", methods=["POST"])
+@jwt_required()
+def approve_holidays_batch():
+    return _decide_batch("approve")
+
+
+@holidays_bp.route("/batch/reject", methods=["POST"])
+@jwt_required()
+def reject_holidays_batch():
+    return _decide_batch("reject")
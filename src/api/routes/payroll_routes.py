@@ -10,6 +10,7 @@ from api.utils_auth.helpers_auth import (
     current_employee_id,
     is_ownerdb,
 )
+from api.utils_auth.utils_pagination import pagination_requested, paginated_response
 
 
 payroll_bp = Blueprint("payroll", __name__, url_prefix="/payroll")
@@ -28,13 +29,12 @@ def get_all_payrolls():
                 cid = int(cid_param)
             except (TypeError, ValueError):
                 return jsonify({"error": "company_id must be an integer"}), 400
-            payrolls = (
-                db.session.execute(db.select(Payroll).where(Payroll.company_id == cid))
-                .scalars()
-                .all()
-            )
+            stmt = db.select(Payroll).where(Payroll.company_id == cid)
         else:
-            payrolls = db.session.execute(db.select(Payroll)).scalars().all()
+            stmt = db.select(Payroll)
+        if pagination_requested():
+            return paginated_response(stmt, [Payroll.id])
+        payrolls = db.session.execute(stmt).scalars().all()
         return jsonify([p.serialize() for p in payrolls]), 200
 
     # ADMIN/HR: solo su empresa | EMPLOYEE: solo las suyas
@@ -43,24 +43,15 @@ def get_all_payrolls():
         return jsonify({"error": "Unauthorized"}), 401
 
     if is_admin_or_hr():
-        payrolls = (
-            db.session.execute(
-                db.select(Payroll).where(Payroll.company_id == company_id)
-            )
-            .scalars()
-            .all()
-        )
+        stmt = db.select(Payroll).where(Payroll.company_id == company_id)
     else:
-        payrolls = (
-            db.session.execute(
-                db.select(Payroll).where(
-                    Payroll.company_id == company_id,
-                    Payroll.employee_id == current_employee_id(),
-                )
-            )
-            .scalars()
-            .all()
+        stmt = db.select(Payroll).where(
+            Payroll.company_id == company_id,
+            Payroll.employee_id == current_employee_id(),
         )
+    if pagination_requested():
+        return paginated_response(stmt, [Payroll.id])
+    payrolls = db.session.execute(stmt).scalars().all()
 
     return jsonify([p.serialize() for p in payrolls]), 200
 
@@ -3,11 +3,13 @@ from flask_jwt_extended import jwt_required
 from cloudinary.uploader import upload as cld_upload, destroy as cld_destroy
 from cloudinary.utils import cloudinary_url
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from flask_cors import CORS
 import os
 from api.mail_config import send_email, EmailError
 from ..models import db, Payroll, Employee
 from ..utils_auth.helpers_auth import is_admin_or_hr, get_jwt_company_id, current_employee_id
+from ..utils_auth.utils_pagination import keyset_page
 
 payrolls_bp = Blueprint("payrolls_bp", __name__, url_prefix="/payrolls")
 CORS(payrolls_bp)
@@ -196,9 +198,34 @@ def list_payrolls():
             return jsonify({"msg": "No autorizado"}), 403
         q = q.filter(Payroll.employee_id == requestor_employee_id)
 
+    # Si quieres incluir el nombre del empleado en la lista.
+    # El empleado llega en la misma query (JOIN) vía joinedload: sin una consulta por fila.
+    def serialize_with_name(r):
+        data = r.serialize()
+        # opcional: denormalizar nombre
+        emp = r.employee
+        if emp:
+            full_name = " ".join(filter(None, [getattr(emp, "first_name", ""), getattr(emp, "last_name", "")])).strip()
+            data["employee_name"] = full_name or getattr(emp, "email", None) or f"Empleado {emp.id}"
+        return data
+
+    # ?cursor= (vacío para la primera página) → keyset: sin OFFSET y COUNT solo con ?with_total=1
+    if "cursor" in request.args:
+        try:
+            page_data = keyset_page(
+                q.options(joinedload(Payroll.employee)).statement,
+                [Payroll.period_year, Payroll.period_month, Payroll.id],
+                descending=True,
+                serializer=serialize_with_name,
+            )
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
+        return jsonify(page_data)
+
     total = q.count()
     rows = (
-        q.order_by(Payroll.period_year.desc(),
+        q.options(joinedload(Payroll.employee))
+         .order_by(Payroll.period_year.desc(),
                    Payroll.period_month.desc(),
                    Payroll.id.desc())
          .limit(limit)
@@ -206,16 +233,7 @@ def list_payrolls():
          .all()
     )
 
-    # Si quieres incluir el nombre del empleado en la lista
-    items = []
-    for r in rows:
-        data = r.serialize()
-        # opcional: denormalizar nombre
-        emp = db.session.get(Employee, r.employee_id)
-        if emp:
-            full_name = " ".join(filter(None, [getattr(emp, "first_name", ""), getattr(emp, "last_name", "")])).strip()
-            data["employee_name"] = full_name or getattr(emp, "email", None) or f"Empleado {emp.id}"
-        items.append(data)
+    items = [serialize_with_name(r) for r in rows]
 
     total_pages = (total + limit - 1) // limit
     return jsonify({"items": items, "total_pages": total_pages})
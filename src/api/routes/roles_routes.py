@@ -10,6 +10,8 @@ from api.utils_auth.helpers_auth import (
     current_employee_id,
     is_ownerdb,
 )
+from api.utils_auth.utils_pagination import pagination_requested, paginated_response
+from api.utils_auth.utils_login_cache import clear_login_cache
 
 
 role_bp = Blueprint("role", __name__, url_prefix="/roles")
@@ -24,7 +26,10 @@ def get_roles():
     if not (is_admin_or_hr() or is_ownerdb()):
         return jsonify({"error": "Forbidden"}), 403
 
-    roles = db.session.execute(db.select(Role)).scalars().all()
+    stmt = db.select(Role)
+    if pagination_requested():
+        return paginated_response(stmt, [Role.id])
+    roles = db.session.execute(stmt).scalars().all()
     return jsonify([r.serialize() for r in roles]), 200
 
 
@@ -103,6 +108,8 @@ def update_role(id):
         db.session.rollback()
         return jsonify({"error": "Integrity error updating role"}), 400
 
+    # el nombre del rol decide el system_role cacheado para el login
+    clear_login_cache()
     return jsonify(role.serialize()), 200
 
 
@@ -120,6 +127,7 @@ def delete_role(id):
     try:
         db.session.delete(role)
         db.session.commit()
+        clear_login_cache()
     except IntegrityError:
         db.session.rollback()
         return jsonify({"error": "Cannot delete role that is in use"}), 400
@@ -20,6 +20,7 @@ from api.utils_auth.helpers_auth import (
     current_employee_id,
     is_ownerdb,
 )
+from api.utils_auth.utils_pagination import pagination_requested, paginated_response
 
 salary_bp = Blueprint("salary", __name__, url_prefix="/salaries")
 
@@ -34,7 +35,10 @@ def get_salaries():
     if not (is_admin_or_hr() or is_ownerdb()):
         return jsonify({"error": "Forbidden"}), 403
 
-    salaries = db.session.execute(db.select(Salary)).scalars().all()
+    stmt = db.select(Salary)
+    if pagination_requested():
+        return paginated_response(stmt, [Salary.id])
+    salaries = db.session.execute(stmt).scalars().all()
     return jsonify([s.serialize() for s in salaries]), 200
 
 
@@ -6,15 +6,20 @@ from api.models import (
     Role,
     Salary,
     Payroll,
+    Holidays,
+    HolidayStatus,
     Shifts,
     ShiftType,
     ShiftSeries,
     ShiftException,
+    ShiftOccurrence,
 )
+from bisect import bisect_left, bisect_right, insort
 from datetime import date, datetime, timedelta
 from flask_cors import CORS
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from api.utils_auth.helpers_auth import (
     get_jwt_company_id,
     get_system_role,
@@ -22,6 +27,13 @@ from api.utils_auth.helpers_auth import (
     current_employee_id,
     is_ownerdb,
 )
+from api.utils_auth.utils_loaders import employee_loader
+from api.utils_auth.utils_shifts import (
+    series_occurrences,
+    apply_exception,
+    refresh_series_occurrences,
+    covers_horizon,
+)
 
 
 shift_bp = Blueprint("shift", __name__, url_prefix="/shifts")
@@ -50,6 +62,14 @@ def _overlaps(a_start, a_end, b_start, b_end) -> bool:
     return (a_start < b_end) and (b_start < a_end)
 
 
+def _interval_conflicts(intervals: list[tuple], start, end) -> bool:
+    # intervals: [(start, end)] ordenados por start. Lo ya guardado puede solaparse
+    # entre sí (altas desde /admin, datos antiguos), así que no basta con los vecinos:
+    # se revisan todos los que empiezan antes de `end`
+    stop = bisect_left(intervals, (end,))
+    return any(i_end > start for _, i_end in intervals[:stop])
+
+
 # Weekday mapping: bit0=Lun ... bit6=Dom
 WD2BIT = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
 
@@ -69,11 +89,239 @@ def _weekday_bit_for_date(d: date) -> int:
     return d.weekday()
 
 
-def _weeks_between(monday0: date, d: date) -> int:
-    # semanas enteras entre (alineando a lunes)
-    base = monday0 - timedelta(days=monday0.weekday())  # lunes de la semana de monday0
-    curr = d - timedelta(days=d.weekday())  # lunes de la semana de d
-    return (curr - base).days // 7
+def _load_types_serialized(type_ids) -> dict[int, dict]:
+    # Carga en UNA query todos los ShiftType referenciados y los serializa una vez
+    ids = {tid for tid in type_ids if tid}
+    if not ids:
+        return {}
+    items = (
+        db.session.execute(db.select(ShiftType).where(ShiftType.id.in_(ids)))
+        .scalars()
+        .all()
+    )
+    return {t.id: t.serialize() for t in items}
+
+
+def _index_explicit(explicit) -> dict[tuple[int, str], list[tuple]]:
+    # lookup (employee_id, fecha) -> [(start, end)] para chequear solapes con series
+    out: dict[tuple[int, str], list[tuple]] = {}
+    for s in explicit:
+        key = (s.employee_id, s.date.isoformat())
+        out.setdefault(key, []).append((s.start_time, s.end_time))
+    return out
+
+
+def _index_exceptions(exs) -> dict[tuple[int, str], ShiftException]:
+    return {(ex.series_id, ex.date.isoformat()): ex for ex in exs}
+
+
+def _generated_item(series_id: int, src, day: date, s_time, e_time, stype) -> dict:
+    # src: ShiftSeries o ShiftOccurrence (ambos tienen company_id, employee_id, notes)
+    return {
+        "id": None,  # ocurrencia generada
+        "company_id": src.company_id,
+        "employee_id": src.employee_id,
+        "date": day.isoformat(),
+        "start_time": s_time.strftime("%H:%M"),
+        "end_time": e_time.strftime("%H:%M"),
+        "type": stype,
+        "notes": src.notes,
+        "status": "planned",
+        "generated": True,
+        "series_id": series_id,
+    }
+
+
+def _overlaps_explicit(
+    explicit_by_emp_date, employee_id: int, day: date, s_time, e_time
+) -> bool:
+    for a_start, a_end in explicit_by_emp_date.get(
+        (employee_id, day.isoformat()), []
+    ):
+        if _overlaps(s_time, e_time, a_start, a_end):
+            return True
+    return False
+
+
+def _expand_series(
+    series,
+    exceptions_by_series_date: dict[tuple[int, str], ShiftException],
+    explicit_by_emp_date: dict[tuple[int, str], list[tuple]],
+    types_by_id: dict[int, dict],
+    d_from: date,
+    d_to: date,
+) -> list[dict]:
+    """
+    Expande las series en [d_from, d_to] con las reglas de precedencia de list_shifts.
+    No hace queries: excepciones, explícitos y tipos llegan precargados.
+    """
+    expanded = []
+    for ser in series:
+        # límites del loop
+        start = max(ser.start_date, d_from)
+        end = min(ser.end_date or d_to, d_to)
+        if end < start:
+            continue
+
+        # pre-chequeos
+        if ser.end_time <= ser.start_time:
+            # V1: no cruzar medianoche
+            continue
+        if ser.weekdays_mask <= 0:
+            continue
+        if ser.interval_weeks <= 0:
+            continue
+
+        for day in series_occurrences(ser, start, end):
+            resolved = apply_exception(
+                ser, exceptions_by_series_date.get((ser.id, day.isoformat()))
+            )
+            if resolved is None:
+                continue
+            s_time, e_time, type_id = resolved
+
+            # evitar solapamiento con explícitos de ese día
+            if _overlaps_explicit(
+                explicit_by_emp_date, ser.employee_id, day, s_time, e_time
+            ):
+                continue
+
+            expanded.append(
+                _generated_item(
+                    ser.id, ser, day, s_time, e_time, types_by_id.get(type_id)
+                )
+            )
+    return expanded
+
+
+def _materialized_items(
+    occs, explicit_by_emp_date: dict[tuple[int, str], list[tuple]], types_by_id
+) -> list[dict]:
+    """
+    Igual que _expand_series pero leyendo shift_occurrence (excepciones ya aplicadas).
+    Solo falta descartar las ocurrencias que solapan con turnos explícitos.
+    """
+    items = []
+    for o in occs:
+        if _overlaps_explicit(
+            explicit_by_emp_date, o.employee_id, o.date, o.start_time, o.end_time
+        ):
+            continue
+        items.append(
+            _generated_item(
+                o.series_id,
+                o,
+                o.date,
+                o.start_time,
+                o.end_time,
+                types_by_id.get(o.type_id),
+            )
+        )
+    return items
+
+
+def _role_members(company_id: int, role_id: int):
+    # subconsulta: ids de los empleados de la empresa con ese rol
+    return db.select(Employee.id).where(
+        Employee.company_id == company_id, Employee.role_id == role_id
+    )
+
+
+def _generated_shifts(
+    explicit,
+    d_from: date,
+    d_to: date,
+    employee_id: int | None = None,
+    company_id: int | None = None,
+    role_id: int | None = None,
+) -> list[dict]:
+    """
+    Ocurrencias generadas por series para UN empleado o para TODA una empresa
+    (opcionalmente solo los empleados de un rol: se filtra en la query, sin
+    expandir series ajenas).
+    - Si el rango cae en la ventana materializada: un único range scan sobre shift_occurrence.
+    - Si no: series activas + excepciones (dos queries) y expansión al vuelo.
+    Solo carga los tipos de las ocurrencias; los de los explícitos los trae quien
+    los consulta (selectinload(Shifts.type)) si los va a serializar.
+    """
+    explicit_by_emp_date = _index_explicit(explicit)
+
+    if covers_horizon(d_from, d_to):
+        q = db.select(ShiftOccurrence).where(
+            ShiftOccurrence.date >= d_from, ShiftOccurrence.date <= d_to
+        )
+        if employee_id is not None:
+            q = q.where(ShiftOccurrence.employee_id == employee_id)
+        else:
+            q = q.where(ShiftOccurrence.company_id == company_id)
+            if role_id is not None:
+                q = q.where(
+                    ShiftOccurrence.employee_id.in_(_role_members(company_id, role_id))
+                )
+        occs = (
+            db.session.execute(
+                q.order_by(
+                    ShiftOccurrence.date.asc(),
+                    ShiftOccurrence.start_time.asc(),
+                    ShiftOccurrence.series_id.asc(),
+                )
+            )
+            .scalars()
+            .all()
+        )
+        types_by_id = _load_types_serialized(o.type_id for o in occs)
+        return _materialized_items(occs, explicit_by_emp_date, types_by_id)
+
+    # Series activas que intersecten el rango
+    series_filter = (
+        (
+            ShiftSeries.employee_id == employee_id
+            if employee_id is not None
+            else ShiftSeries.company_id == company_id
+        ),
+        ShiftSeries.active.is_(True),
+        ShiftSeries.start_date <= d_to,
+        ((ShiftSeries.end_date.is_(None)) | (ShiftSeries.end_date >= d_from)),
+    )
+    if employee_id is None and role_id is not None:
+        series_filter += (
+            ShiftSeries.employee_id.in_(_role_members(company_id, role_id)),
+        )
+    series = (
+        db.session.execute(db.select(ShiftSeries).where(*series_filter))
+        .scalars()
+        .all()
+    )
+
+    # Excepciones de esas series (join en vez de IN con miles de ids)
+    exs = []
+    if series:
+        exs = (
+            db.session.execute(
+                db.select(ShiftException)
+                .join(ShiftSeries, ShiftException.series_id == ShiftSeries.id)
+                .where(
+                    *series_filter,
+                    ShiftException.date >= d_from,
+                    ShiftException.date <= d_to,
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+    # precargar (una sola query) los tipos de series y excepciones 'modify'
+    types_by_id = _load_types_serialized(
+        [ser.type_id for ser in series] + [ex.new_type_id for ex in exs]
+    )
+    return _expand_series(
+        series,
+        _index_exceptions(exs),
+        explicit_by_emp_date,
+        types_by_id,
+        d_from,
+        d_to,
+    )
 
 
 # --- Shift types ---
@@ -127,14 +375,15 @@ def list_shifts():
             wanted = int(emp_param)
         except ValueError:
             return jsonify({"error": "employee_id debe ser entero"}), 400
-        emp = db.session.get(Employee, wanted)
+        # objetivo + requester (lo piden los helpers de auth) en una sola query
+        emp = employee_loader().prime(requester_id).get(wanted)
         if not emp:
             return jsonify({"error": "Empleado no encontrado"}), 404
         if not _can_access_employee(emp):
             return jsonify({"error": "Forbidden"}), 403
         target_id = wanted
     else:
-        emp = db.session.get(Employee, requester_id)
+        emp = employee_loader().get(requester_id)
         if not emp:
             return jsonify({"error": "Empleado no encontrado"}), 404
 
@@ -148,136 +397,250 @@ def list_shifts():
                 Shifts.date <= d_to,
             )
             .order_by(Shifts.date.asc(), Shifts.start_time.asc())
+            .options(selectinload(Shifts.type))  # tipos en 1 query, no 1 por fila
         )
         .scalars()
         .all()
     )
 
+    # 2) Ocurrencias de series (materializadas o expandidas al vuelo)
+    expanded = _generated_shifts(explicit, d_from, d_to, employee_id=target_id)
     explicit_serial = [s.serialize() for s in explicit]
 
-    # preparar lookup por fecha para chequear solapamientos con series
-    explicit_by_date: dict[str, list[tuple]] = {}
-    for s in explicit:
-        k = s.date.isoformat()
-        explicit_by_date.setdefault(k, []).append((s.start_time, s.end_time))
+    # combinar y ordenar
+    all_items = explicit_serial + expanded
+    all_items.sort(key=lambda x: (x["date"], x["start_time"]))
+    return jsonify(all_items), 200
 
-    # 2) Series activas que intersecten el rango
-    series = (
+
+@shift_bp.route("/calendar", methods=["GET"])
+@jwt_required()
+def company_calendar():
+    """
+    GET /api/shifts/calendar?from=YYYY-MM-DD&to=YYYY-MM-DD&company_id=
+    Calendario de TODA la empresa: turnos EXPRESOS + expansiones de SERIES,
+    agrupados por empleado. Mismas reglas de precedencia que list_shifts.
+    ADMIN/HR: su empresa. OWNERDB: company_id obligatorio.
+    Coste fijo de queries (explícitos, series/ocurrencias, excepciones, tipos)
+    sin importar cuántos empleados tenga la empresa.
+    """
+    from_str = request.args.get("from")
+    to_str = request.args.get("to")
+
+    if not from_str or not to_str:
+        return jsonify({"error": "Params 'from' y 'to' requeridos (YYYY-MM-DD)."}), 400
+
+    try:
+        d_from = date.fromisoformat(from_str)
+        d_to = date.fromisoformat(to_str)
+    except ValueError:
+        return jsonify({"error": "Fechas inválidas (usa YYYY-MM-DD)."}), 400
+    if d_from > d_to:
+        return jsonify({"error": "'from' no puede ser mayor que 'to'."}), 400
+
+    if is_ownerdb():
+        try:
+            company_id = int(request.args.get("company_id"))
+        except (TypeError, ValueError):
+            return jsonify({"error": "company_id debe ser entero"}), 400
+    else:
+        if not is_admin_or_hr():
+            return jsonify({"error": "Forbidden"}), 403
+        company_id = get_jwt_company_id()
+        if company_id is None:
+            return jsonify({"error": "Unauthorized"}), 401
+
+    # 1) Shifts explícitos de toda la empresa en el rango
+    explicit = (
         db.session.execute(
-            db.select(ShiftSeries).where(
-                ShiftSeries.employee_id == target_id,
-                ShiftSeries.active.is_(True),
-                ShiftSeries.start_date <= d_to,
-                ((ShiftSeries.end_date.is_(None)) | (ShiftSeries.end_date >= d_from)),
+            db.select(Shifts)
+            .where(
+                Shifts.company_id == company_id,
+                Shifts.date >= d_from,
+                Shifts.date <= d_to,
             )
+            .order_by(Shifts.date.asc(), Shifts.start_time.asc())
+            .options(selectinload(Shifts.type))
         )
         .scalars()
         .all()
     )
 
-    # precargar excepciones de las series en rango
-    series_ids = [s.id for s in series]
-    exceptions_by_series_date: dict[tuple[int, str], ShiftException] = {}
-    if series_ids:
-        exs = (
-            db.session.execute(
-                db.select(ShiftException).where(
-                    ShiftException.series_id.in_(series_ids),
-                    ShiftException.date >= d_from,
-                    ShiftException.date <= d_to,
-                )
-            )
-            .scalars()
-            .all()
-        )
-        for ex in exs:
-            key = (ex.series_id, ex.date.isoformat())
-            exceptions_by_series_date[key] = ex
+    # 2) Ocurrencias de series de toda la empresa
+    expanded = _generated_shifts(explicit, d_from, d_to, company_id=company_id)
+
+    by_employee: dict[int, list[dict]] = {}
+    for item in [s.serialize() for s in explicit] + expanded:
+        by_employee.setdefault(item["employee_id"], []).append(item)
+    for items in by_employee.values():
+        items.sort(key=lambda x: (x["date"], x["start_time"]))
+
+    return (
+        jsonify(
+            {
+                "company_id": company_id,
+                "from": d_from.isoformat(),
+                "to": d_to.isoformat(),
+                "employees": [
+                    {"employee_id": emp_id, "shifts": by_employee[emp_id]}
+                    for emp_id in sorted(by_employee)
+                ],
+            }
+        ),
+        200,
+    )
 
-    # expandir series
-    expanded = []
-    for ser in series:
-        # límites del loop
-        start = max(ser.start_date, d_from)
-        end = min(ser.end_date or d_to, d_to)
-        if end < start:
-            continue
 
-        # pre-chequeos
-        if ser.end_time <= ser.start_time:
-            # V1: no cruzar medianoche
-            continue
-        if ser.weekdays_mask <= 0:
-            continue
-        if ser.interval_weeks <= 0:
-            continue
+COVERAGE_MAX_DAYS = 366
 
-        day = start
-        while day <= end:
-            # filtra por weekday
-            bit = _weekday_bit_for_date(day)  # 0..6 (Lun..Dom)
-            if (ser.weekdays_mask & (1 << bit)) != 0:
-                # respeta intervalo de semanas
-                weeks = _weeks_between(ser.start_date, day)
-                if weeks % ser.interval_weeks == 0:
-                    key = (ser.id, day.isoformat())
-                    ex = exceptions_by_series_date.get(key)
-
-                    if ex and ex.action == "cancel":
-                        pass  # omitimos
-                    else:
-                        # datos base
-                        s_time = ser.start_time
-                        e_time = ser.end_time
-                        type_id = ser.type_id
-
-                        # aplica modify
-                        if ex and ex.action == "modify":
-                            if ex.new_start_time:
-                                s_time = ex.new_start_time
-                            if ex.new_end_time:
-                                e_time = ex.new_end_time
-                            if ex.new_type_id:
-                                type_id = ex.new_type_id
-                            # V1: si queda inconsistente, omitimos
-                            if e_time <= s_time:
-                                day += timedelta(days=1)
-                                continue
-
-                        # evitar solapamiento con explícitos de ese día
-                        overlaps_explicit = False
-                        for a_start, a_end in explicit_by_date.get(day.isoformat(), []):
-                            if _overlaps(s_time, e_time, a_start, a_end):
-                                overlaps_explicit = True
-                                break
-                        if overlaps_explicit:
-                            day += timedelta(days=1)
-                            continue
-
-                        # cargar tipo (para color) solo si necesario
-                        stype = db.session.get(ShiftType, type_id)
-
-                        expanded.append(
-                            {
-                                "id": None,  # ocurrencia generada
-                                "company_id": ser.company_id,
-                                "employee_id": ser.employee_id,
-                                "date": day.isoformat(),
-                                "start_time": s_time.strftime("%H:%M"),
-                                "end_time": e_time.strftime("%H:%M"),
-                                "type": stype.serialize() if stype else None,
-                                "notes": ser.notes,
-                                "status": "planned",
-                                "generated": True,
-                                "series_id": ser.id,
-                            }
-                        )
-            day += timedelta(days=1)
 
-    # combinar y ordenar
-    all_items = explicit_serial + expanded
-    all_items.sort(key=lambda x: (x["date"], x["start_time"]))
-    return jsonify(all_items), 200
+@shift_bp.route("/coverage", methods=["GET"])
+@jwt_required()
+def company_coverage():
+    """
+    GET /api/shifts/coverage?from=YYYY-MM-DD&to=YYYY-MM-DD&role_id=&company_id=
+    Cobertura diaria de la empresa (o de un rol): por cada día del rango,
+      - absent: empleados con vacaciones APROBADAS ese día
+      - scheduled: empleados con algún turno (explícito o de serie) ese día
+      - available: programados que no están de vacaciones
+    Las vacaciones se acumulan con un array de diferencias (+1 al inicio, -1 tras el
+    fin) y los turnos con un contador por (empleado, día): O(filas + días), no
+    O(empleados x días). Mismos permisos que /calendar.
+    """
+    from_str = request.args.get("from")
+    to_str = request.args.get("to")
+
+    if not from_str or not to_str:
+        return jsonify({"error": "Params 'from' y 'to' requeridos (YYYY-MM-DD)."}), 400
+
+    try:
+        d_from = date.fromisoformat(from_str)
+        d_to = date.fromisoformat(to_str)
+    except ValueError:
+        return jsonify({"error": "Fechas inválidas (usa YYYY-MM-DD)."}), 400
+    if d_from > d_to:
+        return jsonify({"error": "'from' no puede ser mayor que 'to'."}), 400
+    n_days = (d_to - d_from).days + 1
+    if n_days > COVERAGE_MAX_DAYS:
+        return jsonify({"error": f"Rango máximo: {COVERAGE_MAX_DAYS} días."}), 400
+
+    if is_ownerdb():
+        try:
+            company_id = int(request.args.get("company_id"))
+        except (TypeError, ValueError):
+            return jsonify({"error": "company_id debe ser entero"}), 400
+    else:
+        if not is_admin_or_hr():
+            return jsonify({"error": "Forbidden"}), 403
+        company_id = get_jwt_company_id()
+        if company_id is None:
+            return jsonify({"error": "Unauthorized"}), 401
+
+    role_id = request.args.get("role_id")
+    if role_id is not None:
+        try:
+            role_id = int(role_id)
+        except ValueError:
+            return jsonify({"error": "role_id debe ser entero"}), 400
+        # los roles son un catálogo global: fuera de OWNERDB solo valen los que
+        # tiene algún empleado de tu empresa
+        if is_ownerdb():
+            found = db.session.get(Role, role_id) is not None
+        else:
+            found = db.session.execute(
+                _role_members(company_id, role_id).limit(1)
+            ).first() is not None
+        if not found:
+            return jsonify({"error": "Rol no encontrado"}), 404
+
+    # plantilla del alcance (empresa o empresa+rol)
+    if role_id is not None:
+        staff_q = _role_members(company_id, role_id)
+    else:
+        staff_q = db.select(Employee.id).where(Employee.company_id == company_id)
+    staff = set(db.session.execute(staff_q).scalars())
+
+    # 1) Vacaciones aprobadas que tocan el rango (solo columnas, sin cargar modelos).
+    #    No se solapan entre sí por empleado (ex_holidays_no_overlap): cada día cuenta
+    #    a cada persona una sola vez.
+    hol_q = db.select(
+        Holidays.employee_id, Holidays.start_date, Holidays.end_date
+    ).where(
+        Holidays.company_id == company_id,
+        Holidays.status == HolidayStatus.APPROVED,
+        Holidays.start_date <= d_to,
+        Holidays.end_date >= d_from,
+    )
+    if role_id is not None:
+        hol_q = hol_q.join(Employee, Holidays.employee_id == Employee.id).where(
+            Employee.role_id == role_id
+        )
+    diff = [0] * (n_days + 1)
+    leave_by_employee: dict[int, list[tuple[int, int]]] = {}
+    for emp_id, start, end in db.session.execute(hol_q):
+        i = (max(start, d_from) - d_from).days
+        j = (min(end, d_to) - d_from).days
+        diff[i] += 1
+        diff[j + 1] -= 1
+        leave_by_employee.setdefault(emp_id, []).append((i, j))
+    for intervals in leave_by_employee.values():
+        intervals.sort()
+
+    # 2) Turnos explícitos + ocurrencias de series de la empresa
+    explicit_q = db.select(Shifts).where(
+        Shifts.company_id == company_id,
+        Shifts.date >= d_from,
+        Shifts.date <= d_to,
+    )
+    if role_id is not None:
+        explicit_q = explicit_q.where(Shifts.employee_id.in_(staff_q))
+    explicit = db.session.execute(explicit_q).scalars().all()
+    expanded = _generated_shifts(
+        explicit, d_from, d_to, company_id=company_id, role_id=role_id
+    )
+
+    # (empleado, día) distintos: varios turnos el mismo día cuentan una vez
+    worked = {(s.employee_id, (s.date - d_from).days) for s in explicit}
+    worked.update(
+        (item["employee_id"], (date.fromisoformat(item["date"]) - d_from).days)
+        for item in expanded
+    )
+    scheduled = [0] * n_days
+    scheduled_absent = [0] * n_days
+    for emp_id, i in worked:
+        scheduled[i] += 1
+        intervals = leave_by_employee.get(emp_id)
+        if intervals:
+            k = bisect_right(intervals, (i, n_days)) - 1
+            if k >= 0 and intervals[k][1] >= i:
+                scheduled_absent[i] += 1
+
+    days = []
+    absent = 0
+    for i in range(n_days):
+        absent += diff[i]
+        days.append(
+            {
+                "date": (d_from + timedelta(days=i)).isoformat(),
+                "absent": absent,
+                "scheduled": scheduled[i],
+                "available": scheduled[i] - scheduled_absent[i],
+            }
+        )
+
+    return (
+        jsonify(
+            {
+                "company_id": company_id,
+                "role_id": role_id,
+                "from": d_from.isoformat(),
+                "to": d_to.isoformat(),
+                "headcount": len(staff),
+                "days": days,
+            }
+        ),
+        200,
+    )
 
 
 @shift_bp.route("", methods=["POST"])
@@ -325,7 +688,7 @@ def create_shift():
         )
 
     # Entidades y permisos
-    emp = db.session.get(Employee, emp_id)
+    emp = employee_loader().get(emp_id)
     if not emp:
         return jsonify({"error": "Empleado no encontrado"}), 404
     if not _can_access_employee(emp):
@@ -396,6 +759,176 @@ def create_shift():
     return jsonify(s.serialize()), 201
 
 
+BULK_MAX_ROWS = 5000
+
+
+@shift_bp.route("/bulk", methods=["POST"])
+@jwt_required()
+def create_shifts_bulk():
+    """
+    POST /api/shifts/bulk
+    Body: { shifts: [ {employee_id, date, start_time, end_time, type_id, notes?, status?}, ... ] }
+    Importa un cuadrante completo:
+      - empleados, tipos y turnos ya guardados se cargan en 3 queries para todo el lote,
+      - índice ordenado de intervalos por (empleado, día) para detectar solapes
+        con lo guardado y con filas anteriores del mismo lote,
+      - las filas válidas se insertan en UNA transacción.
+    Respuesta: resultado por fila ({index, ok, shift|error}).
+    """
+    data = request.get_json(silent=True) or {}
+    rows = data.get("shifts")
+    if not isinstance(rows, list) or not rows:
+        return jsonify({"error": "Campo requerido: shifts (lista no vacía)"}), 400
+    if len(rows) > BULK_MAX_ROWS:
+        return jsonify({"error": f"Máximo {BULK_MAX_ROWS} turnos por lote"}), 400
+
+    # permisos del solicitante (una vez por lote, no por fila)
+    owner = is_ownerdb()
+    admin_or_hr = is_admin_or_hr()
+    jwt_company_id = get_jwt_company_id()
+    requester_id = current_employee_id()
+
+    results: list[dict | None] = [None] * len(rows)
+    parsed = []
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results[i] = {"index": i, "ok": False, "error": "Fila inválida"}
+            continue
+        try:
+            emp_id = int(row.get("employee_id"))
+            type_id = int(row.get("type_id"))
+        except (TypeError, ValueError):
+            results[i] = {"index": i, "ok": False, "error": "employee_id/type_id inválidos"}
+            continue
+        try:
+            d = date.fromisoformat(row.get("date"))
+        except (TypeError, ValueError):
+            results[i] = {"index": i, "ok": False, "error": "date inválida (YYYY-MM-DD)"}
+            continue
+        try:
+            t_start = _parse_time_hhmm(row.get("start_time"))
+            t_end = _parse_time_hhmm(row.get("end_time"))
+        except Exception:
+            results[i] = {
+                "index": i,
+                "ok": False,
+                "error": "start_time/end_time inválidos (HH:MM)",
+            }
+            continue
+        if t_end <= t_start:
+            results[i] = {
+                "index": i,
+                "ok": False,
+                "error": "end_time debe ser mayor que start_time (V1 no cruza medianoche)",
+            }
+            continue
+        parsed.append((i, row, emp_id, type_id, d, t_start, t_end))
+
+    emp_ids = {p[2] for p in parsed}
+    employees = {}
+    if emp_ids:
+        employees = {
+            e.id: e
+            for e in db.session.execute(
+                db.select(Employee).where(Employee.id.in_(emp_ids))
+            ).scalars()
+        }
+    type_ids = {p[3] for p in parsed}
+    types = {}
+    if type_ids:
+        types = {
+            t.id: t
+            for t in db.session.execute(
+                db.select(ShiftType).where(ShiftType.id.in_(type_ids))
+            ).scalars()
+        }
+
+    # índice (empleado, día) -> [(start, end)] ordenado, con lo ya guardado
+    index: dict[tuple[int, date], list[tuple]] = {}
+    if parsed:
+        existing = db.session.execute(
+            db.select(Shifts.employee_id, Shifts.date, Shifts.start_time, Shifts.end_time)
+            .where(
+                Shifts.employee_id.in_(emp_ids),
+                Shifts.date >= min(p[4] for p in parsed),
+                Shifts.date <= max(p[4] for p in parsed),
+            )
+            .order_by(Shifts.start_time.asc())
+        ).all()
+        for emp_id, d, t_start, t_end in existing:
+            index.setdefault((emp_id, d), []).append((t_start, t_end))
+
+    created: list[tuple[int, Shifts]] = []
+    for i, row, emp_id, type_id, d, t_start, t_end in parsed:
+        emp = employees.get(emp_id)
+        if not emp:
+            results[i] = {"index": i, "ok": False, "error": "Empleado no encontrado"}
+            continue
+        if not (
+            owner
+            or (admin_or_hr and emp.company_id == jwt_company_id)
+            or emp.id == requester_id
+        ):
+            results[i] = {"index": i, "ok": False, "error": "Forbidden"}
+            continue
+        stype = types.get(type_id)
+        if not stype:
+            results[i] = {"index": i, "ok": False, "error": "type_id inválido"}
+            continue
+        if stype.company_id not in (None, emp.company_id):
+            results[i] = {
+                "index": i,
+                "ok": False,
+                "error": "El tipo de turno no pertenece a tu empresa",
+            }
+            continue
+
+        day_intervals = index.setdefault((emp.id, d), [])
+        if _interval_conflicts(day_intervals, t_start, t_end):
+            results[i] = {
+                "index": i,
+                "ok": False,
+                "error": "Conflicto: se solapa con otro turno existente en ese día",
+            }
+            continue
+        insort(day_intervals, (t_start, t_end))
+
+        s = Shifts(
+            company_id=emp.company_id,
+            employee_id=emp.id,
+            date=d,
+            start_time=t_start,
+            end_time=t_end,
+            type_id=stype.id,
+            notes=row.get("notes"),
+            status=row.get("status", "planned"),
+        )
+        db.session.add(s)
+        created.append((i, s))
+
+    if created:
+        try:
+            db.session.flush()
+            # serializar antes del commit: tras él cada fila se recargaría (1 query por turno)
+            for i, s in created:
+                results[i] = {"index": i, "ok": True, "shift": s.serialize()}
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"error": "Integrity error importando turnos"}), 400
+
+    return (
+        jsonify(
+            {
+                "created": len(created),
+                "failed": len(rows) - len(created),
+                "results": results,
+            }
+        ),
+        201 if created else 400,
+    )
+
+
 @shift_bp.route("/<int:shift_id>", methods=["PUT"])
 @jwt_required()
 def update_shift(shift_id: int):
@@ -407,7 +940,7 @@ def update_shift(shift_id: int):
     if not s:
         return jsonify({"error": "Turno no encontrado"}), 404
 
-    emp = db.session.get(Employee, s.employee_id)
+    emp = employee_loader().get(s.employee_id)
     if not _can_access_employee(emp):
         return jsonify({"error": "Forbidden"}), 403
 
@@ -494,7 +1027,7 @@ def delete_shift(shift_id: int):
     s = db.session.get(Shifts, shift_id)
     if not s:
         return jsonify({"error": "Turno no encontrado"}), 404
-    emp = db.session.get(Employee, s.employee_id)
+    emp = employee_loader().get(s.employee_id)
     if not _can_access_employee(emp):
         return jsonify({"error": "Forbidden"}), 403
     db.session.delete(s)
@@ -539,7 +1072,7 @@ def create_series():
             400,
         )
 
-    emp = db.session.get(Employee, int(emp_id))
+    emp = employee_loader().get(int(emp_id))
     if not emp:
         return jsonify({"error": "Empleado no encontrado"}), 404
     if not _can_access_employee(emp):
@@ -591,6 +1124,8 @@ def create_series():
         active=True,
     )
     db.session.add(ser)
+    db.session.flush()
+    refresh_series_occurrences(ser)
     db.session.commit()
     db.session.refresh(ser)
     return jsonify(ser.serialize()), 201
@@ -612,7 +1147,8 @@ def list_series():
             wanted = int(emp_param)
         except ValueError:
             return jsonify({"error": "employee_id debe ser entero"}), 400
-        emp = db.session.get(Employee, wanted)
+        # objetivo + requester (lo piden los helpers de auth) en una sola query
+        emp = employee_loader().prime(requester_id).get(wanted)
         if not emp:
             return jsonify({"error": "Empleado no encontrado"}), 404
         if not _can_access_employee(emp):
@@ -624,6 +1160,7 @@ def list_series():
             db.select(ShiftSeries)
             .where(ShiftSeries.employee_id == target_id)
             .order_by(ShiftSeries.start_date.desc())
+            .options(selectinload(ShiftSeries.type))
         )
         .scalars()
         .all()
@@ -642,7 +1179,7 @@ def update_series(series_id: int):
     if not ser:
         return jsonify({"error": "Serie no encontrada"}), 404
 
-    emp = db.session.get(Employee, ser.employee_id)
+    emp = employee_loader().get(ser.employee_id)
     if not _can_access_employee(emp):
         return jsonify({"error": "Forbidden"}), 403
 
@@ -736,6 +1273,7 @@ def update_series(series_id: int):
     ser.notes = notes
     ser.active = active
 
+    refresh_series_occurrences(ser)
     db.session.commit()
     db.session.refresh(ser)
     return jsonify(ser.serialize()), 200
@@ -751,9 +1289,12 @@ def delete_series(series_id: int):
     ser = db.session.get(ShiftSeries, series_id)
     if not ser:
         return jsonify({"error": "Serie no encontrada"}), 404
-    emp = db.session.get(Employee, ser.employee_id)
+    emp = employee_loader().get(ser.employee_id)
     if not _can_access_employee(emp):
         return jsonify({"error": "Forbidden"}), 403
+    db.session.execute(
+        db.delete(ShiftOccurrence).where(ShiftOccurrence.series_id == ser.id)
+    )
     db.session.delete(ser)
     db.session.commit()
     return jsonify({"ok": True}), 200
@@ -771,7 +1312,7 @@ def upsert_exception(series_id: int):
     if not ser:
         return jsonify({"error": "Serie no encontrada"}), 404
 
-    emp = db.session.get(Employee, ser.employee_id)
+    emp = employee_loader().get(ser.employee_id)
     if not _can_access_employee(emp):
         return jsonify({"error": "Forbidden"}), 403
 
@@ -843,6 +1384,8 @@ def upsert_exception(series_id: int):
     ex.new_end_time = _parse_time_hhmm(new_end) if new_end else None
     ex.new_type_id = int(new_type_id) if new_type_id else None
 
+    db.session.flush()
+    refresh_series_occurrences(ser, d, d)
     db.session.commit()
     db.session.refresh(ex)
     return jsonify(ex.serialize()), 201
@@ -858,7 +1401,7 @@ def delete_exception_by_series_date(series_id: int):
     ser = db.session.get(ShiftSeries, series_id)
     if not ser:
         return jsonify({"error": "Serie no encontrada"}), 404
-    emp = db.session.get(Employee, ser.employee_id)
+    emp = employee_loader().get(ser.employee_id)
     if not _can_access_employee(emp):
         return jsonify({"error": "Forbidden"}), 403
 
@@ -879,6 +1422,8 @@ def delete_exception_by_series_date(series_id: int):
         return jsonify({"error": "Excepción no encontrada"}), 404
 
     db.session.delete(ex)
+    db.session.flush()
+    refresh_series_occurrences(ser, d, d)
     db.session.commit()
     return jsonify({"ok": True}), 200
 
@@ -894,9 +1439,12 @@ def delete_exception_by_id(ex_id: int):
     if not ex:
         return jsonify({"error": "Excepción no encontrada"}), 404
     ser = db.session.get(ShiftSeries, ex.series_id)
-    emp = db.session.get(Employee, ser.employee_id)
+    emp = employee_loader().get(ser.employee_id)
     if not _can_access_employee(emp):
         return jsonify({"error": "Forbidden"}), 403
+    ex_date = ex.date
     db.session.delete(ex)
+    db.session.flush()
+    refresh_series_occurrences(ser, ex_date, ex_date)
     db.session.commit()
     return jsonify({"ok": True}), 200
@@ -20,6 +20,7 @@ from api.utils_auth.helpers_auth import (
     current_employee_id,
     is_ownerdb,
 )
+from api.utils_auth.utils_pagination import pagination_requested, paginated_response
 
 suggestions_bp = Blueprint("suggestions", __name__, url_prefix="/suggestions")
 
@@ -36,24 +37,15 @@ def get_suggestions():
         return jsonify({"error": "Unauthorized"}), 401
 
     if is_admin_or_hr() or is_ownerdb():
-        items = (
-            db.session.execute(
-                db.select(Suggestions).where(Suggestions.company_id == company_id)
-            )
-            .scalars()
-            .all()
-        )
+        stmt = db.select(Suggestions).where(Suggestions.company_id == company_id)
     else:
-        items = (
-            db.session.execute(
-                db.select(Suggestions).where(
-                    Suggestions.company_id == company_id,
-                    Suggestions.employee_id == current_employee_id(),
-                )
-            )
-            .scalars()
-            .all()
+        stmt = db.select(Suggestions).where(
+            Suggestions.company_id == company_id,
+            Suggestions.employee_id == current_employee_id(),
         )
+    if pagination_requested():
+        return paginated_response(stmt, [Suggestions.id])
+    items = db.session.execute(stmt).scalars().all()
 
     return jsonify([s.serialize() for s in items]), 200
 
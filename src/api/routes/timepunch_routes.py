@@ -1,10 +1,27 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_cors import CORS
-from api.models import db, Employee, TimePunch, PunchType
+from api.models import db, Employee, TimePunch, TimePunchState, DailyWorkSummary, PunchType
+import csv
+import io
+import json
 from datetime import datetime, date, time, timedelta, timezone
+from itertools import groupby
+from operator import itemgetter
 from zoneinfo import ZoneInfo
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from api.utils_auth.helpers_auth import get_jwt_company_id, is_admin_or_hr, is_ownerdb
+from api.utils_auth.utils_loaders import employee_loader
+from api.utils_auth.utils_timepunch import (
+    as_utc,
+    ventana_utc,
+    ventana_fichajes,
+    usa_rollup,
+    resumir_sesiones,
+    resumir_rollup,
+    actualizar_rollup,
+)
 
 time_punch_bp = Blueprint("time_punch_bp", __name__, url_prefix="/time-punch")
 CORS(time_punch_bp)
@@ -26,12 +43,46 @@ def _ultimo_fichaje(employee_id: int) -> TimePunch | None:
 DEBOUNCE_SECONDS = 2  # ventana anti-doble-click
 
 
-def _ultimo_reciente(employee_id: int) -> TimePunch | None:
+def _estado_fichaje(employee_id: int, for_update: bool = False) -> TimePunchState | None:
+    """
+    Estado actual del empleado: una búsqueda por PK en time_punch_state.
+    La primera vez (empleado sin fila de estado) lo reconstruye desde TimePunch.
+    Devuelve None si el empleado no existe.
+    Con for_update=True bloquea la fila (SELECT ... FOR UPDATE) para serializar
+    fichajes concurrentes del mismo empleado.
+    Si dos peticiones crean a la vez la fila que falta, la que pierde choca con la
+    PK: se descarta su fila y se recarga (bloqueada) la que insertó la otra.
+    """
+    lock = True if for_update else None
+    estado = db.session.get(TimePunchState, employee_id, with_for_update=lock)
+    if estado is not None:
+        return estado
+
+    if not employee_loader().get(employee_id):
+        return None
     ultimo = _ultimo_fichaje(employee_id)
-    if not ultimo:
+    estado = TimePunchState(
+        employee_id=employee_id,
+        last_punch=ultimo,
+        last_type=ultimo.punch_type if ultimo else None,
+        last_at=ultimo.punched_at if ultimo else None,
+    )
+    try:
+        # INSERT inmediato dentro de un SAVEPOINT: el choque no invalida la transacción
+        with db.session.begin_nested():
+            db.session.add(estado)
+    except IntegrityError:
+        return db.session.get(
+            TimePunchState, employee_id, with_for_update=lock, populate_existing=True
+        )
+    return estado
+
+
+def _ultimo_reciente(estado: TimePunchState) -> TimePunch | None:
+    if estado.last_at is None:
         return None
-    delta = (_now_utc() - ultimo.punched_at).total_seconds()
-    return ultimo if delta < DEBOUNCE_SECONDS else None
+    delta = (_now_utc() - as_utc(estado.last_at)).total_seconds()
+    return estado.last_punch if delta < DEBOUNCE_SECONDS else None
 
 
 def _crear_fichaje(
@@ -42,6 +93,7 @@ def _crear_fichaje(
 ) -> TimePunch:
     """
     Crea el objeto TimePunch y lo añade a la sesión, PERO NO hace commit.
+    Actualiza también time_punch_state en la misma transacción.
     El endpoint llamará a db.session.commit() cuando corresponda.
     """
     fichaje = TimePunch(
@@ -51,6 +103,17 @@ def _crear_fichaje(
         note=note,
     )
     db.session.add(fichaje)
+
+    estado = _estado_fichaje(employee_id)
+    if estado is not None and (
+        estado.last_at is None or as_utc(fichaje.punched_at) >= as_utc(estado.last_at)
+    ):
+        estado.last_punch = fichaje
+        estado.last_type = punch_type
+        estado.last_at = fichaje.punched_at
+    if punch_type == PunchType.OUT:
+        # el OUT cierra la sesión: la sumamos al rollup diario
+        actualizar_rollup({employee_id: fichaje.punched_at})
     return fichaje
 
 
@@ -58,12 +121,12 @@ def _crear_fichaje(
 @jwt_required()
 def start_shift():
     employee_id = int(get_jwt_identity())
-    empleado = db.session.get(Employee, employee_id)
-    if not empleado:
+    estado = _estado_fichaje(employee_id, for_update=True)
+    if not estado:
         return jsonify({"error": "Empleado no encontrado"}), 404
 
     # Si el último fichaje es MUY reciente y ya es IN, tratamos como idempotente
-    ultimo_reciente = _ultimo_reciente(employee_id)
+    ultimo_reciente = _ultimo_reciente(estado)
     if ultimo_reciente and ultimo_reciente.punch_type == PunchType.IN:
         return (
             jsonify(
@@ -72,8 +135,7 @@ def start_shift():
             200,
         )
 
-    ultimo = _ultimo_fichaje(employee_id)
-    if ultimo and ultimo.punch_type != PunchType.OUT:
+    if estado.last_type is not None and estado.last_type != PunchType.OUT:
         return jsonify({"error": "Ya tienes un turno abierto"}), 409
 
     try:
@@ -90,12 +152,12 @@ def start_shift():
 @jwt_required()
 def pause_toggle():
     employee_id = int(get_jwt_identity())
-    empleado = db.session.get(Employee, employee_id)
-    if not empleado:
+    estado = _estado_fichaje(employee_id, for_update=True)
+    if not estado:
         return jsonify({"error": "Empleado no encontrado"}), 404
 
     # Si el último fichaje es MUY reciente (cualquier tipo), ignora como doble click
-    ultimo_reciente = _ultimo_reciente(employee_id)
+    ultimo_reciente = _ultimo_reciente(estado)
     if ultimo_reciente:
         return (
             jsonify(
@@ -104,15 +166,14 @@ def pause_toggle():
             200,
         )
 
-    ultimo = _ultimo_fichaje(employee_id)
-    if not ultimo or ultimo.punch_type == PunchType.OUT:
+    if estado.last_type is None or estado.last_type == PunchType.OUT:
         return jsonify({"error": "No hay turno en curso"}), 409
 
     try:
         note = (request.get_json(silent=True) or {}).get("note")
-        if ultimo.punch_type in (PunchType.IN, PunchType.BREAK_END):
+        if estado.last_type in (PunchType.IN, PunchType.BREAK_END):
             fichaje = _crear_fichaje(employee_id, PunchType.BREAK_START, note=note)
-        elif ultimo.punch_type == PunchType.BREAK_START:
+        elif estado.last_type == PunchType.BREAK_START:
             fichaje = _crear_fichaje(employee_id, PunchType.BREAK_END, note=note)
         else:
             return jsonify({"error": "Acción de pausa no válida en este estado"}), 409
@@ -128,12 +189,12 @@ def pause_toggle():
 @jwt_required()
 def end_shift():
     employee_id = int(get_jwt_identity())
-    empleado = db.session.get(Employee, employee_id)
-    if not empleado:
+    estado = _estado_fichaje(employee_id, for_update=True)
+    if not estado:
         return jsonify({"error": "Empleado no encontrado"}), 404
 
     # Si el último fichaje es OUT muy reciente, trata como idempotente
-    ultimo_reciente = _ultimo_reciente(employee_id)
+    ultimo_reciente = _ultimo_reciente(estado)
     if ultimo_reciente and ultimo_reciente.punch_type == PunchType.OUT:
         return (
             jsonify(
@@ -142,8 +203,7 @@ def end_shift():
             200,
         )
 
-    ultimo = _ultimo_fichaje(employee_id)
-    if not ultimo or ultimo.punch_type == PunchType.OUT:
+    if estado.last_type is None or estado.last_type == PunchType.OUT:
         return jsonify({"error": "No hay turno en curso"}), 409
 
     created: list[TimePunch] = []
@@ -152,7 +212,7 @@ def end_shift():
         note = body.get("note")
 
         # Si está en pausa, cerramos la pausa antes de cerrar el turno
-        if ultimo.punch_type == PunchType.BREAK_START:
+        if estado.last_type == PunchType.BREAK_START:
             cierre = _crear_fichaje(employee_id, PunchType.BREAK_END, note=note)
             created.append(cierre)
 
@@ -166,18 +226,273 @@ def end_shift():
         return jsonify({"error": "No se pudo cerrar el turno"}), 500
 
 
+# Transiciones válidas: tipo de fichaje -> últimos tipos desde los que se permite
+TRANSICIONES_VALIDAS = {
+    PunchType.IN: (None, PunchType.OUT),
+    PunchType.BREAK_START: (PunchType.IN, PunchType.BREAK_END),
+    PunchType.BREAK_END: (PunchType.BREAK_START,),
+    PunchType.OUT: (PunchType.IN, PunchType.BREAK_START, PunchType.BREAK_END),
+}
+
+BATCH_MAX_PUNCHES = 5000
+BATCH_MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+@time_punch_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def time_punch_batch():
+    """
+    Ingesta en lote de fichajes (kioscos offline que reenvían su buffer).
+    Body: { punches: [ {employee_id, punch_type, punched_at (ISO 8601 con zona), note?}, ... ] }
+    - Solo ADMIN/HR (su empresa) u OWNERDB.
+    - Valida la máquina IN/BREAK/OUT por empleado en orden temporal, partiendo
+      de su time_punch_state; un fichaje anterior al último guardado se rechaza.
+    - Reenvíos exactos (mismo empleado, tipo e instante) se marcan como duplicate.
+    - Inserta todas las filas válidas con un único INSERT masivo.
+    Respuesta: resultado por fichaje ({index, ok, punch|error, duplicate?}).
+    """
+    if not (is_admin_or_hr() or is_ownerdb()):
+        return jsonify({"error": "Forbidden"}), 403
+    owner = is_ownerdb()
+    requester_company_id = get_jwt_company_id()
+
+    items = (request.get_json(silent=True) or {}).get("punches")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Campo requerido: punches (lista no vacía)"}), 400
+    if len(items) > BATCH_MAX_PUNCHES:
+        return (
+            jsonify({"error": f"Máximo {BATCH_MAX_PUNCHES} fichajes por lote"}),
+            400,
+        )
+
+    now = _now_utc()
+    results: list[dict | None] = [None] * len(items)
+    parsed = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[i] = {"index": i, "ok": False, "error": "Fichaje inválido"}
+            continue
+        try:
+            employee_id = int(item.get("employee_id"))
+        except (TypeError, ValueError):
+            results[i] = {"index": i, "ok": False, "error": "employee_id debe ser un entero"}
+            continue
+        try:
+            punch_type = PunchType(str(item.get("punch_type") or "").upper())
+        except ValueError:
+            results[i] = {"index": i, "ok": False, "error": "punch_type inválido"}
+            continue
+        try:
+            punched_at = datetime.fromisoformat(item.get("punched_at"))
+        except (TypeError, ValueError):
+            results[i] = {"index": i, "ok": False, "error": "punched_at inválido (ISO 8601)"}
+            continue
+        if punched_at.tzinfo is None:
+            results[i] = {"index": i, "ok": False, "error": "punched_at debe incluir zona horaria"}
+            continue
+        punched_at = punched_at.astimezone(timezone.utc)
+        if punched_at > now + BATCH_MAX_CLOCK_SKEW:
+            results[i] = {"index": i, "ok": False, "error": "punched_at en el futuro"}
+            continue
+        parsed.append((i, employee_id, punch_type, punched_at, item.get("note")))
+
+    # Autorizar a todos los empleados ANTES de leer o bloquear su estado
+    if parsed:
+        company_by_employee = dict(
+            db.session.execute(
+                db.select(Employee.id, Employee.company_id).where(
+                    Employee.id.in_({p[1] for p in parsed})
+                )
+            ).all()
+        )
+        autorizados = []
+        for p in parsed:
+            i, employee_id = p[0], p[1]
+            if employee_id not in company_by_employee:
+                results[i] = {"index": i, "ok": False, "error": "Empleado no encontrado"}
+            elif not owner and company_by_employee[employee_id] != requester_company_id:
+                results[i] = {
+                    "index": i,
+                    "ok": False,
+                    "error": "Forbidden: el empleado no pertenece a tu empresa",
+                }
+            else:
+                autorizados.append(p)
+        parsed = autorizados
+
+    employee_ids = {p[1] for p in parsed}
+    estados: dict[int, TimePunchState] = {}
+    existentes: set[tuple] = set()
+    if parsed:
+        # Estado actual de los empleados autorizados del lote (bloqueado hasta el commit)
+        estados = {
+            st.employee_id: st
+            for st in db.session.execute(
+                db.select(TimePunchState)
+                .where(TimePunchState.employee_id.in_(employee_ids))
+                .with_for_update()
+            ).scalars()
+        }
+        sin_estado = employee_ids - set(estados)
+        if sin_estado:
+            # reconstruye el estado que falte con una sola query (último fichaje por empleado)
+            ultimo_at = (
+                db.select(
+                    TimePunch.employee_id,
+                    func.max(TimePunch.punched_at).label("punched_at"),
+                )
+                .where(TimePunch.employee_id.in_(sin_estado))
+                .group_by(TimePunch.employee_id)
+                .subquery()
+            )
+            ultimos = {
+                p.employee_id: p
+                for p in db.session.execute(
+                    db.select(TimePunch).join(
+                        ultimo_at,
+                        (TimePunch.employee_id == ultimo_at.c.employee_id)
+                        & (TimePunch.punched_at == ultimo_at.c.punched_at),
+                    )
+                ).scalars()
+            }
+            for employee_id in sin_estado:
+                ultimo = ultimos.get(employee_id)
+                estados[employee_id] = TimePunchState(
+                    employee_id=employee_id,
+                    last_punch_id=ultimo.id if ultimo else None,
+                    last_type=ultimo.punch_type if ultimo else None,
+                    last_at=ultimo.punched_at if ultimo else None,
+                )
+                db.session.add(estados[employee_id])
+
+        # Fichajes ya guardados en la ventana del lote (para detectar reenvíos)
+        existentes = {
+            (employee_id, punch_type, as_utc(punched_at))
+            for employee_id, punch_type, punched_at in db.session.execute(
+                db.select(
+                    TimePunch.employee_id, TimePunch.punch_type, TimePunch.punched_at
+                ).where(
+                    TimePunch.employee_id.in_(employee_ids),
+                    TimePunch.punched_at >= min(p[3] for p in parsed),
+                    TimePunch.punched_at <= max(p[3] for p in parsed),
+                )
+            )
+        }
+
+    # Máquina de estados por empleado, en orden temporal
+    rows = []
+    row_index = []
+    last_by_employee: dict[int, tuple] = {}
+    for i, employee_id, punch_type, punched_at, note in sorted(
+        parsed, key=lambda p: (p[1], p[3], p[0])
+    ):
+        if (employee_id, punch_type, punched_at) in existentes:
+            results[i] = {"index": i, "ok": True, "duplicate": True}
+            continue
+
+        estado = estados[employee_id]
+        last_type, last_at = last_by_employee.get(
+            employee_id,
+            (
+                estado.last_type,
+                as_utc(estado.last_at) if estado.last_at else None,
+            ),
+        )
+        if last_at is not None and punched_at <= last_at:
+            results[i] = {
+                "index": i,
+                "ok": False,
+                "error": "Fichaje anterior al último registrado del empleado",
+            }
+            continue
+        if last_type not in TRANSICIONES_VALIDAS[punch_type]:
+            results[i] = {
+                "index": i,
+                "ok": False,
+                "error": f"Transición no válida: {last_type.value if last_type else 'SIN FICHAJES'} -> {punch_type.value}",
+            }
+            continue
+
+        last_by_employee[employee_id] = (punch_type, punched_at)
+        rows.append(
+            {
+                "employee_id": employee_id,
+                "punch_type": punch_type,
+                "punched_at": punched_at,
+                "note": note,
+            }
+        )
+        row_index.append(i)
+
+    try:
+        if rows:
+            ids = db.session.execute(
+                db.insert(TimePunch).returning(
+                    TimePunch.id, sort_by_parameter_order=True
+                ),
+                rows,
+            ).scalars().all()
+            # primer fichaje nuevo de cada empleado que cierra alguna sesión
+            desde_por_empleado = {}
+            con_out = set()
+            for row in rows:
+                desde_por_empleado.setdefault(row["employee_id"], row["punched_at"])
+                if row["punch_type"] == PunchType.OUT:
+                    con_out.add(row["employee_id"])
+            actualizar_rollup(
+                {e: desde for e, desde in desde_por_empleado.items() if e in con_out}
+            )
+            for punch_id, row, i in zip(ids, rows, row_index):
+                estado = estados[row["employee_id"]]
+                estado.last_punch_id = punch_id
+                estado.last_type = row["punch_type"]
+                estado.last_at = row["punched_at"]
+                results[i] = {
+                    "index": i,
+                    "ok": True,
+                    "punch": {
+                        "id": punch_id,
+                        "employee_id": row["employee_id"],
+                        "punch_type": row["punch_type"].value,
+                        "punched_at": row["punched_at"].isoformat(),
+                        "note": row["note"],
+                    },
+                }
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return jsonify({"error": "No se pudieron registrar los fichajes"}), 500
+
+    return (
+        jsonify(
+            {
+                "inserted": len(rows),
+                "duplicates": sum(1 for r in results if r and r.get("duplicate")),
+                "failed": sum(1 for r in results if r and not r["ok"]),
+                "results": results,
+            }
+        ),
+        201 if rows else 200,
+    )
+
+
 # (Opcional) estado para la UI: qué botones habilitar
 @time_punch_bp.route("/status", methods=["GET"])
 @jwt_required()
 def status():
     employee_id = int(get_jwt_identity())
-    ultimo = _ultimo_fichaje(employee_id)
+    estado_db = _estado_fichaje(employee_id)
+    last_type = estado_db.last_type if estado_db else None
+    last_at = estado_db.last_at if estado_db else None
     estado = {
-        "open": bool(ultimo and ultimo.punch_type != PunchType.OUT),
-        "paused": bool(ultimo and ultimo.punch_type == PunchType.BREAK_START),
-        "last_type": (ultimo.punch_type.value if ultimo else None),
-        "last_at": (ultimo.punched_at.isoformat() if ultimo else None),
+        "open": bool(last_type and last_type != PunchType.OUT),
+        "paused": last_type == PunchType.BREAK_START,
+        "last_type": (last_type.value if last_type else None),
+        "last_at": (last_at.isoformat() if last_at else None),
     }
+    if estado_db in db.session.new:
+        # primera consulta: persistimos el estado reconstruido
+        db.session.commit()
     return jsonify(estado), 200
 
 
@@ -186,102 +501,107 @@ def summarize_time_punches(
     date_from: date,
     date_to: date,
     tz_name: str = "Europe/Madrid",
+    include_sessions: bool = True,
 ) -> dict:
     """
-    Resume días trabajados y horas totales netas en [date_from, date_to] (ambos inclusive).
-    - Cuenta un 'día trabajado' cuando hay una sesión completa IN→OUT.
-    - Resta todos los intervalos de BREAK_START→BREAK_END.
-    - Asigna la sesión al día local del IN (aunque cruce medianoche).
+    Resume días trabajados y horas totales netas en [date_from, date_to] (ambos inclusive)
+    para UN empleado. Ver resumir_sesiones para las reglas de cálculo.
+    Rangos largos sin detalle por sesión (ver usa_rollup) se leen de daily_work_summary,
+    con la misma respuesta.
     """
+    if usa_rollup(date_from, date_to, tz_name, include_sessions):
+        rows = db.session.execute(
+            db.select(DailyWorkSummary)
+            .where(
+                DailyWorkSummary.employee_id == employee_id,
+                DailyWorkSummary.date >= date_from,
+                DailyWorkSummary.date <= date_to,
+            )
+            .order_by(DailyWorkSummary.date.asc())
+        ).scalars()
+        return resumir_rollup(rows)
+
     tz = ZoneInfo(tz_name)
+    start_utc, end_utc = ventana_fichajes(date_from, date_to, tz)
+
+    rows = db.session.execute(
+        db.select(TimePunch.punch_type, TimePunch.punched_at)
+        .where(
+            TimePunch.employee_id == employee_id,
+            TimePunch.punched_at >= start_utc,
+            TimePunch.punched_at < end_utc,
+        )
+        .order_by(TimePunch.punched_at.asc())
+    ).all()
 
-    # Ventana local [00:00 del from, 00:00 del día siguiente a to) → convertida a UTC
-    start_local = datetime.combine(date_from, time(0, 0), tzinfo=tz)
-    end_local = datetime.combine(date_to + timedelta(days=1), time(0, 0), tzinfo=tz)
-    start_utc = start_local.astimezone(timezone.utc)
-    end_utc = end_local.astimezone(timezone.utc)
+    return resumir_sesiones(rows, tz, include_sessions, hasta=date_to)
 
-    punches = (
-        db.session.execute(
-            db.select(TimePunch)
-            .where(
-                TimePunch.employee_id == employee_id,
+
+def summarize_company_time_punches(
+    company_id: int,
+    date_from: date,
+    date_to: date,
+    tz_name: str = "Europe/Madrid",
+    include_sessions: bool = True,
+) -> list[dict]:
+    """
+    Igual que summarize_time_punches pero para TODOS los empleados de la empresa
+    con una sola query ordenada por (employee_id, punched_at). Las filas se leen
+    en streaming y se agrupan por empleado sobre la marcha, sin cargar todos los
+    fichajes en memoria. Los empleados sin fichajes salen con totales a cero.
+    Rangos largos sin detalle por sesión (ver usa_rollup) se leen de daily_work_summary.
+    """
+    if usa_rollup(date_from, date_to, tz_name, include_sessions):
+        result = db.session.execute(
+            db.select(Employee.id, DailyWorkSummary)
+            .outerjoin(
+                DailyWorkSummary,
+                db.and_(
+                    DailyWorkSummary.employee_id == Employee.id,
+                    DailyWorkSummary.date >= date_from,
+                    DailyWorkSummary.date <= date_to,
+                ),
+            )
+            .where(Employee.company_id == company_id)
+            .order_by(Employee.id.asc(), DailyWorkSummary.date.asc())
+        )
+        summaries = []
+        for employee_id, rows in groupby(result, key=itemgetter(0)):
+            data = resumir_rollup(row for _, row in rows if row is not None)
+            data["employee_id"] = employee_id
+            summaries.append(data)
+        return summaries
+
+    tz = ZoneInfo(tz_name)
+    start_utc, end_utc = ventana_fichajes(date_from, date_to, tz)
+
+    # LEFT JOIN con la ventana en el ON: así cada empleado aparece al menos una vez
+    result = db.session.execute(
+        db.select(Employee.id, TimePunch.punch_type, TimePunch.punched_at)
+        .outerjoin(
+            TimePunch,
+            db.and_(
+                TimePunch.employee_id == Employee.id,
                 TimePunch.punched_at >= start_utc,
                 TimePunch.punched_at < end_utc,
-            )
-            .order_by(TimePunch.punched_at.asc())
+            ),
         )
-        .scalars()
-        .all()
+        .where(Employee.company_id == company_id)
+        .order_by(Employee.id.asc(), TimePunch.punched_at.asc())
+        .execution_options(yield_per=1000)
     )
 
-    sessions: list[dict] = []
-    current_in: datetime | None = None
-    current_break_start: datetime | None = None
-    total_break: timedelta = timedelta(0)
-
-    for p in punches:
-        if p.punch_type == PunchType.IN:
-            # Si había un IN colgado sin OUT anterior, lo descartamos empezando una nueva sesión
-            current_in = p.punched_at
-            current_break_start = None
-            total_break = timedelta(0)
-
-        elif p.punch_type == PunchType.BREAK_START:
-            if current_in is not None and current_break_start is None:
-                current_break_start = p.punched_at
-
-        elif p.punch_type == PunchType.BREAK_END:
-            if current_in is not None and current_break_start is not None:
-                if p.punched_at > current_break_start:
-                    total_break += p.punched_at - current_break_start
-                current_break_start = None
-
-        elif p.punch_type == PunchType.OUT:
-            if current_in is not None:
-                # Si hay una pausa abierta, la cerramos al momento del OUT
-                if (
-                    current_break_start is not None
-                    and p.punched_at > current_break_start
-                ):
-                    total_break += p.punched_at - current_break_start
-                    current_break_start = None
-
-                gross = p.punched_at - current_in
-                net = gross - total_break
-                if net.total_seconds() > 0:
-                    in_local = current_in.astimezone(tz)
-                    out_local = p.punched_at.astimezone(tz)
-                    sessions.append(
-                        {
-                            "date": in_local.date().isoformat(),
-                            "in": in_local.isoformat(),
-                            "out": out_local.isoformat(),
-                            "gross_seconds": int(gross.total_seconds()),
-                            "break_seconds": int(total_break.total_seconds()),
-                            "net_seconds": int(net.total_seconds()),
-                        }
-                    )
-
-                # Reset para la siguiente sesión
-                current_in = None
-                current_break_start = None
-                total_break = timedelta(0)
-
-    days_worked = len(sessions)
-    total_seconds = sum(s["net_seconds"] for s in sessions)
-    total_hours = round(total_seconds / 3600, 2)
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    human_total = f"{hours}h {minutes}m"
-
-    return {
-        "days_worked": days_worked,
-        "total_seconds": total_seconds,
-        "total_hours": total_hours,  # número decimal (2 decimales)
-        "human_total": human_total,  # "Xh Ym"
-        "sessions": sessions,  # detalle por sesión
-    }
+    summaries = []
+    for employee_id, rows in groupby(result, key=itemgetter(0)):
+        punches = (
+            (punch_type, punched_at)
+            for _, punch_type, punched_at in rows
+            if punch_type is not None
+        )
+        data = resumir_sesiones(punches, tz, include_sessions, hasta=date_to)
+        data["employee_id"] = employee_id
+        summaries.append(data)
+    return summaries
 
 
 @time_punch_bp.route("/summary", methods=["GET"])
@@ -302,7 +622,7 @@ def time_punch_summary():
         except (TypeError, ValueError):
             return jsonify({"error": "employee_id debe ser un entero"}), 400
 
-        employee_target = db.session.get(Employee, requested_employee_id)
+        employee_target = employee_loader().get(requested_employee_id)
         if not employee_target:
             return jsonify({"error": "Empleado no encontrado"}), 404
 
@@ -325,6 +645,7 @@ def time_punch_summary():
     date_from_str = request.args.get("from")  # 'YYYY-MM-DD'
     date_to_str = request.args.get("to")  # 'YYYY-MM-DD'
     tz_name = request.args.get("tz", "Europe/Madrid")
+    include_sessions = request.args.get("sessions", "1") not in ("0", "false")
 
     if not date_from_str or not date_to_str:
         return (
@@ -341,12 +662,73 @@ def time_punch_summary():
     if date_from > date_to:
         return jsonify({"error": "'from' no puede ser mayor que 'to'."}), 400
 
-    data = summarize_time_punches(target_employee_id, date_from, date_to, tz_name)
+    data = summarize_time_punches(
+        target_employee_id, date_from, date_to, tz_name, include_sessions
+    )
     # Si quieres, añade el empleado objetivo en la respuesta:
     data["employee_id"] = target_employee_id
     return jsonify(data), 200
 
 
+@time_punch_bp.route("/summary/company", methods=["GET"])
+@jwt_required()
+def time_punch_company_summary():
+    """
+    GET /api/time-punch/summary/company?from=YYYY-MM-DD&to=YYYY-MM-DD&tz=&sessions=0|1&company_id=
+    Totales por empleado de toda la empresa en una sola query.
+    ADMIN/HR: su empresa. OWNERDB: company_id obligatorio.
+    sessions=0 omite el detalle por sesión para aligerar la respuesta.
+    """
+    if is_ownerdb():
+        try:
+            company_id = int(request.args.get("company_id"))
+        except (TypeError, ValueError):
+            return jsonify({"error": "company_id debe ser entero"}), 400
+    else:
+        if not is_admin_or_hr():
+            return jsonify({"error": "Forbidden"}), 403
+        company_id = get_jwt_company_id()
+        if company_id is None:
+            return jsonify({"error": "Unauthorized"}), 401
+
+    date_from_str = request.args.get("from")  # 'YYYY-MM-DD'
+    date_to_str = request.args.get("to")  # 'YYYY-MM-DD'
+    tz_name = request.args.get("tz", "Europe/Madrid")
+    include_sessions = request.args.get("sessions", "1") not in ("0", "false")
+
+    if not date_from_str or not date_to_str:
+        return (
+            jsonify({"error": "Params 'from' y 'to' son requeridos (YYYY-MM-DD)."}),
+            400,
+        )
+
+    try:
+        date_from = date.fromisoformat(date_from_str)
+        date_to = date.fromisoformat(date_to_str)
+    except ValueError:
+        return jsonify({"error": "Formato de fecha inválido. Usa YYYY-MM-DD."}), 400
+
+    if date_from > date_to:
+        return jsonify({"error": "'from' no puede ser mayor que 'to'."}), 400
+
+    employees = summarize_company_time_punches(
+        company_id, date_from, date_to, tz_name, include_sessions
+    )
+    return (
+        jsonify(
+            {
+                "company_id": company_id,
+                "from": date_from.isoformat(),
+                "to": date_to.isoformat(),
+                "tz": tz_name,
+                "total_seconds": sum(e["total_seconds"] for e in employees),
+                "employees": employees,
+            }
+        ),
+        200,
+    )
+
+
 @time_punch_bp.route("/list", methods=["GET"])
 @jwt_required()
 def time_punch_list():
@@ -385,7 +767,7 @@ def time_punch_list():
             requested_employee_id = int(requested_employee_id_param)
         except (TypeError, ValueError):
             return jsonify({"error": "employee_id debe ser un entero"}), 400
-        employee_target = db.session.get(Employee, requested_employee_id)
+        employee_target = employee_loader().get(requested_employee_id)
         if not employee_target:
             return jsonify({"error": "Empleado no encontrado"}), 404
         if not is_ownerdb():
@@ -441,3 +823,180 @@ def time_punch_list():
         jsonify({"employee_id": target_employee_id, "tz": tz_name, "punches": result}),
         200,
     )
+
+
+EXPORT_BATCH_SIZE = 1000  # filas por lote del cursor y por bloque enviado
+EXPORT_COLUMNS = [
+    "id",
+    "employee_id",
+    "punch_type",
+    "punched_at_utc",
+    "punched_at_local",
+    "note",
+]
+# Texto libre que una hoja de cálculo interpretaría como fórmula (inyección CSV)
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _celda_csv(valor):
+    if isinstance(valor, str) and valor.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + valor
+    return valor
+
+
+@time_punch_bp.route("/export", methods=["GET"])
+@jwt_required()
+def time_punch_export():
+    """
+    GET /api/time-punch/export?from=YYYY-MM-DD&to=YYYY-MM-DD&format=csv|ndjson&tz=&employee_id=&company_id=
+    Exporta fichajes crudos en streaming (CSV o NDJSON), leyendo la BD por lotes
+    (yield_per) para que la memoria no dependa del tamaño del rango.
+    - Empleado: solo los suyos.
+    - ADMIN/HR: ?employee_id= de su empresa, o toda su empresa si no se indica.
+    - OWNERDB: ?employee_id= o ?company_id= obligatorio.
+    """
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "format debe ser 'csv' o 'ndjson'"}), 400
+
+    tz_name = request.args.get("tz", "Europe/Madrid")
+    date_from_str = request.args.get("from")  # 'YYYY-MM-DD'
+    date_to_str = request.args.get("to")  # 'YYYY-MM-DD'
+
+    if not date_from_str or not date_to_str:
+        return (
+            jsonify({"error": "Params 'from' y 'to' son requeridos (YYYY-MM-DD)."}),
+            400,
+        )
+
+    try:
+        date_from = date.fromisoformat(date_from_str)
+        date_to = date.fromisoformat(date_to_str)
+    except ValueError:
+        return jsonify({"error": "Formato de fecha inválido. Usa YYYY-MM-DD."}), 400
+
+    if date_from > date_to:
+        return jsonify({"error": "'from' no puede ser mayor que 'to'."}), 400
+
+    try:
+        tz = ZoneInfo(tz_name)
+    except Exception:
+        return jsonify({"error": "tz inválida"}), 400
+
+    # Alcance: un empleado o toda una empresa
+    target_employee_id = None
+    target_company_id = None
+    requested_employee_id_param = request.args.get("employee_id")
+    owner = is_ownerdb()
+
+    if requested_employee_id_param is not None:
+        if not (is_admin_or_hr() or owner):
+            return jsonify({"error": "Forbidden"}), 403
+        try:
+            requested_employee_id = int(requested_employee_id_param)
+        except (TypeError, ValueError):
+            return jsonify({"error": "employee_id debe ser un entero"}), 400
+        employee_target = employee_loader().get(requested_employee_id)
+        if not employee_target:
+            return jsonify({"error": "Empleado no encontrado"}), 404
+        if not owner:
+            requester_company_id = get_jwt_company_id()
+            if (
+                requester_company_id is None
+                or employee_target.company_id != requester_company_id
+            ):
+                return (
+                    jsonify(
+                        {"error": "Forbidden: el empleado no pertenece a tu empresa"}
+                    ),
+                    403,
+                )
+        target_employee_id = requested_employee_id
+    elif owner:
+        try:
+            target_company_id = int(request.args.get("company_id"))
+        except (TypeError, ValueError):
+            return jsonify({"error": "employee_id o company_id requerido"}), 400
+    elif is_admin_or_hr():
+        target_company_id = get_jwt_company_id()
+        if target_company_id is None:
+            return jsonify({"error": "Unauthorized"}), 401
+    else:
+        target_employee_id = int(get_jwt_identity())
+
+    start_utc, end_utc = ventana_utc(date_from, date_to, tz)
+
+    q = db.select(
+        TimePunch.id,
+        TimePunch.employee_id,
+        TimePunch.punch_type,
+        TimePunch.punched_at,
+        TimePunch.note,
+    ).where(
+        TimePunch.punched_at >= start_utc,
+        TimePunch.punched_at < end_utc,
+    )
+    if target_employee_id is not None:
+        q = q.where(TimePunch.employee_id == target_employee_id)
+    else:
+        q = q.join(Employee, Employee.id == TimePunch.employee_id).where(
+            Employee.company_id == target_company_id
+        )
+    q = q.order_by(TimePunch.employee_id.asc(), TimePunch.punched_at.asc()).execution_options(
+        yield_per=EXPORT_BATCH_SIZE
+    )
+
+    def filas():
+        for punch_id, employee_id, punch_type, punched_at, note in db.session.execute(q):
+            punched_at = as_utc(punched_at)
+            yield {
+                "id": punch_id,
+                "employee_id": employee_id,
+                "punch_type": punch_type.value,
+                "punched_at_utc": punched_at.astimezone(timezone.utc).isoformat(),
+                "punched_at_local": punched_at.astimezone(tz).isoformat(),
+                "note": note,
+            }
+
+    def generar_csv():
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        pendientes = 0
+        for fila in filas():
+            fila["note"] = _celda_csv(fila["note"])
+            writer.writerow(fila)
+            pendientes += 1
+            if pendientes >= EXPORT_BATCH_SIZE:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate(0)
+                pendientes = 0
+        yield buf.getvalue()
+
+    def generar_ndjson():
+        bloque = []
+        for fila in filas():
+            bloque.append(json.dumps(fila, ensure_ascii=False))
+            if len(bloque) >= EXPORT_BATCH_SIZE:
+                yield "\n".join(bloque) + "\n"
+                bloque = []
+        if bloque:
+            yield "\n".join(bloque) + "\n"
+
+    alcance = (
+        f"employee-{target_employee_id}"
+        if target_employee_id is not None
+        else f"company-{target_company_id}"
+    )
+    filename = f"time-punches_{alcance}_{date_from.isoformat()}_{date_to.isoformat()}.{fmt}"
+    if fmt == "csv":
+        body, mimetype = generar_csv(), "text/csv"
+    else:
+        body, mimetype = generar_ndjson(), "application/x-ndjson"
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
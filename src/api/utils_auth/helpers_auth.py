@@ -1,19 +1,21 @@
+from typing import NamedTuple
+from flask import g
 from flask_jwt_extended import get_jwt, get_jwt_identity
-from api.models import db, Employee
+from api.models import Employee
+from api.utils_auth.utils_loaders import employee_loader
 
 
-def get_system_role() -> str:
+SYSTEM_ROLES = {"OWNERDB", "ADMIN", "HR", "EMPLOYEE"}
 
-    claims = get_jwt()
-    system_role_claim = (claims.get("system_role") or "").upper()
-    if system_role_claim in {"OWNERDB", "ADMIN", "HR", "EMPLOYEE"}:
-        return system_role_claim
 
-    try:
-        employee = db.session.get(Employee, int(get_jwt_identity()))
-    except (TypeError, ValueError):
-        employee = None
+class Principal(NamedTuple):
+    employee_id: int | None
+    company_id: int | None
+    system_role: str
 
+
+def system_role_for(employee: Employee | None) -> str:
+    """Normaliza el nombre del rol del empleado a OWNERDB / ADMIN / HR / EMPLOYEE."""
     role_name = (employee.role.name if employee and employee.role else "") or ""
     role_lower = role_name.strip().lower()
     role_norm = role_lower.replace("-", "").replace("_", "").replace(" ", "")
@@ -26,6 +28,54 @@ def get_system_role() -> str:
     return "EMPLOYEE"
 
 
+def build_claims(employee: Employee) -> dict:
+    """Claims normalizados que llevan TODOS los tokens (login y refresh)."""
+    return {
+        "company_id": employee.company_id,
+        "system_role": system_role_for(employee),
+    }
+
+
+def current_principal() -> Principal:
+    """
+    Identidad del request actual, construida UNA vez por request desde los claims
+    del JWT. Solo si faltan claims (tokens antiguos) se consulta la BD, con una
+    única query (empleado + rol). Se memoiza en flask.g ligada al jti del token.
+    """
+    claims = get_jwt()
+    cached = g.get("_principal")
+    if cached is not None and cached[0] == claims.get("jti"):
+        return cached[1]
+
+    try:
+        employee_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        employee_id = None
+
+    system_role = (claims.get("system_role") or "").upper()
+    try:
+        company_id = (
+            int(claims["company_id"]) if claims.get("company_id") is not None else None
+        )
+    except (TypeError, ValueError):
+        company_id = None
+
+    if system_role not in SYSTEM_ROLES or company_id is None:
+        employee = employee_loader().get(employee_id)
+        if system_role not in SYSTEM_ROLES:
+            system_role = system_role_for(employee)
+        if company_id is None and employee is not None:
+            company_id = employee.company_id
+
+    principal = Principal(employee_id, company_id, system_role)
+    g._principal = (claims.get("jti"), principal)
+    return principal
+
+
+def get_system_role() -> str:
+    return current_principal().system_role
+
+
 def is_admin_or_hr() -> bool:
     return get_system_role() in {"OWNERDB", "ADMIN", "HR"}
 
@@ -39,17 +89,4 @@ def current_employee_id() -> int:
 
 
 def get_jwt_company_id() -> int | None:
-
-    claims = get_jwt()
-    company_id_claim = claims.get("company_id")
-    if company_id_claim is not None:
-        try:
-            return int(company_id_claim)
-        except (TypeError, ValueError):
-            pass
-
-    try:
-        employee = db.session.get(Employee, int(get_jwt_identity()))
-        return employee.company_id if employee else None
-    except (TypeError, ValueError):
-        return None
+    return current_principal().company_id
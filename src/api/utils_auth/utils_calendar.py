@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+from datetime import date
+from sqlalchemy import or_
+from api.models import db, Company, PublicHoliday
+from api.utils_auth.utils_vacations import business_days
+
+
+# Calendario de festivos por (empresa, año): tupla ORDENADA de las fechas festivas que caen
+# en L-V (nacionales + las de la región de la empresa + las propias de la empresa).
+# Se carga con una query la primera vez y se cachea en memoria del proceso; las rutas que
+# editan festivos o la región de la empresa invalidan, y el TTL acota lo que tarda en verse
+# un cambio hecho desde otro worker.
+PUBLIC_HOLIDAYS_CACHE_TTL = int(os.getenv("PUBLIC_HOLIDAYS_CACHE_TTL", 300))
+
+_lock = threading.Lock()
+_calendars: dict[tuple[int | None, int], tuple[float, tuple[date, ...]]] = {}
+
+
+def applicable_to(company_id: int | None):
+    """Condición de los festivos que aplican a una empresa (None = solo nacionales)."""
+    national = PublicHoliday.company_id.is_(None) & PublicHoliday.region.is_(None)
+    if company_id is None:
+        return national
+    region = db.select(Company.region).where(Company.id == company_id).scalar_subquery()
+    regional = PublicHoliday.company_id.is_(None) & (PublicHoliday.region == region)
+    return or_(national, regional, PublicHoliday.company_id == company_id)
+
+
+def holiday_calendar(company_id: int | None, year: int) -> tuple[date, ...]:
+    key = (company_id, year)
+    now = time.monotonic()
+    with _lock:
+        hit = _calendars.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+
+    dates = db.session.execute(
+        db.select(PublicHoliday.date)
+        .distinct()
+        .where(
+            applicable_to(company_id),
+            PublicHoliday.date >= date(year, 1, 1),
+            PublicHoliday.date <= date(year, 12, 31),
+        )
+        .order_by(PublicHoliday.date)
+    ).scalars()
+    # los festivos en fin de semana no restan: ya no cuentan como laborables
+    calendar = tuple(d for d in dates if d.weekday() < 5)
+    with _lock:
+        _calendars[key] = (now + PUBLIC_HOLIDAYS_CACHE_TTL, calendar)
+    return calendar
+
+
+def company_business_days(company_id: int | None, start: date, end: date) -> int:
+    """Días laborables de la empresa en [start, end]: L-V menos sus festivos."""
+    if not start or not end or end < start:
+        return 0
+    if start.year == end.year:
+        return business_days(start, end, holiday_calendar(company_id, start.year))
+    total = 0
+    for year in range(start.year, end.year + 1):
+        total += business_days(
+            max(start, date(year, 1, 1)),
+            min(end, date(year, 12, 31)),
+            holiday_calendar(company_id, year),
+        )
+    return total
+
+
+def invalidate_calendar(company_id: int | None = None) -> None:
+    """Olvida el calendario de una empresa, o todos (festivos nacionales/regionales)."""
+    with _lock:
+        if company_id is None:
+            _calendars.clear()
+        else:
+            for key in [k for k in _calendars if k[0] == company_id]:
+                del _calendars[key]
@@ -0,0 +1,88 @@
+from flask import g
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload
+from api.models import db, Employee, Role, Company
+
+
+class EntityLoader:
+    """
+    Cargador por request (estilo dataloader) para entidades que se buscan por id
+    muchas veces en un mismo handler: requester, empleado objetivo, rol, empresa...
+    - prime(*ids) apunta ids que se van a necesitar.
+    - get(id) / get_many(ids) resuelven primero desde el identity map de la sesión
+      y cargan TODOS los ids pendientes que falten con una sola query IN.
+    """
+
+    def __init__(self, model, options=()):
+        self.model = model
+        self.options = list(options)
+        self.pending: set[int] = set()
+        # referencias fuertes: el identity map de la sesión es débil y soltaría
+        # los objetos precargados que nadie ha pedido todavía
+        self.loaded: dict[int, object] = {}
+
+    def prime(self, *ids) -> "EntityLoader":
+        self.pending.update(int(i) for i in ids if i is not None)
+        return self
+
+    def _cached(self, id_):
+        obj = self.loaded.get(id_) or db.session.identity_map.get(
+            db.session.identity_key(self.model, id_)
+        )
+        if obj is None:
+            return None
+        state = inspect(obj)
+        # tras un commit los objetos quedan expirados: leerlos volvería a consultar la BD
+        if state.detached or state.was_deleted or state.expired_attributes:
+            return None
+        return obj
+
+    def get_many(self, ids) -> dict:
+        ids = {int(i) for i in ids if i is not None}
+        found = {}
+        for id_ in ids | self.pending:
+            obj = self._cached(id_)
+            if obj is not None:
+                found[id_] = obj
+        missing = (ids | self.pending) - found.keys()
+        self.pending.clear()
+        if missing:
+            pk = inspect(self.model).primary_key[0]
+            for obj in db.session.execute(
+                db.select(self.model).where(pk.in_(missing)).options(*self.options)
+            ).unique().scalars():
+                found[obj.id] = obj
+        self.loaded.update(found)
+        return {id_: found[id_] for id_ in ids if id_ in found}
+
+    def get(self, id_):
+        try:
+            id_ = int(id_)
+        except (TypeError, ValueError):
+            return None
+        obj = self._cached(id_)
+        if obj is not None:
+            return obj
+        return self.get_many([id_]).get(id_)
+
+
+def _loader(name: str, model, options=()) -> EntityLoader:
+    loaders = g.setdefault("_entity_loaders", {})
+    if name not in loaders:
+        loaders[name] = EntityLoader(model, options)
+    return loaders[name]
+
+
+def employee_loader() -> EntityLoader:
+    # rol y empresa en la misma query: los usan los helpers de auth y serialize()
+    return _loader(
+        "employee", Employee, [joinedload(Employee.role), joinedload(Employee.company)]
+    )
+
+
+def role_loader() -> EntityLoader:
+    return _loader("role", Role)
+
+
+def company_loader() -> EntityLoader:
+    return _loader("company", Company)
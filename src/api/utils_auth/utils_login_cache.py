@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from sqlalchemy.orm import joinedload
+from api.models import db, Employee
+from api.utils_auth.helpers_auth import build_claims
+
+
+# Caché en memoria (por proceso) de las credenciales que necesita el login, indexada por email.
+# Desactivada por defecto: LOGIN_CACHE_TTL=segundos la activa. Las rutas que cambian
+# email, contraseña, rol, empresa o imagen invalidan la entrada en su proceso; el TTL
+# acota lo que puede tardar en verse un cambio hecho desde otro worker o desde /admin.
+LOGIN_CACHE_TTL = int(os.getenv("LOGIN_CACHE_TTL", 0))
+LOGIN_CACHE_SIZE = int(os.getenv("LOGIN_CACHE_SIZE", 10000))
+
+
+class LoginRecord(NamedTuple):
+    employee_id: int
+    password_hash: str
+    claims: dict  # company_id + system_role ya normalizado (build_claims)
+    user: dict  # Employee.serialize() que devuelve el login
+
+
+_lock = threading.Lock()
+_by_email: "OrderedDict[str, tuple[float, LoginRecord]]" = OrderedDict()
+_email_by_id: dict[int, str] = {}
+
+
+def login_cache_enabled() -> bool:
+    return LOGIN_CACHE_TTL > 0
+
+
+def _load(email: str) -> LoginRecord | None:
+    employee = db.session.execute(
+        db.select(Employee)
+        .where(Employee.email == email)
+        .options(joinedload(Employee.role), joinedload(Employee.company))
+    ).scalar_one_or_none()
+    if employee is None:
+        return None
+    return LoginRecord(
+        employee.id, employee.password_hash, build_claims(employee), employee.serialize()
+    )
+
+
+def get_login_record(email: str) -> LoginRecord | None:
+    """Credenciales para el login: una entrada de caché o, si falta, una query (empleado+rol+empresa)."""
+    if not login_cache_enabled():
+        return _load(email)
+
+    now = time.monotonic()
+    with _lock:
+        hit = _by_email.get(email)
+        if hit is not None and hit[0] > now:
+            _by_email.move_to_end(email)
+            return hit[1]
+
+    record = _load(email)
+    if record is None:
+        # los emails inexistentes no se cachean: no deben desplazar a los reales
+        return None
+    with _lock:
+        _by_email[email] = (now + LOGIN_CACHE_TTL, record)
+        _by_email.move_to_end(email)
+        _email_by_id[record.employee_id] = email
+        while len(_by_email) > LOGIN_CACHE_SIZE:
+            _, (_, old) = _by_email.popitem(last=False)
+            _email_by_id.pop(old.employee_id, None)
+    return record
+
+
+def invalidate_login(employee_id: int | None = None, email: str | None = None) -> None:
+    """Olvida la entrada de un empleado (por id y/o email). Llamar tras el commit."""
+    with _lock:
+        if employee_id is not None:
+            cached_email = _email_by_id.pop(employee_id, None)
+            if cached_email is not None:
+                _by_email.pop(cached_email, None)
+        if email is not None:
+            hit = _by_email.pop(email, None)
+            if hit is not None:
+                _email_by_id.pop(hit[1].employee_id, None)
+
+
+def clear_login_cache() -> None:
+    """Para cambios que afectan a muchos empleados (rol o empresa renombrados/borrados)."""
+    with _lock:
+        _by_email.clear()
+        _email_by_id.clear()
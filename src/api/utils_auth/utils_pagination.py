@@ -0,0 +1,103 @@
+import base64
+import json
+from flask import jsonify, request
+from sqlalchemy import tuple_
+from api.models import db
+
+
+# Paginación por cursor (keyset) compartida por los listados.
+# Se activa al pasar ?limit= o ?cursor=; sin esos parámetros los endpoints
+# mantienen la respuesta clásica (lista completa) por compatibilidad con el front.
+# El cursor es opaco para el cliente: codifica los valores de las columnas de
+# orden de la última fila devuelta, así que cada página es un
+# "WHERE (cols) > (últimos valores) ORDER BY cols LIMIT n" y las páginas profundas
+# cuestan lo mismo que la primera (sin OFFSET).
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def pagination_requested() -> bool:
+    return "limit" in request.args or "cursor" in request.args
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: list) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("cursor inválido")
+    if not isinstance(values, list) or len(values) != len(order_by):
+        raise ValueError("cursor inválido")
+    # cada valor debe ser del tipo de su columna: PostgreSQL no compara id > 'a' (500)
+    for value, column in zip(values, order_by):
+        if type(value) is not column.type.python_type:
+            raise ValueError("cursor inválido")
+    return values
+
+
+def keyset_page(stmt, order_by: list, descending: bool = False, serializer=None) -> dict:
+    """
+    Ejecuta stmt paginado por keyset y devuelve
+    {"items", "next_cursor", "limit"[, "total"]}.
+    - order_by: columnas de orden estable; la última debe ser única (normalmente el id)
+      y todas deben ser de tipos JSON-serializables (int/str).
+    - descending: mismo sentido para todas las columnas.
+    - ?with_total=1 añade el COUNT(*) del listado completo (query extra opcional).
+    Lanza ValueError si limit o cursor no son válidos.
+    """
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        raise ValueError("limit debe ser un entero")
+    limit = max(1, min(limit, MAX_LIMIT))
+    serializer = serializer or (lambda obj: obj.serialize())
+
+    total = None
+    if request.args.get("with_total") in ("1", "true"):
+        total = db.session.execute(
+            db.select(db.func.count()).select_from(stmt.order_by(None).subquery())
+        ).scalar_one()
+
+    cursor = request.args.get("cursor")
+    key = tuple_(*order_by) if len(order_by) > 1 else order_by[0]
+    if cursor:
+        values = decode_cursor(cursor, order_by)
+        last = tuple_(*values) if len(values) > 1 else values[0]
+        stmt = stmt.where(key < last if descending else key > last)
+
+    ordering = [c.desc() if descending else c.asc() for c in order_by]
+    # pedimos una fila de más para saber si hay página siguiente
+    rows = (
+        db.session.execute(stmt.order_by(None).order_by(*ordering).limit(limit + 1))
+        .scalars()
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(getattr(rows[-1], c.key) for c in order_by)
+
+    page = {
+        "items": [serializer(obj) for obj in rows],
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }
+    if total is not None:
+        page["total"] = total
+    return page
+
+
+def paginated_response(stmt, order_by: list, descending: bool = False, serializer=None):
+    """Atajo para endpoints: keyset_page → (jsonify, status), con 400 si los params son inválidos."""
+    try:
+        page = keyset_page(stmt, order_by, descending, serializer)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    return jsonify(page), 200
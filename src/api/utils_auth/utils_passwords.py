@@ -0,0 +1,59 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask_bcrypt import generate_password_hash, check_password_hash
+
+
+# Coste de bcrypt (log2 de las iteraciones). 12 es el valor por defecto de flask-bcrypt;
+# cada +1 duplica el tiempo de hash. Los hashes con otro coste se rehacen en el login.
+BCRYPT_LOG_ROUNDS = min(max(int(os.getenv("BCRYPT_LOG_ROUNDS", 12)), 4), 31)
+# Verificaciones bcrypt simultáneas por proceso, SOLO para workers con hilos
+# (gunicorn --worker-class gthread --threads N): bcrypt libera el GIL mientras calcula,
+# el resto de peticiones siguen atendiéndose y una tormenta de logins no ocupa más de
+# N núcleos. Con los workers sync por defecto (Procfile, render.yaml) cada proceso
+# atiende una petición a la vez y el pool solo añadiría un salto de hilo.
+# 0 (por defecto) = verificar en el propio hilo.
+PASSWORD_VERIFY_WORKERS = int(os.getenv("PASSWORD_VERIFY_WORKERS", 0))
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def hash_password(password: str) -> str:
+    return generate_password_hash(password, BCRYPT_LOG_ROUNDS).decode("utf-8")
+
+
+def hash_rounds(pw_hash: str | None) -> int | None:
+    """Coste de un hash bcrypt ("$2b$12$..." → 12); None si no es bcrypt."""
+    parts = (pw_hash or "").split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(pw_hash: str | None) -> bool:
+    return hash_rounds(pw_hash) != BCRYPT_LOG_ROUNDS
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=PASSWORD_VERIFY_WORKERS, thread_name_prefix="bcrypt"
+                )
+    return _executor
+
+
+def verify_password(pw_hash: str | None, password: str) -> bool:
+    """Comprueba la contraseña en el pool acotado (o en línea si está desactivado)."""
+    if not pw_hash or not password:
+        return False
+    try:
+        if PASSWORD_VERIFY_WORKERS <= 0:
+            return check_password_hash(pw_hash, password)
+        return _pool().submit(check_password_hash, pw_hash, password).result()
+    except ValueError:
+        # hash corrupto o sin formato bcrypt
+        return False
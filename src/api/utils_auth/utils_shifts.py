@@ -0,0 +1,202 @@
+import os
+from datetime import date, datetime, timedelta, timezone
+from api.models import (
+    db,
+    ShiftSeries,
+    ShiftException,
+    ShiftOccurrence,
+    ShiftOccurrenceWindow,
+)
+
+
+# Materialización opcional de ocurrencias de series en la tabla shift_occurrence.
+# Activar con SHIFT_OCCURRENCES_ENABLED=1 y ejecutar a diario `flask refresh-shift-occurrences`
+# para que el horizonte [hoy - PAST_DAYS, hoy + FUTURE_DAYS] vaya avanzando.
+# Las lecturas solo usan la tabla dentro de la ventana que ese comando dejó
+# materializada (shift_occurrence_window); fuera de ella, o antes del primer
+# refresco, expanden las series al vuelo.
+OCCURRENCES_PAST_DAYS = int(os.getenv("SHIFT_OCCURRENCES_PAST_DAYS", 31))
+OCCURRENCES_FUTURE_DAYS = int(os.getenv("SHIFT_OCCURRENCES_FUTURE_DAYS", 365))
+
+
+def occurrences_enabled() -> bool:
+    return os.getenv("SHIFT_OCCURRENCES_ENABLED") == "1"
+
+
+def occurrence_horizon(today: date | None = None) -> tuple[date, date]:
+    today = today or date.today()
+    return (
+        today - timedelta(days=OCCURRENCES_PAST_DAYS),
+        today + timedelta(days=OCCURRENCES_FUTURE_DAYS),
+    )
+
+
+def materialized_window() -> tuple[date, date] | None:
+    """[from, to] materializado por el último `refresh-shift-occurrences`, o None."""
+    window = db.session.get(ShiftOccurrenceWindow, 1)
+    if window is None:
+        return None
+    return window.from_date, window.to_date
+
+
+def set_materialized_window(d_from: date, d_to: date) -> None:
+    """Lo llama el refresco completo al acabar, en la misma transacción que la purga."""
+    window = db.session.get(ShiftOccurrenceWindow, 1)
+    if window is None:
+        window = ShiftOccurrenceWindow(id=1)
+        db.session.add(window)
+    window.from_date = d_from
+    window.to_date = d_to
+    window.refreshed_at = datetime.now(timezone.utc)
+
+
+def covers_horizon(d_from: date, d_to: date) -> bool:
+    if not occurrences_enabled():
+        return False
+    window = materialized_window()
+    return window is not None and window[0] <= d_from and d_to <= window[1]
+
+
+def weeks_between(monday0: date, d: date) -> int:
+    # semanas enteras entre (alineando a lunes)
+    base = monday0 - timedelta(days=monday0.weekday())  # lunes de la semana de monday0
+    curr = d - timedelta(days=d.weekday())  # lunes de la semana de d
+    return (curr - base).days // 7
+
+
+def series_occurrences(ser: ShiftSeries, start: date, end: date):
+    """
+    Genera (en orden) las fechas de la serie dentro de [start, end].
+    Salta directamente a cada semana activa (cada interval_weeks desde la semana
+    de start_date) y, dentro de ella, a cada día marcado en weekdays_mask:
+    coste O(ocurrencias) en lugar de recorrer el rango día a día.
+    Requiere start >= ser.start_date e interval_weeks >= 1.
+    """
+    bits = [b for b in range(7) if ser.weekdays_mask & (1 << b)]
+    if not bits or start > end:
+        return
+    interval = ser.interval_weeks
+    base = ser.start_date - timedelta(days=ser.start_date.weekday())  # lunes de la semana inicial
+    # primera semana activa >= semana de start
+    week = weeks_between(ser.start_date, start)
+    week += -week % interval
+    monday = base + timedelta(weeks=week)
+    step = timedelta(weeks=interval)
+    while monday <= end:
+        for bit in bits:
+            day = monday + timedelta(days=bit)
+            if day < start:
+                continue
+            if day > end:
+                return
+            yield day
+        monday += step
+
+
+def apply_exception(ser: ShiftSeries, ex: ShiftException | None):
+    """
+    Devuelve (start_time, end_time, type_id) de una ocurrencia tras aplicar la excepción
+    del día, o None si la ocurrencia se omite ('cancel' o 'modify' inconsistente).
+    """
+    if ex and ex.action == "cancel":
+        return None
+
+    s_time = ser.start_time
+    e_time = ser.end_time
+    type_id = ser.type_id
+    if ex and ex.action == "modify":
+        if ex.new_start_time:
+            s_time = ex.new_start_time
+        if ex.new_end_time:
+            e_time = ex.new_end_time
+        if ex.new_type_id:
+            type_id = ex.new_type_id
+        # V1: si queda inconsistente, omitimos
+        if e_time <= s_time:
+            return None
+    return s_time, e_time, type_id
+
+
+def refresh_series_occurrences(
+    ser: ShiftSeries,
+    d_from: date | None = None,
+    d_to: date | None = None,
+    window: tuple[date, date] | None = None,
+) -> int:
+    """
+    Recalcula las filas de shift_occurrence de UNA serie en [d_from, d_to]
+    (por defecto toda la ventana), aplicando sus excepciones.
+    `window` es la ventana a mantener: por defecto la ya materializada; si aún no
+    hay ninguna no se escribe nada (las lecturas expanden al vuelo).
+    NO hace commit: el endpoint lo hace en la misma transacción que el cambio.
+    Devuelve cuántas ocurrencias quedan materializadas en la ventana.
+    """
+    if not occurrences_enabled():
+        return 0
+
+    window = window or materialized_window()
+    if window is None:
+        return 0
+    h_from, h_to = window
+    start = max(d_from or h_from, h_from)
+    end = min(d_to or h_to, h_to)
+    if end < start:
+        return 0
+
+    db.session.execute(
+        db.delete(ShiftOccurrence).where(
+            ShiftOccurrence.series_id == ser.id,
+            ShiftOccurrence.date >= start,
+            ShiftOccurrence.date <= end,
+        )
+    )
+
+    # mismos pre-chequeos que la expansión al vuelo
+    start = max(start, ser.start_date)
+    end = min(end, ser.end_date or end)
+    if (
+        not ser.active
+        or end < start
+        or ser.end_time <= ser.start_time
+        or ser.weekdays_mask <= 0
+        or ser.interval_weeks <= 0
+    ):
+        return 0
+
+    exs = (
+        db.session.execute(
+            db.select(ShiftException).where(
+                ShiftException.series_id == ser.id,
+                ShiftException.date >= start,
+                ShiftException.date <= end,
+            )
+        )
+        .scalars()
+        .all()
+    )
+    exceptions_by_date = {ex.date: ex for ex in exs}
+
+    rows = []
+    for day in series_occurrences(ser, start, end):
+        resolved = apply_exception(ser, exceptions_by_date.get(day))
+        if resolved is None:
+            continue
+        s_time, e_time, type_id = resolved
+
+        rows.append(
+            {
+                "series_id": ser.id,
+                "company_id": ser.company_id,
+                "employee_id": ser.employee_id,
+                "date": day,
+                "start_time": s_time,
+                "end_time": e_time,
+                "type_id": type_id,
+                "notes": ser.notes,
+            }
+        )
+
+    if rows:
+        db.session.execute(db.insert(ShiftOccurrence), rows)
+    return len(rows)
+
@@ -0,0 +1,327 @@
+import os
+from datetime import datetime, date, time, timedelta, timezone
+from itertools import groupby
+from operator import itemgetter
+from zoneinfo import ZoneInfo
+from api.models import db, Employee, TimePunch, DailyWorkSummary, PunchType
+
+
+# Rollup diario (daily_work_summary): el día de cada sesión es el día local del IN
+# en WORK_SUMMARY_TZ. Se acumula al cerrar sesiones con OUT; los datos históricos
+# se cargan con `flask backfill-work-summary`.
+# Con WORK_SUMMARY_ROLLUP_MIN_DAYS > 0, los resúmenes sin detalle por sesión de al
+# menos ese número de días (y en WORK_SUMMARY_TZ) se leen del rollup en lugar de
+# recorrer TimePunch. La respuesta es la misma por ambos caminos.
+# 0 = desactivado (activar solo después del backfill).
+WORK_SUMMARY_TZ = os.getenv("WORK_SUMMARY_TZ", "Europe/Madrid")
+WORK_SUMMARY_ROLLUP_MIN_DAYS = int(os.getenv("WORK_SUMMARY_ROLLUP_MIN_DAYS", 0))
+
+# Regla única (resúmenes en vivo, rollup y backfill) para las sesiones que cruzan el
+# final de la ventana: cuentan en el día local de su IN, y su OUT se busca hasta
+# SESION_MAX después. Una sesión más larga se toma por un OUT olvidado y se descarta.
+SESION_MAX = timedelta(days=1)
+
+
+def as_utc(dt: datetime) -> datetime:
+    # SQLite devuelve datetimes naive aunque la columna sea timezone=True
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def ventana_utc(date_from: date, date_to: date, tz: ZoneInfo) -> tuple[datetime, datetime]:
+    # Ventana local [00:00 del from, 00:00 del día siguiente a to) → convertida a UTC
+    start_local = datetime.combine(date_from, time(0, 0), tzinfo=tz)
+    end_local = datetime.combine(date_to + timedelta(days=1), time(0, 0), tzinfo=tz)
+    return start_local.astimezone(timezone.utc), end_local.astimezone(timezone.utc)
+
+
+def ventana_fichajes(date_from: date, date_to: date, tz: ZoneInfo) -> tuple[datetime, datetime]:
+    # Fichajes a leer para resumir [date_from, date_to]: la ventana más SESION_MAX
+    # al final, para cerrar las sesiones que empiezan el último día
+    start_utc, end_utc = ventana_utc(date_from, date_to, tz)
+    return start_utc, end_utc + SESION_MAX
+
+
+def usa_rollup(date_from: date, date_to: date, tz_name: str, include_sessions: bool) -> bool:
+    # El rollup no guarda el detalle por sesión: solo sirve resúmenes sin él
+    return (
+        not include_sessions
+        and WORK_SUMMARY_ROLLUP_MIN_DAYS > 0
+        and tz_name == WORK_SUMMARY_TZ
+        and (date_to - date_from).days + 1 >= WORK_SUMMARY_ROLLUP_MIN_DAYS
+    )
+
+
+def iter_sesiones(punches):
+    """
+    Máquina de estados IN/BREAK/OUT sobre una secuencia de (punch_type, punched_at)
+    ya ordenada por punched_at. Consume la secuencia una sola vez (admite generadores)
+    y produce (in_at, out_at, gross, break, net) por cada sesión cerrada con neto > 0.
+    - Resta todos los intervalos de BREAK_START→BREAK_END.
+    - Un IN sin OUT seguido de otro IN se descarta.
+    - Una sesión de más de SESION_MAX se descarta.
+    """
+    current_in: datetime | None = None
+    current_break_start: datetime | None = None
+    total_break: timedelta = timedelta(0)
+
+    for punch_type, punched_at in punches:
+        if punch_type == PunchType.IN:
+            # Si había un IN colgado sin OUT anterior, lo descartamos empezando una nueva sesión
+            current_in = punched_at
+            current_break_start = None
+            total_break = timedelta(0)
+
+        elif punch_type == PunchType.BREAK_START:
+            if current_in is not None and current_break_start is None:
+                current_break_start = punched_at
+
+        elif punch_type == PunchType.BREAK_END:
+            if current_in is not None and current_break_start is not None:
+                if punched_at > current_break_start:
+                    total_break += punched_at - current_break_start
+                current_break_start = None
+
+        elif punch_type == PunchType.OUT:
+            if current_in is not None:
+                # Si hay una pausa abierta, la cerramos al momento del OUT
+                if current_break_start is not None and punched_at > current_break_start:
+                    total_break += punched_at - current_break_start
+                    current_break_start = None
+
+                gross = punched_at - current_in
+                net = gross - total_break
+                if net.total_seconds() > 0 and gross <= SESION_MAX:
+                    yield current_in, punched_at, gross, total_break, net
+
+                # Reset para la siguiente sesión
+                current_in = None
+                current_break_start = None
+                total_break = timedelta(0)
+
+
+def _totales(days_worked: int, total_seconds: int) -> dict:
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    return {
+        "days_worked": days_worked,
+        "total_seconds": total_seconds,
+        "total_hours": round(total_seconds / 3600, 2),  # número decimal (2 decimales)
+        "human_total": f"{hours}h {minutes}m",  # "Xh Ym"
+    }
+
+
+def resumir_sesiones(
+    punches, tz: ZoneInfo, include_sessions: bool = True, hasta: date | None = None
+) -> dict:
+    """
+    Totales de una secuencia de fichajes de UN empleado (ver iter_sesiones).
+    Cuenta un 'día trabajado' por sesión completa IN→OUT y la asigna
+    al día local del IN (aunque cruce medianoche).
+    hasta: último día local de la ventana; las sesiones que empiezan después
+    (leídas solo para cerrar las del último día, ver ventana_fichajes) no cuentan.
+    """
+    sessions: list[dict] = []
+    days_worked = 0
+    total_seconds = 0
+
+    for in_at, out_at, gross, total_break, net in iter_sesiones(punches):
+        in_local = as_utc(in_at).astimezone(tz)
+        if hasta is not None and in_local.date() > hasta:
+            continue
+        days_worked += 1
+        total_seconds += int(net.total_seconds())
+        if include_sessions:
+            out_local = as_utc(out_at).astimezone(tz)
+            sessions.append(
+                {
+                    "date": in_local.date().isoformat(),
+                    "in": in_local.isoformat(),
+                    "out": out_local.isoformat(),
+                    "gross_seconds": int(gross.total_seconds()),
+                    "break_seconds": int(total_break.total_seconds()),
+                    "net_seconds": int(net.total_seconds()),
+                }
+            )
+
+    data = _totales(days_worked, total_seconds)
+    if include_sessions:
+        data["sessions"] = sessions  # detalle por sesión
+    return data
+
+
+def resumir_rollup(rows) -> dict:
+    """
+    Totales a partir de filas DailyWorkSummary de UN empleado: mismas claves y
+    reglas que resumir_sesiones(..., include_sessions=False).
+    """
+    days_worked = 0
+    total_seconds = 0
+    for row in rows:
+        days_worked += row.sessions
+        total_seconds += row.net_seconds
+    return _totales(days_worked, total_seconds)
+
+
+def _sumar_en_rollup(acumulado: dict[tuple[int, date], list[int]]) -> None:
+    """
+    Suma {(employee_id, fecha): [sessions, gross, break, net]} sobre daily_work_summary
+    (actualiza las filas existentes y crea las que falten). NO hace commit.
+    """
+    if not acumulado:
+        return
+    employee_ids = {k[0] for k in acumulado}
+    fechas = [k[1] for k in acumulado]
+    existentes = {
+        (row.employee_id, row.date): row
+        for row in db.session.execute(
+            db.select(DailyWorkSummary).where(
+                DailyWorkSummary.employee_id.in_(employee_ids),
+                DailyWorkSummary.date >= min(fechas),
+                DailyWorkSummary.date <= max(fechas),
+            )
+        ).scalars()
+    }
+    for key, (sessions, gross, brk, net) in acumulado.items():
+        row = existentes.get(key)
+        if row is None:
+            row = DailyWorkSummary(
+                employee_id=key[0],
+                date=key[1],
+                sessions=0,
+                gross_seconds=0,
+                break_seconds=0,
+                net_seconds=0,
+            )
+            db.session.add(row)
+        row.sessions += sessions
+        row.gross_seconds += gross
+        row.break_seconds += brk
+        row.net_seconds += net
+
+
+def _acumular(acumulado, employee_id, sesiones, tz: ZoneInfo, desde=None, dias=None):
+    for in_at, out_at, gross, brk, net in sesiones:
+        if desde is not None and as_utc(out_at) < desde:
+            continue  # sesión ya contabilizada antes
+        dia = as_utc(in_at).astimezone(tz).date()
+        if dias is not None and not (dias[0] <= dia <= dias[1]):
+            continue
+        acc = acumulado.setdefault((employee_id, dia), [0, 0, 0, 0])
+        acc[0] += 1
+        acc[1] += int(gross.total_seconds())
+        acc[2] += int(brk.total_seconds())
+        acc[3] += int(net.total_seconds())
+
+
+def actualizar_rollup(desde_por_empleado: dict[int, datetime]) -> None:
+    """
+    Incorpora al rollup las sesiones cerradas por fichajes nuevos.
+    desde_por_empleado: employee_id -> instante del primer fichaje nuevo (ya añadido
+    a la sesión). Se rejuega desde el último IN anterior (la sesión que pudiera
+    estar abierta) y solo se suman las sesiones cuyo OUT es >= ese instante.
+    NO hace commit: va en la misma transacción que los fichajes.
+    """
+    if not desde_por_empleado:
+        return
+    desde_por_empleado = {e: as_utc(d) for e, d in desde_por_empleado.items()}
+
+    # 1) último IN anterior a 'desde' por empleado (inicio de la posible sesión abierta)
+    inicios = dict(
+        db.session.execute(
+            db.select(TimePunch.employee_id, db.func.max(TimePunch.punched_at))
+            .where(
+                TimePunch.punch_type == PunchType.IN,
+                db.or_(
+                    *(
+                        (TimePunch.employee_id == e) & (TimePunch.punched_at < d)
+                        for e, d in desde_por_empleado.items()
+                    )
+                ),
+            )
+            .group_by(TimePunch.employee_id)
+        ).all()
+    )
+
+    # 2) fichajes desde ese inicio, de todos los empleados en una sola query
+    result = db.session.execute(
+        db.select(TimePunch.employee_id, TimePunch.punch_type, TimePunch.punched_at)
+        .where(
+            db.or_(
+                *(
+                    (TimePunch.employee_id == e) & (TimePunch.punched_at >= inicios.get(e, d))
+                    for e, d in desde_por_empleado.items()
+                )
+            )
+        )
+        .order_by(TimePunch.employee_id, TimePunch.punched_at, TimePunch.id)
+    )
+
+    tz = ZoneInfo(WORK_SUMMARY_TZ)
+    acumulado: dict[tuple[int, date], list[int]] = {}
+    for employee_id, rows in groupby(result, key=itemgetter(0)):
+        sesiones = iter_sesiones((p_type, as_utc(p_at)) for _, p_type, p_at in rows)
+        _acumular(acumulado, employee_id, sesiones, tz, desde=desde_por_empleado[employee_id])
+    _sumar_en_rollup(acumulado)
+
+
+def reconstruir_rollup(
+    date_from: date, date_to: date, company_id: int | None = None, batch_size: int = 1000
+) -> int:
+    """
+    Reconstruye daily_work_summary en [date_from, date_to] (días locales en
+    WORK_SUMMARY_TZ) rejugando TimePunch en streaming. Lee los fichajes con el
+    mismo margen que los resúmenes en vivo (ver ventana_fichajes).
+    NO hace commit. Devuelve el número de filas escritas.
+    """
+    tz = ZoneInfo(WORK_SUMMARY_TZ)
+    start_utc, end_utc = ventana_fichajes(date_from, date_to, tz)
+
+    empleados = db.select(Employee.id)
+    if company_id is not None:
+        empleados = empleados.where(Employee.company_id == company_id)
+
+    db.session.execute(
+        db.delete(DailyWorkSummary).where(
+            DailyWorkSummary.date >= date_from,
+            DailyWorkSummary.date <= date_to,
+            DailyWorkSummary.employee_id.in_(empleados.scalar_subquery()),
+        )
+    )
+
+    result = db.session.execute(
+        db.select(TimePunch.employee_id, TimePunch.punch_type, TimePunch.punched_at)
+        .where(
+            TimePunch.employee_id.in_(empleados.scalar_subquery()),
+            TimePunch.punched_at >= start_utc,
+            TimePunch.punched_at < end_utc,
+        )
+        .order_by(TimePunch.employee_id, TimePunch.punched_at, TimePunch.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    written = 0
+    buffer: list[dict] = []
+    for employee_id, rows in groupby(result, key=itemgetter(0)):
+        acumulado: dict[tuple[int, date], list[int]] = {}
+        sesiones = iter_sesiones((p_type, as_utc(p_at)) for _, p_type, p_at in rows)
+        _acumular(acumulado, employee_id, sesiones, tz, dias=(date_from, date_to))
+        for (e_id, dia), (sessions, gross, brk, net) in acumulado.items():
+            buffer.append(
+                {
+                    "employee_id": e_id,
+                    "date": dia,
+                    "sessions": sessions,
+                    "gross_seconds": gross,
+                    "break_seconds": brk,
+                    "net_seconds": net,
+                }
+            )
+        if len(buffer) >= batch_size:
+            db.session.execute(db.insert(DailyWorkSummary), buffer)
+            written += len(buffer)
+            buffer = []
+
+    if buffer:
+        db.session.execute(db.insert(DailyWorkSummary), buffer)
+        written += len(buffer)
+    return written
@@ -1,5 +1,7 @@
 import enum
-from datetime import date, timedelta
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Sequence
 
 
 class HolidayStatus(enum.Enum):
@@ -9,18 +11,25 @@ class HolidayStatus(enum.Enum):
     CANCELLED = "CANCELLED"
 
 
-def business_days(start: date, end: date) -> int:
-    # """
-    # Cuenta días laborables (L-V) entre start y end (ambos inclusive).
-    # No incluye festivos aún.
-    # """
+def weekdays_between(start: date, end: date) -> int:
+    """Días L-V entre start y end (ambos inclusive), en O(1): semanas completas + resto."""
     if not start or not end or end < start:
         return 0
-    days = 0
-    d = start
-    one = timedelta(days=1)
-    while d <= end:
-        if d.weekday() < 5:  # 0=Lunes ... 4=Viernes
-            days += 1
-        d += one
+    full_weeks, rest = divmod((end - start).days + 1, 7)
+    first = start.weekday()  # 0=Lunes ... 6=Domingo
+    return full_weeks * 5 + sum(1 for i in range(rest) if (first + i) % 7 < 5)
+
+
+def business_days(start: date, end: date, holidays: Sequence[date] = ()) -> int:
+    """
+    Cuenta días laborables (L-V) entre start y end (ambos inclusive),
+    descontando los festivos de `holidays`: lista ORDENADA de fechas que caen en L-V
+    (ver utils_calendar). El coste no depende de la longitud del rango:
+    aritmética para los días L-V y dos búsquedas binarias para los festivos.
+    """
+    if not start or not end or end < start:
+        return 0
+    days = weekdays_between(start, end)
+    if holidays:
+        days -= bisect_right(holidays, end) - bisect_left(holidays, start)
     return days
@@ -10,6 +10,7 @@ from api.models import db
 from api.routes import api
 from api.admin import setup_admin
 from api.commands import setup_commands
+from api.instrumentation import setup_instrumentation
 from flask_jwt_extended import JWTManager
 from flask import Flask
 # from api.mail_config import mail
@@ -49,6 +50,9 @@ setup_admin(app)
 # add the admin
 setup_commands(app)
 
+# métricas por endpoint (opcional: SQL_QUERY_STATS=1 / METRICS_ENABLED=1)
+setup_instrumentation(app)
+
 # Add all endpoints form the API with a "api" prefix
 app.register_blueprint(api, url_prefix='/api')
 
@@ -0,0 +1,286 @@
+"""
+Benchmark de las rutas calientes de la API.
+
+Siembra datos sintéticos con `seed_scale` (api/commands.py) en una BD local
+(SQLite por defecto o el PostgreSQL de DATABASE_URL), lanza N peticiones por
+escenario contra la app en proceso (Flask test client) o contra un servidor en
+marcha (--base-url) y mide throughput y latencias p50/p95/p99.
+Los resultados se comparan con un baseline guardado (--save-baseline para crearlo)
+y el proceso termina con código 1 si algún escenario empeora más del umbral o
+devuelve más errores (status >= 400) que en el baseline (sin baseline, más de cero).
+
+Uso (desde la raíz del repo):
+    python src/benchmarks/bench.py --scale small --reseed
+    python src/benchmarks/bench.py --scale small --save-baseline
+    DATABASE_URL=postgresql://... python src/benchmarks/bench.py --scale large --reseed
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))  # src/
+
+os.environ.setdefault("DATABASE_URL", "sqlite:////tmp/crewgeeks_bench.db")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-change-me-0123456789")
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import app  # noqa: E402
+from api.models import db, Company, Employee  # noqa: E402
+from api.commands import seed_scale  # noqa: E402
+from api.utils_auth.helpers_auth import build_claims, system_role_for  # noqa: E402
+
+# "large" ≈ 50 empresas, 10k empleados, ~10M fichajes y 100k series
+SCALES = {
+    "tiny": dict(companies=2, employees_per_company=20, punch_days=30, series_per_employee=2),
+    "small": dict(companies=5, employees_per_company=200, punch_days=120, series_per_employee=5),
+    "medium": dict(companies=20, employees_per_company=250, punch_days=200, series_per_employee=8),
+    "large": dict(companies=50, employees_per_company=200, punch_days=350, series_per_employee=10),
+}
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+TAG = "bench"
+# Estado previo que necesita cada escenario de fichaje: con una BD reutilizada (o con
+# --only y solo uno de los dos) los turnos quedan abiertos/cerrados y se medirían 409s
+PREPARE = {
+    "time_punch_start": "/api/time-punch/end",
+    "time_punch_end": "/api/time-punch/start",
+}
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    # nearest-rank
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[k]
+
+
+def seed_if_needed(scale: str, reseed: bool) -> None:
+    with app.app_context():
+        if reseed:
+            db.drop_all()
+            db.create_all()
+        elif db.session.execute(
+            db.select(Company.id).where(Company.cif.like(f"{TAG}-CIF-%")).limit(1)
+        ).first():
+            return
+        else:
+            db.create_all()
+        t0 = time.perf_counter()
+        counts = seed_scale(tag=TAG, **SCALES[scale])
+        print(f"seed ({scale}) en {time.perf_counter() - t0:.1f}s: {counts}")
+
+
+def principals(sample: int, rnd: random.Random) -> tuple[list[str], list[str], list[str]]:
+    """Tokens (con claims completos) de admins y empleados de muestra, y emails para el login."""
+    with app.app_context():
+        staff = (
+            db.session.execute(
+                db.select(Employee).where(Employee.email.like(f"{TAG}.%")).order_by(Employee.id)
+            )
+            .scalars()
+            .all()
+        )
+        admins = [e for e in staff if system_role_for(e) == "ADMIN"]
+        employees = [e for e in staff if system_role_for(e) == "EMPLOYEE"]
+        pick = lambda items: rnd.sample(items, min(sample, len(items)))  # noqa: E731
+        token = lambda e: create_access_token(identity=str(e.id), additional_claims=build_claims(e))  # noqa: E731
+        sampled = pick(employees)
+        return (
+            [token(e) for e in pick(admins)],
+            [token(e) for e in sampled],
+            [e.email for e in sampled],
+        )
+
+
+def scenarios(admin_tokens: list[str], employee_tokens: list[str], emails: list[str]):
+    """(nombre, método, path, [(token, body)]) de las rutas calientes."""
+    today = date.today()
+    month_ago = (today - timedelta(days=30)).isoformat()
+    week_ago = (today - timedelta(days=7)).isoformat()
+    quarter = (today - timedelta(days=90)).isoformat()
+    t = today.isoformat()
+    employees = [(token, None) for token in employee_tokens]
+    admins = [(token, None) for token in admin_tokens]
+    logins = [(None, {"email": email, "password": f"{TAG}-password"}) for email in emails]
+    return [
+        ("login", "POST", "/api/employees/login", logins),
+        ("time_punch_status", "GET", "/api/time-punch/status", employees),
+        ("time_punch_start", "POST", "/api/time-punch/start", employees),
+        ("time_punch_end", "POST", "/api/time-punch/end", employees),
+        ("time_punch_list_week", "GET", f"/api/time-punch/list?from={week_ago}&to={t}", employees),
+        ("time_punch_summary_month", "GET", f"/api/time-punch/summary?from={month_ago}&to={t}", employees),
+        ("time_punch_summary_quarter", "GET", f"/api/time-punch/summary?from={quarter}&to={t}", employees),
+        ("shifts_month", "GET", f"/api/shifts?from={month_ago}&to={t}", employees),
+        ("holidays_admin", "GET", "/api/holidays/", admins),
+        ("payrolls_admin_page", "GET", "/api/payrolls?limit=10&page=1", admins),
+    ]
+
+
+def _headers(token: str | None) -> dict:
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def _body(method: str, body: dict | None):
+    return body if body is not None else ({} if method == "POST" else None)
+
+
+def make_sender(base_url: str | None):
+    if base_url:
+        import requests
+
+        session = requests.Session()
+
+        def send(method, path, token, body):
+            r = session.request(method, base_url.rstrip("/") + path, headers=_headers(token), json=_body(method, body))
+            return r.status_code
+
+        return send
+
+    client = app.test_client()
+
+    def send(method, path, token, body):
+        r = client.open(path, method=method, headers=_headers(token), json=_body(method, body))
+        return r.status_code
+
+    return send
+
+
+def run_scenario(name, method, path, items, requests_per_scenario, concurrency, base_url, rnd):
+    plan = [rnd.choice(items) for _ in range(requests_per_scenario)]
+    if name in ("time_punch_start", "time_punch_end"):
+        # cada empleado ficha una sola vez por ronda para que start/end sean válidos
+        # (como máximo --sample peticiones en estos dos escenarios)
+        plan = items[:requests_per_scenario]
+    if name in PREPARE:
+        send = make_sender(base_url)
+        for token, body in plan:
+            send("POST", PREPARE[name], token, body)  # fuera de la medición; 409 esperable
+
+    def worker(chunk):
+        send = make_sender(base_url)
+        out = []
+        for token, body in chunk:
+            t0 = time.perf_counter()
+            status = send(method, path, token, body)
+            out.append((time.perf_counter() - t0, status))
+        return out
+
+    chunks = [plan[i::concurrency] for i in range(concurrency)]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = [s for part in pool.map(worker, chunks) for s in part]
+    wall = time.perf_counter() - t0
+
+    latencies = sorted(s[0] * 1000 for s in samples)
+    errors = sum(1 for _, status in samples if status >= 400)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / wall, 1) if wall else 0.0,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get("results", {}).get(name)
+        # los errores no tienen umbral: cualquiera por encima del baseline (o de cero) falla
+        base_errors = base.get("errors", 0) if base else 0
+        if cur["errors"] > base_errors:
+            regressions.append(f"{name}: errors {base_errors} -> {cur['errors']} de {cur['requests']}")
+        if not base:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if base[key] and cur[key] > base[key] * (1 + threshold):
+                regressions.append(f"{name}: {key} {base[key]} -> {cur[key]}")
+        if base["rps"] and cur["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: rps {base['rps']} -> {cur['rps']}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de rutas calientes de la API")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--reseed", action="store_true", help="borra y vuelve a sembrar la BD")
+    parser.add_argument("--requests", type=int, default=200, help="peticiones por escenario")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--sample", type=int, default=200, help="empleados/admins de muestra")
+    parser.add_argument("--only", default=None, help="escenarios separados por coma")
+    parser.add_argument("--base-url", default=None, help="servidor en marcha en lugar del test client")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="empeoramiento tolerado (0.25 = 25%%)")
+    parser.add_argument("--output", default=None, help="guardar resultados en JSON")
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(1234)
+    seed_if_needed(args.scale, args.reseed)
+    admin_tokens, employee_tokens, emails = principals(args.sample, rnd)
+    wanted = set(args.only.split(",")) if args.only else None
+
+    results = {}
+    print(f"{'escenario':30} {'req':>6} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, method, path, items in scenarios(admin_tokens, employee_tokens, emails):
+        if wanted and name not in wanted:
+            continue
+        r = run_scenario(name, method, path, items, args.requests, args.concurrency, args.base_url, rnd)
+        results[name] = r
+        print(f"{name:30} {r['requests']:>6} {r['errors']:>5} {r['rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}")
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    meta = {
+        "scale": args.scale,
+        "dialect": dialect if not args.base_url else "remote",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+    }
+    report = {"meta": meta, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        failed = [name for name, r in results.items() if r["errors"]]
+        if failed:
+            print(f"baseline NO guardado: escenarios con errores ({', '.join(failed)})")
+            return 1
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline guardado en {args.baseline}")
+        return 0
+
+    baseline = {}
+    if not os.path.exists(args.baseline):
+        print("sin baseline: ejecuta con --save-baseline para crearlo; solo se comprueban errores")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        base_meta = baseline.get("meta", {})
+        if any(base_meta.get(k) != meta[k] for k in ("scale", "dialect", "concurrency")):
+            print(f"baseline con otra configuración ({base_meta}); solo se comprueban errores")
+            baseline = {}
+
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESIÓN {line}")
+    if not regressions and baseline:
+        print(f"sin regresiones frente a {args.baseline} (umbral {args.threshold:.0%})")
+    elif not regressions:
+        print("sin errores")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+# La app lee la configuración al importarse: BD SQLite desechable y bcrypt barato
+_DB_DIR = tempfile.mkdtemp(prefix="crewgeeks-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-0123456789abcdef0123456789")
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+os.environ.setdefault("PASSWORD_VERIFY_WORKERS", "0")
+
+from app import app as flask_app  # noqa: E402
+from api.models import db as _db, Company, Employee, Role, Salary, ShiftType  # noqa: E402
+
+PASSWORD = "test-password"
+
+
+@pytest.fixture
+def app():
+    """App con una BD vacía por test."""
+    with flask_app.app_context():
+        _db.drop_all()
+        _db.create_all()
+        yield flask_app
+        _db.session.remove()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def factory(db):
+    return Factory(db)
+
+
+class Factory:
+    """Crea filas mínimas válidas para los tests (empresa, roles, empleados, tipos)."""
+
+    def __init__(self, db):
+        self.db = db
+        self._n = 0
+        # ids y no objetos: siguen valiendo aunque el test cierre la sesión
+        self._role_ids: dict[str, int] = {}
+        self._salary_id = None
+
+    def _next(self) -> int:
+        self._n += 1
+        return self._n
+
+    def company(self, name: str = "Acme") -> Company:
+        n = self._next()
+        company = Company(name=f"{name} {n}", cif=f"CIF-{n}")
+        self.db.session.add(company)
+        self.db.session.commit()
+        return company
+
+    def role_id(self, name: str = "Empleado") -> int:
+        if name not in self._role_ids:
+            if self._salary_id is None:
+                salary = Salary(amount=1500)
+                self.db.session.add(salary)
+                self.db.session.flush()
+                self._salary_id = salary.id
+            role = Role(name=name, description=name, salary_id=self._salary_id)
+            self.db.session.add(role)
+            self.db.session.commit()
+            self._role_ids[name] = role.id
+        return self._role_ids[name]
+
+    def employee(self, company: Company, role: str = "Empleado", commit: bool = True) -> Employee:
+        n = self._next()
+        employee = Employee(
+            company_id=company.id,
+            first_name=f"Nombre{n}",
+            last_name="Apellido",
+            dni=f"DNI-{n}",
+            birth=date(1990, 1, 1),
+            address="Calle Falsa 123",
+            email=f"empleado{n}@example.com",
+            seniority=date(2020, 1, 1),
+            phone="600000000",
+            role_id=self.role_id(role),
+            password_hash="",
+        )
+        self.db.session.add(employee)
+        if commit:
+            self.db.session.commit()
+        return employee
+
+    def shift_type(self, code: str = "MORNING") -> ShiftType:
+        shift_type = ShiftType(code=code, name=code, color_hex="#22c55e")
+        self.db.session.add(shift_type)
+        self.db.session.commit()
+        return shift_type
+
+
+def auth_headers(employee: Employee) -> dict:
+    """Cabecera Bearer obtenida con el login real (mismos claims que el front)."""
+    employee.set_password(PASSWORD)
+    _db.session.commit()
+    r = flask_app.test_client().post(
+        "/api/employees/login", json={"email": employee.email, "password": PASSWORD}
+    )
+    assert r.status_code == 200, r.get_json()
+    return {"Authorization": f"Bearer {r.get_json()['token']}"}
+
+
+@contextmanager
+def count_queries(db):
+    """Cuenta las sentencias SQL ejecutadas dentro del bloque."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
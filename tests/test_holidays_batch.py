@@ -0,0 +1,51 @@
+from datetime import date
+
+from api.models import Holidays, HolidayStatus, VacationBalance
+from conftest import auth_headers
+
+
+def _holiday(db, employee, start, end, status):
+    holiday = Holidays(
+        company_id=employee.company_id,
+        employee_id=employee.id,
+        start_date=start,
+        end_date=end,
+        status=status,
+        requested_days=0,
+    )
+    db.session.add(holiday)
+    db.session.commit()
+    return holiday.id
+
+
+def test_batch_approve_rejected_requests_overlapping_each_other(client, db, factory):
+    company = factory.company()
+    admin = factory.employee(company, role="Admin")
+    employee = factory.employee(company)
+    first = _holiday(db, employee, date(2026, 3, 2), date(2026, 3, 6), HolidayStatus.REJECTED)
+    second = _holiday(db, employee, date(2026, 3, 5), date(2026, 3, 10), HolidayStatus.REJECTED)
+    third = _holiday(db, employee, date(2026, 4, 6), date(2026, 4, 7), HolidayStatus.PENDING)
+
+    r = client.post(
+        "/api/holidays/batch/approve",
+        headers=auth_headers(admin),
+        json={"ids": [first, second, third]},
+    )
+
+    assert r.status_code == 200, r.get_json()
+    results = {item["id"]: item for item in r.get_json()["results"]}
+    assert results[first]["ok"] and results[third]["ok"]
+    assert not results[second]["ok"]
+    assert "overlaps" in results[second]["error"]
+
+    db.session.expire_all()
+    statuses = {h.id: h.status for h in db.session.execute(db.select(Holidays)).scalars()}
+    assert statuses == {
+        first: HolidayStatus.APPROVED,
+        second: HolidayStatus.REJECTED,
+        third: HolidayStatus.APPROVED,
+    }
+    balance = db.session.execute(
+        db.select(VacationBalance).where(VacationBalance.employee_id == employee.id)
+    ).scalar_one()
+    assert (balance.used_days, balance.pending_days) == (5 + 2, 0)
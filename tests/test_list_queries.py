@@ -0,0 +1,92 @@
+from datetime import date, time, timedelta
+
+from api.models import Company, Shifts, ShiftSeries
+from conftest import auth_headers, count_queries
+
+FROM = date(2026, 3, 2)
+TO = date(2026, 3, 29)
+
+
+def _count(client, db, path: str, headers: dict) -> int:
+    # sesión limpia: que el identity map del test no oculte consultas de la petición
+    db.session.remove()
+    with count_queries(db) as statements:
+        r = client.get(path, headers=headers)
+    assert r.status_code == 200, r.get_json()
+    return len(statements)
+
+
+def test_employee_listings_run_a_fixed_number_of_queries(client, db, factory):
+    company = factory.company()
+    company_id = company.id
+    owner = factory.employee(company, role="OwnerDB")
+    admin = factory.employee(company, role="Admin")
+    owner_headers, admin_headers = auth_headers(owner), auth_headers(admin)
+    paths = [
+        ("/api/employees", owner_headers),
+        ("/api/employees?limit=500", owner_headers),
+        ("/api/employees", admin_headers),
+        ("/api/employees?limit=500", admin_headers),
+    ]
+    before = [_count(client, db, path, headers) for path, headers in paths]
+
+    # más empleados en la empresa y en muchas empresas nuevas
+    company = db.session.get(Company, company_id)
+    for _ in range(20):
+        factory.employee(company, commit=False)
+    for _ in range(10):
+        other = factory.company()
+        for _ in range(3):
+            factory.employee(other, commit=False)
+    db.session.commit()
+
+    assert [_count(client, db, path, headers) for path, headers in paths] == before
+
+
+def _add_shifts(db, factory, employee_id: int, company_id: int, n: int, offset: int):
+    # un tipo distinto por fila: sin precarga cada fila costaría una query más
+    for i in range(offset, offset + n):
+        shift_type = factory.shift_type(f"TYPE{i}")
+        day = FROM + timedelta(days=i % 28)
+        db.session.add(
+            Shifts(
+                company_id=company_id,
+                employee_id=employee_id,
+                type_id=shift_type.id,
+                date=day,
+                start_time=time(6, 0),
+                end_time=time(7, 0),
+            )
+        )
+        db.session.add(
+            ShiftSeries(
+                company_id=company_id,
+                employee_id=employee_id,
+                type_id=shift_type.id,
+                start_date=FROM - timedelta(days=i),
+                end_date=None,
+                start_time=time(8 + i % 10, 0),
+                end_time=time(9 + i % 10, 0),
+                weekdays_mask=1 << (i % 7),
+                interval_weeks=1,
+            )
+        )
+    db.session.commit()
+
+
+def test_shift_listings_run_a_fixed_number_of_queries(client, db, factory):
+    company = factory.company()
+    admin = factory.employee(company, role="Admin")
+    employee = factory.employee(company)
+    employee_id, company_id = employee.id, company.id
+    headers = auth_headers(admin)
+    paths = [
+        f"/api/shifts?from={FROM}&to={TO}&employee_id={employee_id}",
+        f"/api/shifts/series?employee_id={employee_id}",
+        f"/api/shifts/calendar?from={FROM}&to={TO}",
+    ]
+
+    _add_shifts(db, factory, employee_id, company_id, 3, offset=0)
+    before = [_count(client, db, path, headers) for path in paths]
+    _add_shifts(db, factory, employee_id, company_id, 30, offset=3)
+    assert [_count(client, db, path, headers) for path in paths] == before
@@ -0,0 +1,36 @@
+import base64
+import json
+
+import pytest
+
+from api.models import Holidays, Payroll
+from api.utils_auth.utils_pagination import decode_cursor, encode_cursor
+from conftest import auth_headers
+
+
+def _raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.mark.parametrize("values", [["a"], [1.5], [True], [None], [[1]]])
+def test_cursor_values_must_match_the_order_columns(client, factory, values):
+    admin = factory.employee(factory.company(), role="Admin")
+
+    r = client.get(
+        "/api/holidays/",
+        headers=auth_headers(admin),
+        query_string={"limit": 1, "cursor": _raw_cursor(values)},
+    )
+
+    assert r.status_code == 400
+    assert r.get_json() == {"error": "cursor inválido"}
+
+
+def test_decode_cursor_checks_each_column_type(app):
+    order_by = [Payroll.period_year, Payroll.period_month, Payroll.id]
+
+    assert decode_cursor(encode_cursor([2026, 3, 7]), order_by) == [2026, 3, 7]
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([2026, "3", 7]), order_by)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([7]), [Holidays.id, Holidays.id])
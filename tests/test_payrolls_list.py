@@ -0,0 +1,45 @@
+import pytest
+
+from api.models import Payroll
+from conftest import auth_headers, count_queries
+
+
+def _company_with_payrolls(db, factory, n: int) -> dict:
+    """Empresa con un admin y n nóminas, cada una de un empleado distinto."""
+    company = factory.company()
+    admin = factory.employee(company, role="Admin")
+    for i in range(n):
+        employee = factory.employee(company, commit=False)
+        db.session.flush()
+        db.session.add(
+            Payroll(
+                company_id=company.id,
+                employee_id=employee.id,
+                period_year=2025,
+                period_month=1 + i % 12,
+                original_filename=f"nomina_{i}.pdf",
+            )
+        )
+    db.session.commit()
+    return auth_headers(admin)
+
+
+def _statements_for_page(client, db, headers, n: int, query: str) -> int:
+    # sesión limpia: que el identity map del test no oculte consultas de la petición
+    db.session.remove()
+    with count_queries(db) as statements:
+        r = client.get(f"/api/payrolls?{query}", headers=headers)
+    assert r.status_code == 200, r.get_json()
+    items = r.get_json()["items"]
+    assert len(items) == n
+    assert all(item["employee_name"].startswith("Nombre") for item in items)
+    return len(statements)
+
+
+@pytest.mark.parametrize("query", ["limit=100&page=1", "limit=100&cursor="])
+def test_payroll_page_runs_a_fixed_number_of_queries(client, db, factory, query):
+    small = _company_with_payrolls(db, factory, 3)
+    large = _company_with_payrolls(db, factory, 30)
+    assert _statements_for_page(client, db, small, 3, query) == _statements_for_page(
+        client, db, large, 30, query
+    )
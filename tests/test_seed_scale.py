@@ -0,0 +1,26 @@
+from api.commands import seed_scale
+from api.models import Holidays, VacationBalance
+
+
+def test_seeded_data_passes_the_vacation_ledger_check(app, db):
+    counts = seed_scale(
+        companies=2,
+        employees_per_company=15,
+        punch_days=3,
+        series_per_employee=1,
+        holidays_per_employee=4,
+        payroll_months=1,
+        tag="test",
+    )
+    assert counts["holidays"] == 2 * 15 * 4
+    assert counts["vacation_balance"] > 0
+    assert db.session.scalar(
+        db.select(db.func.count()).select_from(Holidays).where(Holidays.requested_days <= 0)
+    ) == 0
+
+    result = app.test_cli_runner().invoke(args=["check-vacation-ledger"])
+    assert result.exit_code == 0, result.output
+    assert f"{counts['vacation_balance']} balances revisados, 0 descuadrados" in result.output
+    assert db.session.scalar(
+        db.select(db.func.count()).select_from(VacationBalance)
+    ) == counts["vacation_balance"]
@@ -0,0 +1,106 @@
+from datetime import date, time
+
+from api.models import Holidays, HolidayStatus, Shifts, ShiftSeries
+from api.routes import shifts_routes
+from conftest import auth_headers
+
+
+def test_coverage_counts_absent_scheduled_and_available(client, db, factory):
+    company = factory.company()
+    admin = factory.employee(company, role="Admin")
+    staff = [factory.employee(company) for _ in range(3)]
+    shift_type = factory.shift_type()
+    for employee in staff:
+        for day in (date(2026, 3, 2), date(2026, 3, 3)):
+            db.session.add(
+                Shifts(
+                    company_id=company.id,
+                    employee_id=employee.id,
+                    type_id=shift_type.id,
+                    date=day,
+                    start_time=time(8, 0),
+                    end_time=time(15, 0),
+                )
+            )
+    db.session.add(
+        Holidays(
+            company_id=company.id,
+            employee_id=staff[0].id,
+            start_date=date(2026, 3, 3),
+            end_date=date(2026, 3, 4),
+            status=HolidayStatus.APPROVED,
+            requested_days=2,
+        )
+    )
+    db.session.commit()
+
+    r = client.get(
+        "/api/shifts/coverage?from=2026-03-02&to=2026-03-04", headers=auth_headers(admin)
+    )
+
+    assert r.status_code == 200, r.get_json()
+    body = r.get_json()
+    assert body["headcount"] == 4
+    assert [(d["absent"], d["scheduled"], d["available"]) for d in body["days"]] == [
+        (0, 3, 3),
+        (1, 3, 2),
+        (1, 0, 0),
+    ]
+
+
+def test_coverage_rejects_roles_from_another_company(client, db, factory):
+    company, other = factory.company(), factory.company()
+    admin = factory.employee(company, role="Admin")
+    factory.employee(company, role="Empleado")
+    factory.employee(other, role="Cocina")
+    headers = auth_headers(admin)
+    path = "/api/shifts/coverage?from=2026-03-02&to=2026-03-04&role_id="
+
+    r = client.get(path + str(factory.role_id("Empleado")), headers=headers)
+    assert r.status_code == 200
+    assert r.get_json()["headcount"] == 1
+
+    r = client.get(path + str(factory.role_id("Cocina")), headers=headers)
+    assert r.status_code == 404
+
+
+def test_coverage_with_role_only_expands_series_of_that_role(app, client, db, factory, monkeypatch):
+    company = factory.company()
+    admin = factory.employee(company, role="Admin")
+    cook = factory.employee(company, role="Cocina")
+    waiter = factory.employee(company, role="Sala")
+    shift_type = factory.shift_type()
+    for employee in (cook, waiter):
+        db.session.add(
+            ShiftSeries(
+                company_id=company.id,
+                employee_id=employee.id,
+                type_id=shift_type.id,
+                start_date=date(2026, 3, 2),
+                end_date=None,
+                start_time=time(8, 0),
+                end_time=time(15, 0),
+                weekdays_mask=0b0011111,
+                interval_weeks=1,
+            )
+        )
+    db.session.commit()
+    cook_id = cook.id
+
+    expanded_for = []
+    real_expand = shifts_routes._expand_series
+
+    def spy(series, *args, **kwargs):
+        expanded_for.extend(ser.employee_id for ser in series)
+        return real_expand(series, *args, **kwargs)
+
+    monkeypatch.setattr(shifts_routes, "_expand_series", spy)
+    r = client.get(
+        "/api/shifts/coverage?from=2026-03-02&to=2026-03-08&role_id="
+        + str(factory.role_id("Cocina")),
+        headers=auth_headers(admin),
+    )
+
+    assert r.status_code == 200, r.get_json()
+    assert expanded_for == [cook_id]
+    assert [d["scheduled"] for d in r.get_json()["days"]] == [1, 1, 1, 1, 1, 0, 0]
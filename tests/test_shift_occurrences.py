@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+import pytest
+
+from api.models import ShiftOccurrence, ShiftOccurrenceWindow
+from api.utils_auth.utils_shifts import covers_horizon, occurrence_horizon
+from conftest import auth_headers
+
+
+@pytest.fixture
+def company_with_series(client, factory):
+    company = factory.company()
+    admin = factory.employee(company, role="Admin")
+    staff = [factory.employee(company) for _ in range(3)]
+    shift_type = factory.shift_type()
+    headers = auth_headers(admin)
+    today = date.today()
+    for i, employee in enumerate(staff):
+        r = client.post(
+            "/api/shifts/series",
+            headers=headers,
+            json={
+                "employee_id": employee.id,
+                "type_id": shift_type.id,
+                "start_date": (today - timedelta(days=20 + i)).isoformat(),
+                "end_date": None,
+                "start_time": "08:00",
+                "end_time": "15:00",
+                "weekdays": ["MO", "WE", "FR"] if i % 2 else ["TU", "TH", "SA"],
+                "interval_weeks": 1 + i % 2,
+            },
+        )
+        assert r.status_code == 201, r.get_json()
+    return headers
+
+
+def _calendar(client, headers, d_from: date, d_to: date):
+    r = client.get(
+        f"/api/shifts/calendar?from={d_from.isoformat()}&to={d_to.isoformat()}",
+        headers=headers,
+    )
+    assert r.status_code == 200
+    return r.get_json()["employees"]
+
+
+def test_enabled_without_refresh_uses_live_expansion(client, db, company_with_series, monkeypatch):
+    headers = company_with_series
+    today = date.today()
+    d_from, d_to = today - timedelta(days=7), today + timedelta(days=21)
+    live = _calendar(client, headers, d_from, d_to)
+    assert any(e["shifts"] for e in live)
+
+    # activado pero sin `refresh-shift-occurrences`: no hay nada materializado
+    monkeypatch.setenv("SHIFT_OCCURRENCES_ENABLED", "1")
+    assert db.session.get(ShiftOccurrenceWindow, 1) is None
+    assert not covers_horizon(d_from, d_to)
+    assert _calendar(client, headers, d_from, d_to) == live
+
+
+def test_reads_use_only_the_materialized_window(app, client, db, company_with_series, monkeypatch):
+    headers = company_with_series
+    today = date.today()
+    h_from, h_to = occurrence_horizon()
+    inside = (today - timedelta(days=7), today + timedelta(days=21))
+    beyond = (h_to - timedelta(days=10), h_to + timedelta(days=10))
+    expected_inside = _calendar(client, headers, *inside)
+    expected_beyond = _calendar(client, headers, *beyond)
+
+    monkeypatch.setenv("SHIFT_OCCURRENCES_ENABLED", "1")
+    result = app.test_cli_runner().invoke(args=["refresh-shift-occurrences"])
+    assert result.exit_code == 0, result.output
+    assert db.session.scalar(db.select(db.func.count()).select_from(ShiftOccurrence)) > 0
+    assert covers_horizon(*inside)
+    assert not covers_horizon(*beyond)
+
+    assert _calendar(client, headers, *inside) == expected_inside
+    assert _calendar(client, headers, *beyond) == expected_beyond
@@ -0,0 +1,43 @@
+from datetime import date, time
+
+from api.models import Shifts
+from conftest import auth_headers
+
+
+def test_bulk_rejects_overlap_with_overlapping_stored_shifts(client, db, factory):
+    company = factory.company()
+    admin = factory.employee(company, role="Admin")
+    employee = factory.employee(company)
+    shift_type = factory.shift_type()
+    day = date(2026, 3, 2)
+    # datos ya solapados entre sí (p. ej. creados desde /admin)
+    for start, end in ((time(8), time(17)), (time(9), time(10))):
+        db.session.add(
+            Shifts(
+                company_id=company.id,
+                employee_id=employee.id,
+                type_id=shift_type.id,
+                date=day,
+                start_time=start,
+                end_time=end,
+            )
+        )
+    db.session.commit()
+    row = {"employee_id": employee.id, "type_id": shift_type.id, "date": day.isoformat()}
+
+    r = client.post(
+        "/api/shifts/bulk",
+        headers=auth_headers(admin),
+        json={
+            "shifts": [
+                {**row, "start_time": "11:00", "end_time": "12:00"},
+                {**row, "start_time": "17:00", "end_time": "18:00"},
+            ]
+        },
+    )
+
+    assert r.status_code in (200, 201), r.get_json()
+    results = r.get_json()["results"]
+    assert not results[0]["ok"]
+    assert "solapa" in results[0]["error"]
+    assert results[1]["ok"]
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+from api.models import PunchType, TimePunch, TimePunchState
+from conftest import auth_headers
+
+
+def test_batch_only_touches_state_of_authorized_employees(client, db, factory):
+    company, other = factory.company(), factory.company()
+    admin = factory.employee(company, role="Admin")
+    own = factory.employee(company)
+    foreign = factory.employee(other)
+    own_id, foreign_id = own.id, foreign.id
+    at = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+
+    r = client.post(
+        "/api/time-punch/batch",
+        headers=auth_headers(admin),
+        json={
+            "punches": [
+                {"employee_id": own_id, "punch_type": "IN", "punched_at": at},
+                {"employee_id": foreign_id, "punch_type": "IN", "punched_at": at},
+                {"employee_id": 999999, "punch_type": "IN", "punched_at": at},
+            ]
+        },
+    )
+
+    assert r.status_code == 201, r.get_json()
+    results = r.get_json()["results"]
+    assert results[0]["ok"]
+    assert results[1] == {
+        "index": 1,
+        "ok": False,
+        "error": "Forbidden: el empleado no pertenece a tu empresa",
+    }
+    assert results[2]["error"] == "Empleado no encontrado"
+
+    states = db.session.execute(db.select(TimePunchState.employee_id)).scalars().all()
+    assert states == [own_id]
+    punches = db.session.execute(db.select(TimePunch.employee_id)).scalars().all()
+    assert punches == [own_id]
+
+
+def test_start_reloads_state_row_created_concurrently(client, db, factory, monkeypatch):
+    company = factory.company()
+    employee = factory.employee(company)
+    employee_id = employee.id
+    headers = auth_headers(employee)
+    at = datetime.now(timezone.utc) - timedelta(hours=1)
+    punch = TimePunch(employee_id=employee_id, punch_type=PunchType.IN, punched_at=at)
+    db.session.add(punch)
+    db.session.flush()
+    db.session.add(
+        TimePunchState(
+            employee_id=employee_id,
+            last_punch_id=punch.id,
+            last_type=PunchType.IN,
+            last_at=at,
+        )
+    )
+    db.session.commit()
+    punch_id = punch.id
+    db.session.expunge_all()
+
+    # simula la carrera: la primera lectura no ve la fila que otra petición ya insertó
+    get = db.session.get
+    misses = []
+
+    def racing_get(entity, ident, **kwargs):
+        if entity is TimePunchState and not misses:
+            misses.append(ident)
+            return None
+        return get(entity, ident, **kwargs)
+
+    monkeypatch.setattr(db.session, "get", racing_get)
+
+    r = client.post("/api/time-punch/start", headers=headers)
+
+    assert misses == [employee_id]
+    assert r.status_code == 409, r.get_json()
+    assert r.get_json()["error"] == "Ya tienes un turno abierto"
+    punches = db.session.execute(db.select(TimePunch.id)).scalars().all()
+    assert punches == [punch_id]
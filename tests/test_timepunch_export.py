@@ -0,0 +1,46 @@
+import csv
+import io
+import json
+
+from conftest import auth_headers
+
+
+def test_export_csv_neutralizes_formula_notes(client, factory):
+    company = factory.company()
+    admin = factory.employee(company, role="Admin")
+    employee = factory.employee(company)
+    headers = auth_headers(admin)
+    notes = ['=HYPERLINK("http://x","y")', "-5 min", "@SUM(A1)", "llegada normal"]
+    r = client.post(
+        "/api/time-punch/batch",
+        headers=headers,
+        json={
+            "punches": [
+                {
+                    "employee_id": employee.id,
+                    "punch_type": punch_type,
+                    "punched_at": f"2026-03-02T{8 + i:02d}:00:00+00:00",
+                    "note": note,
+                }
+                for i, (punch_type, note) in enumerate(
+                    zip(["IN", "BREAK_START", "BREAK_END", "OUT"], notes)
+                )
+            ]
+        },
+    )
+    assert r.get_json()["inserted"] == 4, r.get_json()
+    query = {"employee_id": employee.id, "from": "2026-03-02", "to": "2026-03-02"}
+
+    r = client.get("/api/time-punch/export", headers=headers, query_string={**query, "format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(r.get_data(as_text=True))))
+    assert [row["note"] for row in rows] == [
+        "'=HYPERLINK(\"http://x\",\"y\")",
+        "'-5 min",
+        "'@SUM(A1)",
+        "llegada normal",
+    ]
+
+    # NDJSON no va a hojas de cálculo: se exporta tal cual
+    r = client.get("/api/time-punch/export", headers=headers, query_string={**query, "format": "ndjson"})
+    lines = r.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["note"] for line in lines] == notes
@@ -0,0 +1,109 @@
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from api.models import DailyWorkSummary
+from api.utils_auth import utils_timepunch
+from api.utils_auth.utils_timepunch import reconstruir_rollup
+from conftest import auth_headers
+
+# Europe/Madrid en marzo de 2026 (antes del cambio de hora) = UTC+1
+PUNCHES = [
+    # sesión del día anterior que acaba dentro de la ventana: no cuenta
+    ("IN", "2026-03-01T22:00:00"),
+    ("OUT", "2026-03-02T01:00:00"),
+    # sesión normal con pausa: 8h netas
+    ("IN", "2026-03-02T08:00:00"),
+    ("BREAK_START", "2026-03-02T12:00:00"),
+    ("BREAK_END", "2026-03-02T13:00:00"),
+    ("OUT", "2026-03-02T17:00:00"),
+    # empieza el último día y acaba pasada la medianoche: cuenta entera (4h)
+    ("IN", "2026-03-04T21:00:00"),
+    ("OUT", "2026-03-05T01:00:00"),
+    # empieza después de la ventana: no cuenta
+    ("IN", "2026-03-05T08:00:00"),
+    ("OUT", "2026-03-05T10:00:00"),
+]
+
+
+def _utc(local_iso: str) -> str:
+    local = datetime.fromisoformat(local_iso).replace(tzinfo=ZoneInfo("Europe/Madrid"))
+    return local.astimezone(timezone.utc).isoformat()
+
+
+@pytest.fixture
+def punched(client, db, factory):
+    company = factory.company()
+    admin = factory.employee(company, role="Admin")
+    employee = factory.employee(company)
+    headers = auth_headers(admin)
+    r = client.post(
+        "/api/time-punch/batch",
+        headers=headers,
+        json={
+            "punches": [
+                {"employee_id": employee.id, "punch_type": t, "punched_at": _utc(at)}
+                for t, at in PUNCHES
+            ]
+        },
+    )
+    assert r.status_code == 201 and r.get_json()["failed"] == 0, r.get_json()
+    return employee.id, headers
+
+
+def _summary(client, headers, employee_id, rollup_min_days, monkeypatch):
+    monkeypatch.setattr(utils_timepunch, "WORK_SUMMARY_ROLLUP_MIN_DAYS", rollup_min_days)
+    r = client.get(
+        "/api/time-punch/summary",
+        headers=headers,
+        query_string={
+            "employee_id": employee_id,
+            "from": "2026-03-02",
+            "to": "2026-03-04",
+            "tz": "Europe/Madrid",
+            "sessions": "0",
+        },
+    )
+    assert r.status_code == 200, r.get_json()
+    return r.get_json()
+
+
+def test_summary_matches_between_live_and_rollup(client, db, punched, monkeypatch):
+    employee_id, headers = punched
+    expected = {
+        "employee_id": employee_id,
+        "days_worked": 2,
+        "total_seconds": 12 * 3600,
+        "total_hours": 12.0,
+        "human_total": "12h 0m",
+    }
+
+    live = _summary(client, headers, employee_id, 0, monkeypatch)
+    # rollup mantenido al vuelo por el lote de fichajes
+    incremental = _summary(client, headers, employee_id, 1, monkeypatch)
+    reconstruir_rollup(date(2026, 3, 1), date(2026, 3, 5))
+    db.session.commit()
+    rebuilt = _summary(client, headers, employee_id, 1, monkeypatch)
+
+    assert live == incremental == rebuilt == expected
+    # el backfill corta en 'to' con la misma regla
+    db.session.execute(db.delete(DailyWorkSummary))
+    reconstruir_rollup(date(2026, 3, 2), date(2026, 3, 4))
+    db.session.commit()
+    assert _summary(client, headers, employee_id, 1, monkeypatch) == expected
+
+
+def test_summary_with_sessions_keeps_session_detail(client, punched, monkeypatch):
+    employee_id, headers = punched
+    monkeypatch.setattr(utils_timepunch, "WORK_SUMMARY_ROLLUP_MIN_DAYS", 1)
+
+    r = client.get(
+        "/api/time-punch/summary",
+        headers=headers,
+        query_string={"employee_id": employee_id, "from": "2026-03-02", "to": "2026-03-04"},
+    )
+
+    data = r.get_json()
+    assert [s["date"] for s in data["sessions"]] == ["2026-03-02", "2026-03-04"]
+    assert data["total_seconds"] == 12 * 3600
@@ -0,0 +1,79 @@
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from api.utils_auth.utils_shifts import series_occurrences, weeks_between
+
+
+def _series(start_date: date, weekdays_mask: int, interval_weeks: int = 1):
+    return SimpleNamespace(
+        start_date=start_date,
+        weekdays_mask=weekdays_mask,
+        interval_weeks=interval_weeks,
+        start_time=time(8, 0),
+        end_time=time(15, 0),
+    )
+
+
+def _day_walk(ser, start: date, end: date) -> list[date]:
+    """Referencia: el recorrido día a día que hacía _expand_series antes."""
+    out = []
+    day = start
+    while day <= end:
+        if ser.weekdays_mask & (1 << day.weekday()):
+            if weeks_between(ser.start_date, day) % ser.interval_weeks == 0:
+                out.append(day)
+        day += timedelta(days=1)
+    return out
+
+
+MONDAY = date(2025, 3, 3)
+WEDNESDAY = date(2025, 3, 5)
+
+
+@pytest.mark.parametrize(
+    "start_date, mask, interval, start, end",
+    [
+        # máscaras: un solo bit, todos, ninguno
+        (MONDAY, 0b0000001, 1, MONDAY, MONDAY + timedelta(days=60)),
+        (MONDAY, 0b1000000, 1, MONDAY, MONDAY + timedelta(days=60)),
+        (MONDAY, 0b1111111, 1, MONDAY, MONDAY + timedelta(days=60)),
+        (MONDAY, 0, 1, MONDAY, MONDAY + timedelta(days=60)),
+        # interval_weeks > 1
+        (MONDAY, 0b0010101, 2, MONDAY, MONDAY + timedelta(days=120)),
+        (MONDAY, 0b1111111, 3, MONDAY, MONDAY + timedelta(days=120)),
+        # start cae en una semana inactiva
+        (MONDAY, 0b0011111, 2, MONDAY + timedelta(weeks=1, days=2), MONDAY + timedelta(days=90)),
+        (MONDAY, 0b0011111, 4, MONDAY + timedelta(weeks=5), MONDAY + timedelta(days=90)),
+        # start_date a mitad de semana (los días anteriores de esa semana no cuentan)
+        (WEDNESDAY, 0b1111111, 1, WEDNESDAY, WEDNESDAY + timedelta(days=30)),
+        (WEDNESDAY, 0b0000011, 2, WEDNESDAY, WEDNESDAY + timedelta(days=60)),
+        # rangos que empiezan o acaban a mitad de semana
+        (MONDAY, 0b1111111, 1, MONDAY + timedelta(days=3), MONDAY + timedelta(days=25)),
+        (MONDAY, 0b1010101, 2, MONDAY + timedelta(days=10), MONDAY + timedelta(days=40)),
+        (WEDNESDAY, 0b0110110, 3, WEDNESDAY + timedelta(days=16), WEDNESDAY + timedelta(days=80)),
+        # rango de un día y rango vacío
+        (MONDAY, 0b1111111, 1, MONDAY + timedelta(days=4), MONDAY + timedelta(days=4)),
+        (MONDAY, 0b1111111, 1, MONDAY + timedelta(days=5), MONDAY + timedelta(days=4)),
+    ],
+)
+def test_series_occurrences_matches_day_walk(start_date, mask, interval, start, end):
+    ser = _series(start_date, mask, interval)
+    assert list(series_occurrences(ser, start, end)) == _day_walk(ser, start, end)
+
+
+def test_series_occurrences_matches_day_walk_exhaustive():
+    # todas las máscaras con cada intervalo, start_date en cada día de la semana
+    # y ventanas desplazadas día a día
+    for weekday in range(7):
+        start_date = MONDAY + timedelta(days=weekday)
+        for interval in (1, 2, 3):
+            for mask in range(128):
+                ser = _series(start_date, mask, interval)
+                for offset in range(0, 15, 4):
+                    start = start_date + timedelta(days=offset)
+                    end = start + timedelta(days=31)
+                    assert list(series_occurrences(ser, start, end)) == _day_walk(
+                        ser, start, end
+                    ), (weekday, interval, mask, offset)